@@ -1,67 +1,392 @@
 import argparse
-import json
 import logging
+import os
+import posixpath
+import shutil
+import sys
+import tempfile
+import time
+from functools import partial
 from importlib.metadata import version as pkg_version
+from itertools import chain
 
-import requests
-
-from . import helper
+from . import (
+    batch,
+    bom,
+    cache,
+    helper,
+    manifest,
+    network,
+    pipeline,
+    prefetch,
+    processes,
+)
 
 __version__ = pkg_version("JLC2KiCadLib")
 
-from .footprint.footprint import create_footprint, get_footprint_info
+from .footprint.footprint import create_footprint, get_datasheet_link
 from .symbol.symbol import create_symbol
 
+# file extension of the 3D models, by format
+MODEL_EXTENSIONS = {"STEP": "step", "WRL": "wrl"}
+
 
 def add_component(component_id, args):
+    # a component taking longer than its deadline fails, instead of stalling
+    # the whole batch
+    timeout = getattr(args, "component_timeout", None)
+    with network.deadline(timeout), network.prefetch_owner(component_id):
+        return _add_component(component_id, args)
+
+
+def _add_component(component_id, args):
+    component_uuids = resolve_component(component_id, args)
+    if not component_uuids:
+        return component_uuids
+
+    fetch_component(component_id, component_uuids, args)
+    return convert_component(component_id, component_uuids, args)
+
+
+def resolve_component(component_id, args):
+    """
+    Return the footprint uuid and the symbol uuids of a component, () if it
+    could not be found, or None if it is skipped as already created.
+    """
     logging.info(f"creating library for component {component_id}")
-    data = json.loads(
-        requests.get(
-            f"https://easyeda.com/api/products/{component_id}/svgs",
-            headers={"User-Agent": helper.get_user_agent()},
-        ).content.decode()
-    )
+    if args.skip_existing and is_created(component_id, args):
+        logging.info(f"Component {component_id} already created, skipping.")
+        return None
 
-    if not data["success"]:
+    component_uuids = network.get_component_uuids(component_id)
+
+    if component_uuids is None:
         logging.error(
             f"failed to get component uuid for {component_id}\n"
             "The component # is probably wrong. Check a possible typo and that the "
             "component exists on easyEDA"
         )
         return ()
+    return component_uuids
 
-    footprint_component_uuid = data["result"][-1]["component_uuid"]
-    symbol_component_uuid = [i["component_uuid"] for i in data["result"][:-1]]
 
-    if args.footprint_creation:
-        footprint_name, datasheet_link = create_footprint(
-            footprint_component_uuid=footprint_component_uuid,
-            component_id=component_id,
-            footprint_lib=args.footprint_lib,
-            output_dir=args.output_dir,
-            model_base_variable=args.model_base_variable,
-            model_dir=args.model_dir,
-            skip_existing=args.skip_existing,
-            models=args.models,
+def fetch_component(component_id, component_uuids, args, wait=False):
+    """
+    Start downloading the data of a component in the background, the
+    converters pick it up as they need it.
+
+    wait : if True, wait for the downloads to complete, the 3D models included
+
+    Returns the uuids of the component and of the 3D models being downloaded,
+    the latter only known with `wait`. With `wait`, returns None if the
+    component is skipped as unchanged (see --sync) before its 3D models are
+    downloaded.
+    """
+    footprint_component_uuid, _ = component_uuids
+
+    # download the footprint and all the symbol units concurrently
+    data_uuids, metadata_uuids = _get_source_uuids(component_uuids, args)
+    network.prefetch_component_data(data_uuids)
+    network.prefetch_component_metadata(metadata_uuids)
+    if not wait:
+        return component_uuids, []
+
+    fetched = network.wait_prefetched(data_uuids + metadata_uuids)
+    if getattr(args, "sync", False):
+        source = get_source(component_uuids, args)
+        if skip_unchanged(component_id, source, args):
+            return None
+
+    model_uuids = []
+    if args.footprint_creation and args.models:
+        model_uuids = prefetch.get_model_uuids(fetched.get(footprint_component_uuid))
+        for model_uuid in model_uuids:
+            network.prefetch_models(model_uuid, args.models)
+        network.wait_prefetched(model_uuids)
+    return component_uuids, model_uuids
+
+
+def _get_source_uuids(component_uuids, args):
+    """
+    Return the uuids whose data, and the uuids whose metadata only, a component
+    is created from.
+    """
+    footprint_component_uuid, symbol_component_uuid = component_uuids
+
+    # Only the metadata of the footprint is used without footprint creation, and
+    # of the first symbol uuid of a multi-unit symbol (the whole component, see
+    # create_symbol).
+    metadata_uuids = [] if args.footprint_creation else [footprint_component_uuid]
+    data_uuids = [footprint_component_uuid] if args.footprint_creation else []
+    if args.symbol_creation and len(symbol_component_uuid) >= 2:
+        metadata_uuids.append(symbol_component_uuid[0])
+        data_uuids += symbol_component_uuid[1:]
+    elif args.symbol_creation:
+        data_uuids += symbol_component_uuid
+    return data_uuids, metadata_uuids
+
+
+def convert_component(component_id, component_uuids, args, model_uuids=()):
+    """
+    Create the footprint, symbol and 3D models of a component. With --sync, a
+    component created from the same data and options by the same version of
+    JLC2KiCadLib is left as it is.
+
+    model_uuids : uuids of the 3D models downloaded by fetch_component
+    """
+    footprint_component_uuid, symbol_component_uuid = component_uuids
+    try:
+        source = None
+        if getattr(args, "sync", False):
+            source = get_source(component_uuids, args)
+            if skip_unchanged(component_id, source, args):
+                return
+
+        start = time.perf_counter()
+        if args.footprint_creation:
+            footprint_name, datasheet_link = create_footprint(
+                footprint_component_uuid=footprint_component_uuid,
+                component_id=component_id,
+                footprint_lib=args.footprint_lib,
+                output_dir=args.output_dir,
+                model_base_variable=args.model_base_variable,
+                model_dir=args.model_dir,
+                skip_existing=args.skip_existing,
+                models=args.models,
+            )
+        else:
+            # only the datasheet link of the footprint is needed
+            datasheet_link = get_datasheet_link(footprint_component_uuid)
+            footprint_name = ""
+
+        symbol = None
+        if args.symbol_creation:
+            symbol = create_symbol(
+                symbol_component_uuid=symbol_component_uuid,
+                footprint_name=footprint_name.replace(
+                    ".pretty", ""
+                ),  # see https://github.com/TousstNicolas/JLC2KiCad_lib/issues/47
+                datasheet_link=datasheet_link,
+                library_name=args.symbol_lib,
+                symbol_path=args.symbol_lib_dir,
+                output_dir=args.output_dir,
+                component_id=component_id,
+                skip_existing=args.skip_existing,
+            )
+        duration = time.perf_counter() - start
+        # the data of a component created with errors may be missing
+        if source is None and not batch.get_current_errors():
+            source = get_source(component_uuids, args)
+        record_component(component_id, args, footprint_name, symbol, source, duration)
+    finally:
+        # e.g. the 3D models of a footprint skipped as existing
+        network.discard_prefetched(
+            [footprint_component_uuid, *symbol_component_uuid, *model_uuids]
         )
-    else:
-        _, datasheet_link, _, _ = get_footprint_info(footprint_component_uuid)
-        footprint_name = ""
 
-    if args.symbol_creation:
-        create_symbol(
-            symbol_component_uuid=symbol_component_uuid,
-            footprint_name=footprint_name.replace(
-                ".pretty", ""
-            ),  # see https://github.com/TousstNicolas/JLC2KiCad_lib/issues/47
-            datasheet_link=datasheet_link,
-            library_name=args.symbol_lib,
-            symbol_path=args.symbol_lib_dir,
-            output_dir=args.output_dir,
-            component_id=component_id,
-            skip_existing=args.skip_existing,
+
+def _convert_fetched(component_id, fetched, args):
+    component_uuids, model_uuids = fetched
+    return convert_component(component_id, component_uuids, args, model_uuids)
+
+
+def get_source(component_uuids, args):
+    """
+    Return what the files of a component are created from, as recorded in the
+    manifest of the output directory: a hash of its EasyEDA data, the version
+    of JLC2KiCadLib and the options shaping the files. Return None if the
+    manifest is not recorded, or if the data could not be retrieved.
+    """
+    if manifest.get_manifest() is None:
+        return None
+
+    data_uuids, metadata_uuids = _get_source_uuids(component_uuids, args)
+    payloads = [network.get_component_data(uuid) for uuid in data_uuids]
+    payloads += [network.get_component_metadata(uuid) for uuid in metadata_uuids]
+    if any(payload is None for payload in payloads):
+        return None
+    return {
+        "data": manifest.hash_payloads(payloads),
+        "version": __version__,
+        "options": get_source_options(args),
+    }
+
+
+def get_source_options(args):
+    """Return the options shaping the files of a component."""
+    return {
+        "footprint_creation": args.footprint_creation,
+        "symbol_creation": args.symbol_creation,
+        "footprint_lib": args.footprint_lib,
+        "model_dir": args.model_dir,
+        "models": [model for model in MODEL_EXTENSIONS if model in args.models],
+        "model_base_variable": args.model_base_variable,
+        "symbol_lib": args.symbol_lib,
+        "symbol_lib_dir": args.symbol_lib_dir,
+    }
+
+
+def record_component(
+    component_id, args, footprint_name, symbol, source=None, duration=None
+):
+    """
+    Record the files created for a component in the manifest of the output
+    directory.
+
+    footprint_name : "library:name" of the footprint, "" if not created
+    symbol : (library name, symbol name) of the symbol, None if not created
+    source : what the files are created from, see get_source
+    duration : number of seconds taken to create the files
+    """
+    component_manifest = manifest.get_manifest()
+    # a component created with errors is created again by the next run
+    if component_manifest is None or batch.get_current_errors():
+        return
+
+    entry = {
+        "footprint": None,
+        "models": {},
+        "symbol": None,
+        "symbol_library": None,
+        "symbol_library_mtime": None,
+        "hashes": {},
+        "source": source,
+        "duration": round(duration, 3) if duration is not None else None,
+    }
+    if footprint_name:
+        name = footprint_name[len(args.footprint_lib) + 1 :]
+        entry["footprint"] = f"{args.footprint_lib}/{name}.kicad_mod"
+        for model_format, extension in MODEL_EXTENSIONS.items():
+            if model_format in args.models:
+                model = f"{args.footprint_lib}/{args.model_dir}/{name}.{extension}"
+                # EasyEDA has no 3D model for some footprints
+                exists = component_manifest.exists(model)
+                entry["models"][model_format] = model if exists else None
+    if symbol:
+        library_name, entry["symbol"] = symbol
+        entry["symbol_library"] = f"{args.symbol_lib_dir}/{library_name}.kicad_sym"
+        entry["symbol_library_mtime"] = component_manifest.modified(
+            entry["symbol_library"]
         )
 
+    # the symbol libraries are shared with other components, they are not hashed
+    for path in [entry["footprint"], *entry["models"].values()]:
+        if path is not None:
+            entry["hashes"][path] = manifest.hash_file(
+                os.path.join(args.output_dir, path)
+            )
+    component_manifest.record(component_id, entry)
+
+
+def is_created(component_id, args):
+    """
+    Return whether the manifest of the output directory records the component
+    with all the files asked for by the options, and these files exist.
+
+    The symbol library is shared with other components: once modified since
+    the component was recorded, it is checked to still hold the symbol.
+    """
+    component_manifest = manifest.get_manifest()
+    if component_manifest is None:
+        return False
+    entry = component_manifest.get(component_id)
+    if entry is None:
+        return False
+
+    paths = []
+    if args.footprint_creation:
+        footprint = entry["footprint"]
+        if footprint is None or posixpath.dirname(footprint) != args.footprint_lib:
+            return False
+        paths.append(footprint)
+        name = posixpath.basename(footprint)[: -len(".kicad_mod")]
+        for model_format, extension in MODEL_EXTENSIONS.items():
+            if model_format not in args.models:
+                continue
+            if model_format not in entry["models"]:
+                return False
+            model = entry["models"][model_format]
+            if model is None:
+                continue
+            if model != f"{args.footprint_lib}/{args.model_dir}/{name}.{extension}":
+                return False
+            paths.append(model)
+
+    if args.symbol_creation:
+        if entry["symbol"] is None:
+            return False
+        library_name = args.symbol_lib or entry["symbol"]
+        library = f"{args.symbol_lib_dir}/{library_name}.kicad_sym"
+        if entry["symbol_library"] != library:
+            return False
+        if component_manifest.modified(library) != entry.get(
+            "symbol_library_mtime"
+        ) and entry["symbol"] not in component_manifest.symbols(library):
+            return False
+        paths.append(library)
+
+    return all(component_manifest.exists(path) for path in paths)
+
+
+def skip_unchanged(component_id, source, args):
+    """
+    Return whether a component is skipped as unchanged (see is_unchanged), and
+    count it as such.
+    """
+    if not is_unchanged(component_id, source, args):
+        return False
+    logging.info(f"Component {component_id} unchanged, skipping.")
+    manifest.get_manifest().keep(component_id)
+    return True
+
+
+def is_unchanged(component_id, source, args):
+    """
+    Return whether a component is created (see is_created) from the same
+    `source` (see get_source) as recorded in the manifest of the output
+    directory, and does not need to be created again.
+    """
+    if source is None or not is_created(component_id, args):
+        return False
+
+    recorded = manifest.get_manifest().get(component_id).get("source") or {}
+    changed = [key for key in source if recorded.get(key) != source[key]]
+    if changed:
+        logging.debug(f"Component {component_id}: {', '.join(changed)} changed")
+    return not changed
+
+
+def get_pipeline_stages(args):
+    """
+    Return the stages of the pipeline creating components (see
+    pipeline.run_pipeline): resolving their uuids, downloading their data and
+    3D models, and converting them.
+    """
+    timeout = getattr(args, "component_timeout", None)
+    return [
+        pipeline.Stage(
+            "resolve",
+            partial(_run_stage, timeout, resolve_component, args=args),
+            workers=pipeline.DEFAULT_RESOLVE_WORKERS,
+        ),
+        pipeline.Stage(
+            "fetch",
+            partial(_run_stage, timeout, fetch_component, args=args, wait=True),
+            workers=args.prefetch_concurrency,
+        ),
+        pipeline.Stage(
+            "convert",
+            partial(_run_stage, timeout, _convert_fetched, args=args),
+            workers=args.jobs,
+        ),
+    ]
+
+
+def _run_stage(timeout, function, component_id, *args, **kwargs):
+    # the deadline applies to each stage, not to the time spent in the queues
+    with network.deadline(timeout), network.prefetch_owner(component_id):
+        return function(component_id, *args, **kwargs)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -71,7 +396,8 @@ def main():
         epilog=(
             "example use : \n"
             "     JLC2KiCadLib C1337258 C24112 -dir My_lib "
-            "-symbol_lib My_Symbol_lib --no_footprint"
+            "-symbol_lib My_Symbol_lib --no_footprint\n"
+            "     JLC2KiCadLib --bom bom.csv --pipeline -j 8"
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
@@ -80,10 +406,24 @@ def main():
         "components",
         metavar="JLCPCB_part_#",
         type=str,
-        nargs="+",
+        nargs="*",
         help="List of JLCPCB part # from the components you want to create",
     )
 
+    parser.add_argument(
+        "--bom",
+        dest="bom",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help=(
+            "Also create the components listed in FILE: a JLCPCB or KiCad BOM "
+            "exported as CSV, or a list of JLCPCB part #, one per line. Use - to "
+            "read it from the standard input. The list is read as the components "
+            "are created"
+        ),
+    )
+
     parser.add_argument(
         "-dir",
         dest="output_dir",
@@ -163,7 +503,21 @@ def main():
         action="store_true",
         help=(
             "Use --skip_existing if you want do not want to replace already existing "
-            "footprints and symbols"
+            "footprints and symbols. The components recorded in the manifest of "
+            "OUTPUT_DIR with all their files are skipped without any request to "
+            "EasyEDA"
+        ),
+    )
+
+    parser.add_argument(
+        "--sync",
+        dest="sync",
+        action="store_true",
+        help=(
+            "Use --sync to only create again the components recorded in the "
+            "manifest of OUTPUT_DIR whose EasyEDA data, JLC2KiCadLib version or "
+            "options changed since they were created. The number of components "
+            "unchanged, updated and new is written once they are all processed"
         ),
     )
 
@@ -179,6 +533,388 @@ def main():
         ),
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help=(
+            "Set the number of components created concurrently, default is 1. "
+            "The logs of each component are written once it is created, in the "
+            "order the components were given"
+        ),
+    )
+
+    parser.add_argument(
+        "--prefetch",
+        dest="prefetch",
+        action="store_true",
+        help=(
+            "Use --prefetch to download the data of all the components concurrently "
+            "before creating them, recommended for long lists of components"
+        ),
+    )
+
+    parser.add_argument(
+        "-prefetch_concurrency",
+        dest="prefetch_concurrency",
+        type=int,
+        default=prefetch.DEFAULT_CONCURRENCY,
+        help=(
+            "Set the maximum number of requests in flight with --prefetch, and of "
+            "components downloaded at once with --pipeline, default is "
+            f"{prefetch.DEFAULT_CONCURRENCY}"
+        ),
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        dest="pipeline",
+        action="store_true",
+        help=(
+            "Use --pipeline to download the data of the next components while "
+            "others are created (by --jobs threads), recommended for long lists of "
+            "components"
+        ),
+    )
+
+    parser.add_argument(
+        "-component_timeout",
+        dest="component_timeout",
+        type=float,
+        default=None,
+        help=(
+            "Set the number of seconds after which a component still waiting on "
+            "EasyEDA fails, by default there is no limit"
+        ),
+    )
+
+    parser.add_argument(
+        "-processes",
+        dest="processes",
+        type=int,
+        default=0,
+        help=(
+            "Set the number of processes converting footprint shapes and WRL "
+            "models, for long lists of components on machines with many cores. "
+            "Default is 0, the conversions are run by the --jobs threads"
+        ),
+    )
+
+    _add_network_arguments(parser)
+    _add_cache_arguments(parser)
+
+    parser.add_argument(
+        "--no_cache",
+        dest="cache",
+        action="store_false",
+        help=(
+            "Use --no_cache if you do not want downloaded data to be cached between "
+            "runs"
+        ),
+    )
+
+    parser.add_argument(
+        "--offline",
+        dest="offline",
+        action="store_true",
+        help=(
+            "Use --offline to create the components from the cache only, without "
+            "any request to EasyEDA. Components whose data is not in the cache fail"
+        ),
+    )
+
+    _add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    if not args.components and args.bom is None:
+        parser.error("no JLCPCB part # given")
+    if args.offline and not args.cache:
+        parser.error("--offline cannot be used with --no_cache")
+    if args.offline and args.prefetch:
+        parser.error("--offline cannot be used with --prefetch")
+    if args.pipeline and args.prefetch:
+        parser.error("--pipeline cannot be used with --prefetch")
+    if args.sync and args.skip_existing:
+        parser.error("--sync cannot be used with --skip_existing")
+
+    components = args.components
+    if args.bom is not None:
+        try:
+            components = chain(components, bom.read_components(args.bom))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    helper.set_logging(args.logging_level, args.log_file)
+    _configure_session(args, offline=args.offline)
+    if args.offline:
+        # all the cached data is used, however old, and nothing is evicted
+        cache.configure_cache(
+            args.cache_dir,
+            ttl=None,
+            max_size=None,
+            namespace_ttls={"parts": None},
+            compression_level=args.cache_compression_level,
+        )
+    elif args.cache:
+        _configure_cache(args)
+    else:
+        # downloads are still shared between the components of this run
+        temporary_cache_dir = tempfile.mkdtemp(prefix="JLC2KiCadLib_")
+        cache.configure_cache(
+            temporary_cache_dir, ttl=None, max_size=None, compression_level=0
+        )
+
+    processes.configure_processes(args.processes)
+    component_manifest = manifest.configure_manifest(args.output_dir)
+    try:
+        if args.prefetch:
+            # all the components are downloaded before the first is created
+            components = list(components)
+            prefetch.prefetch(
+                components,
+                models=args.models,
+                concurrency=args.prefetch_concurrency,
+            )
+        if args.pipeline:
+            stages = get_pipeline_stages(args)
+            start = time.perf_counter()
+            results = pipeline.run_pipeline(components, stages)
+            pipeline.log_stages(stages, time.perf_counter() - start)
+        else:
+            results = batch.run_batch(
+                components, partial(add_component, args=args), jobs=args.jobs
+            )
+        if args.sync:
+            component_manifest.log_sync_report()
+        stats = network.get_coalescing_stats()
+        if stats.coalesced:
+            logging.info(
+                f"{stats.coalesced} of {stats.calls} fetches were shared with an "
+                "identical fetch already in flight"
+            )
+    finally:
+        manifest.configure_manifest(None)
+        processes.configure_processes(0)
+        network.close_session()
+        if not args.cache:
+            shutil.rmtree(temporary_cache_dir, ignore_errors=True)
+
+    if len(results) > 1 or any(result.status != "ok" for result in results):
+        batch.log_summary(results)
+    if any(result.status == "failed" for result in results):
+        sys.exit(1)
+
+
+def prefetch_main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "take JLCPCB part # and download the data of the components into the "
+            "cache, without creating any library"
+        ),
+        epilog=(
+            "example use : \n"
+            "     JLC2KiCadLib-prefetch C1337258 C24112 -models STEP WRL\n"
+            "     JLC2KiCadLib-prefetch -f parts.txt"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "components",
+        metavar="JLCPCB_part_#",
+        type=str,
+        nargs="*",
+        help="List of JLCPCB part # from the components you want to download",
+    )
+
+    parser.add_argument(
+        "-f",
+        dest="file",
+        type=str,
+        default=None,
+        help=(
+            "File listing JLCPCB part #: a JLCPCB or KiCad BOM exported as CSV, or "
+            "a list of JLCPCB part #, one per line. Use - to read it from the "
+            "standard input"
+        ),
+    )
+
+    parser.add_argument(
+        "-models",
+        dest="models",
+        nargs="*",
+        choices=["STEP", "WRL"],
+        type=str,
+        default="STEP",
+        help=(
+            "Select the 3D models to download. Default is STEP. If you do not want "
+            "any model to be downloaded, use the --models without arguments"
+        ),
+    )
+
+    parser.add_argument(
+        "-concurrency",
+        dest="concurrency",
+        type=int,
+        default=prefetch.DEFAULT_CONCURRENCY,
+        help=(
+            "Set the maximum number of requests in flight, default is "
+            f"{prefetch.DEFAULT_CONCURRENCY}"
+        ),
+    )
+
+    _add_network_arguments(parser)
+    _add_cache_arguments(parser)
+    _add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    component_ids = list(args.components)
+    if args.file:
+        try:
+            component_ids += bom.read_components(args.file)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    if not component_ids:
+        parser.error("no JLCPCB part # given")
+
+    helper.set_logging(args.logging_level, args.log_file)
+    _configure_session(args)
+    _configure_cache(args)
+
+    try:
+        stats = prefetch.prefetch(
+            component_ids, models=args.models, concurrency=args.concurrency
+        )
+    finally:
+        network.close_session()
+
+    if stats.not_found or stats.failed_requests:
+        sys.exit(1)
+
+
+def _add_network_arguments(parser):
+    """Add the options of the connections to EasyEDA."""
+    parser.add_argument(
+        "-pool_size",
+        dest="pool_size",
+        type=int,
+        default=network.DEFAULT_POOL_MAXSIZE,
+        help=(
+            "Set the maximum number of keep-alive connections kept open to each "
+            f"EasyEDA host, default is {network.DEFAULT_POOL_MAXSIZE}"
+        ),
+    )
+
+    parser.add_argument(
+        "-connect_timeout",
+        dest="connect_timeout",
+        type=float,
+        default=network.DEFAULT_CONNECT_TIMEOUT,
+        help=(
+            "Set the number of seconds to wait for a connection to EasyEDA, default "
+            f"is {network.DEFAULT_CONNECT_TIMEOUT}"
+        ),
+    )
+
+    parser.add_argument(
+        "-read_timeout",
+        dest="read_timeout",
+        type=float,
+        default=network.DEFAULT_READ_TIMEOUT,
+        help=(
+            "Set the number of seconds to wait for EasyEDA to send data, default is "
+            f"{network.DEFAULT_READ_TIMEOUT}"
+        ),
+    )
+
+    parser.add_argument(
+        "-retries",
+        dest="retries",
+        type=int,
+        default=network.DEFAULT_RETRIES,
+        help=(
+            "Set the number of times a request failing with a network or server "
+            f"error is sent again, default is {network.DEFAULT_RETRIES}"
+        ),
+    )
+
+    parser.add_argument(
+        "-base_url",
+        dest="base_url",
+        type=str,
+        default=None,
+        help=(
+            "Set the URL of a server standing in for EasyEDA, e.g. the local "
+            "JLC2KiCadLib-standin, by default requests are sent to EasyEDA"
+        ),
+    )
+
+
+def _add_cache_arguments(parser):
+    """Add the options of the persistent cache."""
+    parser.add_argument(
+        "-cache_dir",
+        dest="cache_dir",
+        type=str,
+        default=cache.get_default_cache_dir(),
+        help=(
+            "Set directory in which downloaded EasyEDA data is cached between runs, "
+            f'default is "{cache.get_default_cache_dir()}"'
+        ),
+    )
+
+    parser.add_argument(
+        "-cache_ttl",
+        dest="cache_ttl",
+        type=float,
+        default=cache.DEFAULT_TTL / (24 * 3600),
+        help=(
+            "Set the number of days after which cached data is downloaded again, "
+            f"default is {cache.DEFAULT_TTL // (24 * 3600)}"
+        ),
+    )
+
+    parser.add_argument(
+        "-cache_max_size",
+        dest="cache_max_size",
+        type=int,
+        default=cache.DEFAULT_MAX_SIZE // (1024 * 1024),
+        help=(
+            "Set the maximum size of the cache in MB, the least recently used "
+            f"entries are removed above it, default is "
+            f"{cache.DEFAULT_MAX_SIZE // (1024 * 1024)}"
+        ),
+    )
+
+    parser.add_argument(
+        "-resolve_ttl",
+        dest="resolve_ttl",
+        type=float,
+        default=cache.DEFAULT_PARTS_TTL / (24 * 3600),
+        help=(
+            "Set the number of days after which the cached footprint and symbol "
+            "uuids of a JLCPCB part # are requested again, default is "
+            f"{cache.DEFAULT_PARTS_TTL // (24 * 3600)}"
+        ),
+    )
+
+    parser.add_argument(
+        "-cache_compression_level",
+        dest="cache_compression_level",
+        type=int,
+        default=cache.DEFAULT_COMPRESSION_LEVEL,
+        help=(
+            "Set the level at which the cached EasyEDA data is compressed (zstd if "
+            "the zstandard package is installed, gzip otherwise), 0 to store it "
+            f"uncompressed, default is {cache.DEFAULT_COMPRESSION_LEVEL}"
+        ),
+    )
+
+
+def _add_logging_arguments(parser):
+    """Add the logging and version options."""
     parser.add_argument(
         "-logging_level",
         dest="logging_level",
@@ -205,12 +941,26 @@ def main():
         help="Print version number and exit",
     )
 
-    args = parser.parse_args()
 
-    helper.set_logging(args.logging_level, args.log_file)
+def _configure_session(args, offline=False):
+    network.configure_session(
+        pool_maxsize=args.pool_size,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        retries=args.retries,
+        offline=offline,
+        base_url=args.base_url,
+    )
+
 
-    for component in args.components:
-        add_component(component, args)
+def _configure_cache(args):
+    cache.configure_cache(
+        args.cache_dir,
+        ttl=args.cache_ttl * 24 * 3600,
+        max_size=args.cache_max_size * 1024 * 1024,
+        namespace_ttls={"parts": args.resolve_ttl * 24 * 3600},
+        compression_level=args.cache_compression_level,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+"""
+Concurrent conversion of a batch of components.
+
+Components are converted by a pool of worker threads. The log records emitted
+while converting a component are held back and written once the component is
+done, in the order the components were given, so that the output of a batch is
+the same whatever the number of workers.
+"""
+
+import contextvars
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# (ComponentResult, buffered) of the component being converted. Background
+# tasks started for a component run in a copy of this context, so that their
+# records are attributed to the component too.
+_current = contextvars.ContextVar("current_component", default=None)
+
+
+@dataclass
+class ComponentResult:
+    """Outcome of the conversion of one component."""
+
+    component_id: str
+    # "ok", "errors" (created, but errors were logged) or "failed"
+    status: str = "ok"
+    errors: int = 0
+    message: str = ""
+    duration: float = 0.0
+    records: list = field(default_factory=list, repr=False)
+
+
+class _ComponentLogHandler(logging.Handler):
+    """Collect the records emitted by the thread converting a component."""
+
+    def emit(self, record):
+        current = _current.get()
+        if current is None:
+            return
+        result, buffered = current
+        if record.levelno >= logging.ERROR:
+            result.errors += 1
+        if buffered:
+            result.records.append(record)
+
+
+class _HoldBackFilter(logging.Filter):
+    """Keep handlers from writing records that a worker thread holds back."""
+
+    def filter(self, record):
+        current = _current.get()
+        return current is None or not current[1]
+
+
+def run_batch(component_ids, convert, jobs=1):
+    """
+    Call `convert(component_id)` for each component, with up to `jobs`
+    components converted concurrently.
+
+    Returns the list of ComponentResult, in the order of `component_ids`.
+    """
+    results = []
+    with capture_logs():
+        if jobs <= 1:
+            for component_id in component_ids:
+                results.append(_run_component(component_id, convert, buffered=False))
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                # only keep a bounded number of components in flight, so that
+                # long lists of components are consumed lazily
+                pending = deque()
+                for component_id in component_ids:
+                    pending.append(
+                        executor.submit(
+                            _run_component, component_id, convert, buffered=True
+                        )
+                    )
+                    if len(pending) >= 2 * jobs:
+                        results.append(flush(pending.popleft().result()))
+                while pending:
+                    results.append(flush(pending.popleft().result()))
+
+    return results
+
+
+@contextmanager
+def capture_logs():
+    """
+    Collect the log records emitted on behalf of a component (see
+    run_in_component) while the context is active.
+    """
+    root_logger = logging.getLogger()
+    collect_handler = _ComponentLogHandler()
+    hold_back_filter = _HoldBackFilter()
+    handlers = root_logger.handlers[:]
+    for handler in handlers:
+        handler.addFilter(hold_back_filter)
+    root_logger.addHandler(collect_handler)
+    try:
+        yield
+    finally:
+        root_logger.removeHandler(collect_handler)
+        for handler in handlers:
+            handler.removeFilter(hold_back_filter)
+
+
+def run_in_component(result, function, *args, buffered=True):
+    """
+    Call `function(*args)` on behalf of the component of `result`.
+
+    The errors it logs are counted in `result`, and its records are held back
+    until `flush(result)` if `buffered`. An exception fails the component
+    instead of being raised.
+
+    Returns the return value of `function`, or None if it raised.
+    """
+    token = _current.set((result, buffered))
+    start = time.perf_counter()
+    try:
+        return function(*args)
+    except Exception as e:
+        # network and file system errors (requests exceptions are OSError) are
+        # not bugs, their traceback is of no use
+        if isinstance(e, OSError):
+            logging.error(f"failed to create {result.component_id}: {e}")
+        else:
+            logging.exception(f"unexpected error while creating {result.component_id}")
+        result.status = "failed"
+        result.message = f"{type(e).__name__}: {e}"
+        return None
+    finally:
+        _current.reset(token)
+        result.duration += time.perf_counter() - start
+
+
+def get_current_errors():
+    """
+    Return the number of errors logged so far for the component being
+    converted, 0 outside of run_in_component.
+    """
+    current = _current.get()
+    return current[0].errors if current is not None else 0
+
+
+def flush(result):
+    """Write the records held back for a component, once it is done."""
+    if result.status == "ok" and result.errors:
+        result.status = "errors"
+
+    root_logger = logging.getLogger()
+    for record in result.records:
+        logger = (
+            root_logger if record.name == "root" else logging.getLogger(record.name)
+        )
+        logger.handle(record)
+    result.records = []
+    return result
+
+
+def log_summary(results):
+    """Log a summary of a batch, listing the components that were not ok."""
+    failed = [result for result in results if result.status == "failed"]
+    with_errors = [result for result in results if result.status == "errors"]
+
+    logging.info(
+        f"{len(results)} components processed: "
+        f"{len(results) - len(failed) - len(with_errors)} ok, "
+        f"{len(with_errors)} with errors, {len(failed)} failed"
+    )
+    for result in with_errors:
+        logging.warning(
+            f"{result.component_id}: created with {result.errors} error(s) "
+            f"({result.duration:.1f}s)"
+        )
+    for result in failed:
+        logging.error(
+            f"{result.component_id}: failed, {result.message} ({result.duration:.1f}s)"
+        )
+
+
+def _run_component(component_id, convert, buffered):
+    result = ComponentResult(component_id=component_id)
+    if run_in_component(result, convert, component_id, buffered=buffered) == ():
+        result.status = "failed"
+        result.message = "component not found"
+
+    if result.status == "ok" and result.errors:
+        result.status = "errors"
+    return result
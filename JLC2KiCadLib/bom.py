@@ -0,0 +1,100 @@
+"""
+Reading of the lists of components to create.
+
+A list is read one line at a time, from a file or from the standard input, so
+that it is handed to the batch engines as it is read, however long it is. The
+format is detected from its first lines:
+    - a JLCPCB BOM exported as CSV, whose "JLCPCB Part #" (or "LCSC Part #")
+      column holds the JLCPCB part #
+    - a KiCad BOM exported as CSV, with an "LCSC" (or "LCSC Part", ...) field
+    - a list of JLCPCB part #, one per line, "#" starting a comment line
+"""
+
+import csv
+import itertools
+import logging
+import re
+import sys
+from contextlib import ExitStack
+
+# the header of a CSV BOM is searched for in its first lines, KiCad legacy
+# BOMs start with a few lines describing the schematic
+MAX_HEADER_LINE = 10
+
+# column names holding the JLCPCB part #, lowercase and without punctuation
+_PART_COLUMN = re.compile(r"(jlcpcbpart|jlcpart|lcsc).*")
+
+_DELIMITERS = (",", ";", "\t")
+
+
+def read_components(path):
+    """
+    Return an iterator over the JLCPCB part # listed in the file `path`, or in
+    the standard input if `path` is "-". A part # listed several times (e.g. on
+    several lines of a BOM) is only returned once.
+
+    Raises OSError if the file cannot be read, and ValueError if it is a CSV
+    file without JLCPCB part # column.
+    """
+    with ExitStack() as stack:
+        if path == "-":
+            f = sys.stdin
+        else:
+            # JLCPCB BOMs exported by spreadsheets start with a byte order mark
+            f = stack.enter_context(open(path, newline="", encoding="utf-8-sig"))
+        component_ids = _read(f, path)
+        # the file is closed once all the lines are read
+        return _unique(component_ids, stack.pop_all())
+
+
+def _read(f, path):
+    for line in f:
+        line = line.lstrip("\ufeff")
+        if line.strip() and not line.startswith("#"):
+            break
+    else:
+        return iter(())
+
+    lines = itertools.chain([line], f)
+    counts = {delimiter: line.count(delimiter) for delimiter in _DELIMITERS}
+    delimiter = max(counts, key=counts.get)
+    if not counts[delimiter]:
+        return _read_list(lines)
+    return _read_csv(lines, delimiter, path)
+
+
+def _read_list(lines):
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def _read_csv(lines, delimiter, path):
+    reader = csv.reader(lines, delimiter=delimiter)
+    for header in itertools.islice(reader, MAX_HEADER_LINE):
+        names = [re.sub(r"[^a-z]", "", name.lower()) for name in header]
+        columns = [i for i, name in enumerate(names) if _PART_COLUMN.fullmatch(name)]
+        if columns:
+            return _read_column(reader, columns[0])
+    raise ValueError(
+        f'{path}: no JLCPCB part # column found (e.g. "JLCPCB Part #" or "LCSC")'
+    )
+
+
+def _read_column(reader, column):
+    for row in reader:
+        component_id = row[column].strip() if column < len(row) else ""
+        if component_id:
+            yield component_id
+        elif any(cell.strip() for cell in row):
+            logging.warning(f"BOM line {reader.line_num}: no JLCPCB part #, skipped")
+
+
+def _unique(component_ids, stack):
+    seen = set()
+    with stack:
+        for component_id in component_ids:
+            if component_id not in seen:
+                seen.add(component_id)
+                yield component_id
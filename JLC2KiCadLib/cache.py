@@ -0,0 +1,346 @@
+"""
+On-disk cache of EasyEDA payloads.
+
+Entries are stored as one file per key, grouped by namespace (e.g. the
+`components` namespace holds the `/api/components/{uuid}` responses). An
+entry's modification time is the time it was stored and is used for expiry,
+its access time is refreshed on every hit and is used for LRU eviction once
+the cache grows past its size limit.
+
+The JSON and OBJ payloads are stored compressed, with zstd if the zstandard
+package is installed and with gzip otherwise.
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional, entries are compressed with gzip without it
+    zstandard = None
+
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+# LCSC part # to uuid resolutions practically never change, they are only
+# revalidated against EasyEDA after a longer delay
+DEFAULT_PARTS_TTL = 30 * 24 * 3600  # seconds
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024  # bytes
+# Fraction of max_size the cache is shrunk to once it grows past it, so that
+# the entries are only listed again after that much more has been stored
+EVICTION_TARGET = 0.9
+DEFAULT_NAMESPACE_TTLS = {
+    "parts": DEFAULT_PARTS_TTL,
+    # ETag / Last-Modified of the cached 3D models. Models expire like any
+    # other entry, but are then revalidated with a conditional request.
+    "validators": None,
+}
+
+DEFAULT_COMPRESSION_LEVEL = 6
+# Namespaces whose entries are stored compressed. 3D models are not, they are
+# linked as is into the libraries (see Cache.materialize).
+COMPRESSED_NAMESPACES = ("parts", "components", "obj")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_cache = None
+
+# the umask can only be read by setting it
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def get_default_cache_dir():
+    """Return the per-user cache directory used when none is specified."""
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        base = os.environ["LOCALAPPDATA"]
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+    return os.path.join(base, "JLC2KiCadLib")
+
+
+def configure_cache(
+    directory,
+    ttl=DEFAULT_TTL,
+    max_size=DEFAULT_MAX_SIZE,
+    namespace_ttls=None,
+    compression_level=DEFAULT_COMPRESSION_LEVEL,
+):
+    """
+    Enable the process-wide cache in `directory`, or disable it if `directory`
+    is None.
+    """
+    global _cache
+
+    namespace_ttls = {**DEFAULT_NAMESPACE_TTLS, **(namespace_ttls or {})}
+
+    _cache = (
+        Cache(
+            directory,
+            ttl=ttl,
+            max_size=max_size,
+            namespace_ttls=namespace_ttls,
+            compression_level=compression_level,
+        )
+        if directory
+        else None
+    )
+    return _cache
+
+
+def get_cache():
+    """Return the process-wide cache, or None if caching is disabled."""
+    return _cache
+
+
+class Cache:
+    """
+    A directory of cached payloads with a time-to-live and a size bound.
+
+    ttl : seconds after which an entry is considered stale, None to never expire
+    max_size : total size in bytes above which the least recently used entries
+        are evicted, down to EVICTION_TARGET of it, None for an unbounded cache
+    namespace_ttls : per namespace ttl, overriding `ttl`
+    compression_level : level at which the entries of COMPRESSED_NAMESPACES are
+        compressed, 0 or None to store them uncompressed
+    """
+
+    def __init__(
+        self,
+        directory,
+        ttl=DEFAULT_TTL,
+        max_size=DEFAULT_MAX_SIZE,
+        namespace_ttls=None,
+        compression_level=DEFAULT_COMPRESSION_LEVEL,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.namespace_ttls = namespace_ttls or {}
+        self.compression_level = compression_level
+        self._size = None
+        self._lock = threading.Lock()
+
+    def path(self, namespace, key):
+        key = key.replace("/", "_").replace("\\", "_")
+        return os.path.join(self.directory, namespace, key[:2], key)
+
+    def get(self, namespace, key):
+        """Return the payload stored under `key`, or None if missing or stale."""
+        path = self.path(namespace, key)
+        try:
+            stat = self._fresh_stat(namespace, key)
+            if stat is None:
+                return None
+            with open(path, "rb") as f:
+                data = _decompress(f.read())
+            # refresh the access time for LRU eviction, keep the storage time
+            os.utime(path, (time.time(), stat.st_mtime))
+        except (OSError, ValueError) as e:
+            logging.debug(f"cache: {namespace}/{key} unreadable: {e}")
+            return None
+
+        logging.debug(f"cache: {namespace}/{key} hit")
+        return data
+
+    def contains(self, namespace, key):
+        """Return whether a fresh entry is stored under `key`."""
+        return self._fresh_stat(namespace, key) is not None
+
+    def touch(self, namespace, key):
+        """
+        Mark the entry stored under `key` as fresh again, e.g. once revalidated.
+
+        Returns False if there is no entry under `key`.
+        """
+        try:
+            os.utime(self.path(namespace, key))
+        except OSError:
+            return False
+        return True
+
+    def materialize(self, namespace, key, destination):
+        """
+        Create `destination` as a hard link to the entry stored under `key`, or
+        as a copy of it where hard links are not supported (e.g. when the cache
+        is on another file system).
+
+        Returns False if there is no fresh entry under `key`.
+        """
+        path = self.path(namespace, key)
+        stat = self._fresh_stat(namespace, key)
+        if stat is None:
+            return False
+
+        # link next to the destination first, then replace it, so that an
+        # existing destination file is swapped atomically
+        tmp_path = os.path.join(
+            os.path.dirname(os.path.abspath(destination)),
+            f".tmp{os.getpid()}_{threading.get_ident()}_{os.path.basename(key)}",
+        )
+        try:
+            # renaming a link over another link to the same file does nothing,
+            # the temporary link would be left behind
+            if not (
+                os.path.exists(destination) and os.path.samefile(path, destination)
+            ):
+                try:
+                    os.link(path, tmp_path)
+                except OSError:
+                    shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, destination)
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:
+            logging.exception(f"cache: failed to create {destination}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+        logging.debug(f"cache: {namespace}/{key} linked to {destination}")
+        return True
+
+    def put(self, namespace, key, data):
+        """Store `data` under `key`, evicting old entries if needed."""
+        path = self.path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.compression_level and namespace in COMPRESSED_NAMESPACES:
+            compressed = _compress(data, self.compression_level)
+            # tiny payloads can grow when compressed
+            if len(compressed) < len(data):
+                data = compressed
+
+        # write to a temporary file first so that concurrent readers never see
+        # a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        except OSError:
+            logging.exception(f"cache: failed to store {namespace}/{key}")
+            os.remove(tmp_path)
+            return
+
+        self.put_file(namespace, key, tmp_path)
+
+    def put_file(self, namespace, key, source):
+        """
+        Move the complete file `source`, on the same file system as the cache,
+        under `key`, evicting old entries if needed.
+        """
+        path = self.path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+
+        try:
+            # mkstemp creates private files, entries get the permissions of a
+            # regular file as they are linked into the output directory
+            os.chmod(source, 0o666 & ~_umask)
+            os.replace(source, path)
+            size = os.path.getsize(path)
+        except OSError:
+            logging.exception(f"cache: failed to store {namespace}/{key}")
+            if os.path.exists(source):
+                os.remove(source)
+            return
+
+        with self._lock:
+            if self._size is not None:
+                self._size += size - old_size
+        self.evict()
+
+    def partial_path(self, namespace, key):
+        """
+        Return the path where the entry `key` is downloaded before being stored
+        with put_file. Partial downloads are not entries of the cache.
+        """
+        return self.path(namespace, key) + ".part"
+
+    def size(self):
+        """Return the total size in bytes of the cached entries."""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(os.path.getsize(path) for path in self._entries())
+            return self._size
+
+    def evict(self):
+        """
+        Remove the least recently used entries once the size limit is exceeded,
+        until the cache is down to EVICTION_TARGET of the limit.
+        """
+        if self.max_size is None or self.size() <= self.max_size:
+            return
+
+        with self._lock:
+            entries = []
+            for path in self._entries():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+
+            entries.sort()
+            self._size = sum(size for _, size, _ in entries)
+            target = self.max_size * EVICTION_TARGET
+            for _, size, path in entries:
+                if self._size <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._size -= size
+                logging.debug(f"cache: evicted {path}")
+
+    def _fresh_stat(self, namespace, key):
+        try:
+            stat = os.stat(self.path(namespace, key))
+        except OSError:
+            return None
+
+        ttl = self.namespace_ttls.get(namespace, self.ttl)
+        if ttl is not None and time.time() - stat.st_mtime > ttl:
+            logging.debug(f"cache: {namespace}/{key} expired")
+            return None
+        return stat
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.startswith(".tmp") and not name.endswith(".part"):
+                    yield os.path.join(root, name)
+
+
+def _compress(data, level):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+
+
+def _decompress(data):
+    """Decompress an entry, entries stored uncompressed are returned as is."""
+    if data.startswith(_GZIP_MAGIC):
+        try:
+            return gzip.decompress(data)
+        except (EOFError, zlib.error) as e:
+            raise ValueError(f"corrupted gzip entry ({e})") from e
+    if data.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError("compressed with zstd, zstandard is not installed")
+        try:
+            return zstandard.ZstdDecompressor().decompress(data)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"corrupted zstd entry ({e})") from e
+    return data
@@ -1,13 +1,11 @@
-import json
 import logging
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-import requests
 from KicadModTree import Footprint, KicadFileHandler, Pad, RectLine, Text, Translation
 
-from .. import helper
-from .footprint_handlers import handlers, mil2mm
+from .. import helper, network, processes
+from .footprint_handlers import h_SVGNODE, handlers, mil2mm
 
 # Courtyard generation constants.
 # EasyEDA footprint data does not include courtyard information, so a
@@ -46,6 +44,9 @@ class FootprintInfo:
     model_dir: str = ""
     origin: tuple = (0, 0)
     models: str = ""
+    # 3D models being downloaded in the background, added to the footprint
+    # once all the shapes are converted
+    pending_models: list = field(default_factory=list)
 
     def has_crtyd_bounds(self):
         return (
@@ -79,11 +80,6 @@ def create_footprint(
         logging.info(f"Footprint {footprint_name} already exists, skipping.")
         return f"{footprint_lib}:{footprint_name}", datasheet_link
 
-    # init kicad footprint
-    kicad_mod = Footprint(f'"{footprint_name}"')
-    kicad_mod.setDescription(f"{footprint_name} footprint")  # TODO Set real description
-    kicad_mod.setTags(f"{footprint_name} footprint {component_id}")
-
     footprint_info = FootprintInfo(
         footprint_name=footprint_name,
         output_dir=output_dir,
@@ -94,6 +90,41 @@ def create_footprint(
         models=models,
     )
 
+    # the 3D models are downloaded while the shapes are converted, possibly in
+    # a worker process (see processes). They are created here, as they need the
+    # network and the cache, once the shapes are done.
+    models_footprint = start_models(footprint_shape, footprint_info)
+    kicad_mod = processes.run(
+        convert_footprint, footprint_name, component_id, footprint_shape, translation
+    )
+    for model_node in create_models(models_footprint, footprint_info):
+        kicad_mod.append(model_node)
+    content = KicadFileHandler(kicad_mod).serialize()
+
+    os.makedirs(f"{output_dir}/{footprint_lib}", exist_ok=True)
+
+    # output kicad model
+    filename = f"{output_dir}/{footprint_lib}/{footprint_name}.kicad_mod"
+    with helper.path_lock(filename), open(filename, "w", newline="\n") as f:
+        f.write(content)
+    logging.info(f"Created '{output_dir}/{footprint_lib}/{footprint_name}.kicad_mod'")
+
+    # return the datasheet link and footprint name to be linked with the symbol
+    return (f"{footprint_lib}:{footprint_name}", datasheet_link)
+
+
+def convert_footprint(footprint_name, component_id, footprint_shape, translation):
+    """
+    Convert the EasyEDA shapes of a footprint, and return its Footprint tree,
+    without the 3D models (see start_models).
+    """
+    # init kicad footprint
+    kicad_mod = Footprint(f'"{footprint_name}"')
+    kicad_mod.setDescription(f"{footprint_name} footprint")  # TODO Set real description
+    kicad_mod.setTags(f"{footprint_name} footprint {component_id}")
+
+    footprint_info = FootprintInfo(footprint_name=footprint_name, origin=translation)
+
     # for each line in data : use the appropriate handler
     for line in footprint_shape:
         args = [i for i in line.split("~")]  # split and remove empty string in list
@@ -101,7 +132,7 @@ def create_footprint(
         logging.debug(args)
         if model not in handlers:
             logging.warning(f"footprint : model not in handler :  {model}")
-        else:
+        elif model != "SVGNODE":  # the 3D models are created by create_models
             handlers.get(model)(args[1:], kicad_mod, footprint_info)
 
     if any(
@@ -190,32 +221,55 @@ def create_footprint(
         )
     )
 
-    if not os.path.exists(f"{output_dir}/{footprint_lib}"):
-        os.makedirs(f"{output_dir}/{footprint_lib}")
+    return kicad_mod
 
-    # output kicad model
-    file_handler = KicadFileHandler(kicad_mod)
-    file_handler.writeFile(f"{output_dir}/{footprint_lib}/{footprint_name}.kicad_mod")
-    logging.info(f"Created '{output_dir}/{footprint_lib}/{footprint_name}.kicad_mod'")
 
-    # return the datasheet link and footprint name to be linked with the symbol
-    return (f"{footprint_lib}:{footprint_name}", datasheet_link)
+def start_models(footprint_shape, footprint_info):
+    """
+    Start downloading the 3D models of a footprint in the background, and
+    return the Footprint the models are added to by create_models.
+    """
+    footprint = Footprint("models")
+    for line in footprint_shape:
+        args = line.split("~")
+        if args[0] == "SVGNODE":
+            h_SVGNODE(args[1:], footprint, footprint_info)
+    return footprint
+
+
+def create_models(footprint, footprint_info):
+    """
+    Create the 3D models started by start_models, and return their Model nodes
+    to add to the footprint.
+    """
+    for add_model in footprint_info.pending_models:
+        add_model()
+
+    model_nodes = list(footprint.getAllChilds())
+    for model_node in model_nodes:
+        footprint.remove(model_node)
+    return model_nodes
+
+
+def get_datasheet_link(footprint_component_uuid):
+    # the metadata is enough, no need to decode the whole footprint
+    metadata = network.get_component_metadata(footprint_component_uuid)
+
+    if metadata is None:
+        logging.error("Could not retrieve footprint data")
+        return ""
+
+    if not metadata["datasheet"]:
+        logging.warning("Could not retrieve datasheet link from EASYEDA")
+    return metadata["datasheet"]
 
 
 def get_footprint_info(footprint_component_uuid):
     # fetch the component data from easyeda library
-    response = requests.get(
-        f"https://easyeda.com/api/components/{footprint_component_uuid}",
-        headers={"User-Agent": helper.get_user_agent()},
-    )
+    data = network.get_component_data(footprint_component_uuid)
 
-    if response.status_code == requests.codes.ok:
-        data = json.loads(response.content.decode())
-    else:
-        logging.error(
-            "create_footprint error. Requests returned with error code "
-            f"{response.status_code}"
-        )
+    if data is None:
+        logging.error("create_footprint error. Could not retrieve footprint data")
         return ("", None, "", (0, 0))
 
     footprint_shape = data["result"]["dataStr"]["shape"]
@@ -1,6 +1,7 @@
 import json
 import logging
 import re
+from functools import partial
 from math import acos, cos, pi, pow, radians, sin, sqrt
 
 from KicadModTree import (
@@ -15,6 +16,7 @@ from KicadModTree import (
     Vector2D,
 )
 
+from .. import network
 from .model3d import get_StepModel, get_WrlModel
 
 __all__ = [
@@ -617,26 +619,37 @@ def h_SVGNODE(data, kicad_mod, footprint_info):
         return ()
 
     c_origin = data["attrs"]["c_origin"].split(",")
+
+    # download the models while the remaining shapes are converted, they are
+    # added to the footprint by create_footprint once the shapes are done
+    network.prefetch_models(data["attrs"]["uuid"], footprint_info.models)
+
     if "STEP" in footprint_info.models:
-        get_StepModel(
-            component_uuid=data["attrs"]["uuid"],
-            footprint_info=footprint_info,
-            kicad_mod=kicad_mod,
-            translationX=float(c_origin[0]),
-            translationY=float(c_origin[1]),
-            translationZ=data["attrs"]["z"],
-            rotation=data["attrs"]["c_rotation"],
+        footprint_info.pending_models.append(
+            partial(
+                get_StepModel,
+                component_uuid=data["attrs"]["uuid"],
+                footprint_info=footprint_info,
+                kicad_mod=kicad_mod,
+                translationX=float(c_origin[0]),
+                translationY=float(c_origin[1]),
+                translationZ=data["attrs"]["z"],
+                rotation=data["attrs"]["c_rotation"],
+            )
         )
 
     if "WRL" in footprint_info.models:
-        get_WrlModel(
-            component_uuid=data["attrs"]["uuid"],
-            footprint_info=footprint_info,
-            kicad_mod=kicad_mod,
-            translationX=float(c_origin[0]),
-            translationY=float(c_origin[1]),
-            translationZ=data["attrs"]["z"],
-            rotation=data["attrs"]["c_rotation"],
+        footprint_info.pending_models.append(
+            partial(
+                get_WrlModel,
+                component_uuid=data["attrs"]["uuid"],
+                footprint_info=footprint_info,
+                kicad_mod=kicad_mod,
+                translationX=float(c_origin[0]),
+                translationY=float(c_origin[1]),
+                translationZ=data["attrs"]["z"],
+                rotation=data["attrs"]["c_rotation"],
+            )
         )
 
 
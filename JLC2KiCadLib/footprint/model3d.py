@@ -2,10 +2,10 @@ import logging
 import os
 import re
 
-import requests
 from KicadModTree import Model
 
-from .. import helper
+from .. import helper, network, processes
+from ..cache import get_cache
 
 wrl_header = """#VRML V2.0 utf8
 #created by JLC2KiCad_lib using the JLCPCB library
@@ -28,28 +28,32 @@ def get_StepModel(
 ):
     logging.info("Downloading STEP Model ...")
 
-    # `qAxj6KHrDKw4blvCG8QJPs7Y` is a constant in
-    # https://modules.lceda.cn/smt-gl-engine/0.8.22.6032922c/smt-gl-engine.js
-    # and points to the bucket containing the step files.
-
-    response = requests.get(
-        f"https://modules.easyeda.com/qAxj6KHrDKw4blvCG8QJPs7Y/{component_uuid}",
-        headers={"User-Agent": helper.get_user_agent()},
-    )
-
-    if response.status_code != requests.codes.ok:
-        logging.error("request error, no Step model found")
-        return
-
-    ensure_footprint_lib_directories_exist(footprint_info)
+    cache = get_cache()
     filename = (
         f"{footprint_info.output_dir}/"
         f"{footprint_info.footprint_lib}/"
         f"{footprint_info.model_dir}/"
         f"{footprint_info.footprint_name}.step"
     )
-    with open(filename, "wb") as f:
-        f.write(response.content)
+
+    # models are stored once per model uuid in the cache and linked under the
+    # name of each footprint using them
+    if cache is not None and cache.contains("step", component_uuid):
+        logging.info(f"STEP model {component_uuid} already downloaded")
+        network.discard_prefetched([component_uuid], network.get_step_model)
+    elif cache is not None and network.get_step_model(component_uuid) is None:
+        logging.error("request error, no Step model found")
+        return
+
+    ensure_footprint_lib_directories_exist(footprint_info)
+    with helper.path_lock(filename):
+        if cache is not None:
+            created = cache.materialize("step", component_uuid, filename)
+        else:
+            created = network.download_step_model(component_uuid, filename)
+    if not created:
+        logging.error("request error, no Step model found")
+        return
 
     logging.info(f"STEP model created at {filename}")
 
@@ -94,16 +98,81 @@ def get_WrlModel(
 ):
     logging.info("Creating WRL model ...")
 
-    response = requests.get(
-        f"https://easyeda.com/analyzer/api/3dmodel/{component_uuid}",
-        headers={"User-Agent": helper.get_user_agent()},
+    cache = get_cache()
+    filename = (
+        f"{footprint_info.output_dir}/"
+        f"{footprint_info.footprint_lib}/"
+        f"{footprint_info.model_dir}/"
+        f"{footprint_info.footprint_name}.wrl"
     )
-    if response.status_code == requests.codes.ok:
-        text = response.content.decode()
+
+    # the converted model is stored once per model uuid in the cache and
+    # linked under the name of each footprint using it
+    if cache is not None and cache.contains("wrl", component_uuid):
+        logging.info(f"WRL model {component_uuid} already converted")
+        network.discard_prefetched([component_uuid], network.get_obj_model)
+        wrl_content = None
     else:
-        logging.error("request error, no 3D model found")
-        return ()
+        text = network.get_obj_model(component_uuid)
+        if text is None:
+            logging.error("request error, no 3D model found")
+            return ()
+        wrl_content = processes.run(obj_to_wrl, text)
+        if cache is not None:
+            cache.put("wrl", component_uuid, wrl_content.encode())
+
+    ensure_footprint_lib_directories_exist(footprint_info)
+    with helper.path_lock(filename):
+        if cache is None or not cache.materialize("wrl", component_uuid, filename):
+            if wrl_content is None:
+                text = network.get_obj_model(component_uuid)
+                if text is None:
+                    logging.error("request error, no 3D model found")
+                    return ()
+                wrl_content = processes.run(obj_to_wrl, text)
+            with open(filename, "w") as f:
+                f.write(wrl_content)
+
+    if footprint_info.model_base_variable:
+        if footprint_info.model_base_variable.startswith("$"):
+            path_name = (
+                f'"{footprint_info.model_base_variable}/'
+                f"{footprint_info.model_dir}/"
+                f'{footprint_info.footprint_name}.wrl"'
+            )
+        else:
+            path_name = (
+                f'"$({footprint_info.model_base_variable})/'
+                f"{footprint_info.model_dir}/"
+                f'{footprint_info.footprint_name}.wrl"'
+            )
+    else:
+        path_name = f"{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"
+
+    translationX = (translationX - footprint_info.origin[0]) / 100
+    translationY = -(translationY - footprint_info.origin[1]) / 100
+    translationZ = float(translationZ) / 100
+
+    # Check if a model has already been added to the footprint to prevent duplicates
+    if any(isinstance(child, Model) for child in kicad_mod.getAllChilds()):
+        logging.info(f"WRL model created at {filename}")
+        logging.info(
+            "WRL model was not added to the footprint to prevent duplicates with STEP "
+            "model"
+        )
+    else:
+        kicad_mod.append(
+            Model(
+                filename=path_name,
+                at=[translationX, translationY, translationZ],
+                rotate=[-float(axis_rotation) for axis_rotation in rotation.split(",")],
+            )
+        )
+        logging.info(f"added {path_name} to footprint")
+
 
+def obj_to_wrl(text):
+    """Convert the OBJ-like 3D model source served by EasyEDA to VRML."""
     wrl_content = wrl_header
 
     # get material list
@@ -192,64 +261,11 @@ Shape{{
 
         wrl_content += shape_str
 
-    ensure_footprint_lib_directories_exist(footprint_info)
-
-    filename = (
-        f"{footprint_info.output_dir}/"
-        f"{footprint_info.footprint_lib}/"
-        f"{footprint_info.model_dir}/"
-        f"{footprint_info.footprint_name}.wrl"
-    )
-    with open(filename, "w") as f:
-        f.write(wrl_content)
-
-    if footprint_info.model_base_variable:
-        if footprint_info.model_base_variable.startswith("$"):
-            path_name = (
-                f'"{footprint_info.model_base_variable}/'
-                f"{footprint_info.model_dir}/"
-                f'{footprint_info.footprint_name}.wrl"'
-            )
-        else:
-            path_name = (
-                f'"$({footprint_info.model_base_variable})/'
-                f"{footprint_info.model_dir}/"
-                f'{footprint_info.footprint_name}.wrl"'
-            )
-    else:
-        path_name = f"{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"
-
-    translationX = (translationX - footprint_info.origin[0]) / 100
-    translationY = -(translationY - footprint_info.origin[1]) / 100
-    translationZ = float(translationZ) / 100
-
-    # Check if a model has already been added to the footprint to prevent duplicates
-    if any(isinstance(child, Model) for child in kicad_mod.getAllChilds()):
-        logging.info("WRL model created at {filename}")
-        logging.info(
-            "WRL model was not added to the footprint to prevent duplicates with STEP "
-            "model"
-        )
-    else:
-        kicad_mod.append(
-            Model(
-                filename=path_name,
-                at=[translationX, translationY, translationZ],
-                rotate=[-float(axis_rotation) for axis_rotation in rotation.split(",")],
-            )
-        )
-        logging.info(f"added {path_name} to footprint")
+    return wrl_content
 
 
 def ensure_footprint_lib_directories_exist(footprint_info):
-    if not os.path.exists(
-        f"{footprint_info.output_dir}/{footprint_info.footprint_lib}"
-    ):
-        os.makedirs(f"{footprint_info.output_dir}/{footprint_info.footprint_lib}")
-
-    if not os.path.exists(
-        f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}"
-    ):
-        os.makedirs(
-            f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}"
-        )
+    os.makedirs(
+        f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}",
+        exist_ok=True,
+    )
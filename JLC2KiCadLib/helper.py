@@ -1,7 +1,12 @@
 import logging
+import os
 import sys
+import threading
 from importlib.metadata import version as pkg_version
 
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+
 
 def get_user_agent():
     """Get the User-Agent header for API requests to EasyEDA."""
@@ -27,3 +32,10 @@ def set_logging(logging_level, logging_file):
     root_logger.addHandler(handler)
     formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
     handler.setFormatter(formatter)
+
+
+def path_lock(path):
+    """Return the lock serialising writes to `path` between threads."""
+    path = os.path.abspath(path)
+    with _path_locks_lock:
+        return _path_locks.setdefault(path, threading.Lock())
@@ -0,0 +1,206 @@
+"""
+Manifest of the components created in an output directory.
+
+The manifest maps each JLCPCB part # to the files created for it: its
+footprint, 3D models and symbol, with a hash of the files that belong to the
+component alone (the symbol libraries are shared). With --skip_existing, a
+component whose files are all there is skipped before any request to EasyEDA
+is sent. With --sync, a component is only created again if its EasyEDA data,
+the version of JLC2KiCadLib or the options shaping its files changed since it
+was created.
+
+The manifest is a JSON lines file, one component per line. The line of a
+component is appended to it as soon as the component is created, so that an
+interrupted run keeps the components created so far, and the file is
+rewritten with one line per component once the run is over.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+MANIFEST_NAME = "JLC2KiCadLib_manifest.jsonl"
+
+# name of a top-level symbol of a .kicad_sym library, the units of a symbol
+# are indented further
+_SYMBOL_NAME = re.compile(r'^  \(symbol "([^"]*)"', re.MULTILINE)
+
+_manifest = None
+
+
+def configure_manifest(output_dir):
+    """
+    Record the components created in `output_dir` in its manifest, or stop
+    recording them if `output_dir` is None.
+    """
+    global _manifest
+
+    if _manifest is not None:
+        _manifest.compact()
+    _manifest = Manifest(output_dir) if output_dir is not None else None
+    return _manifest
+
+
+def get_manifest():
+    """Return the manifest of the output directory, or None if not recording."""
+    return _manifest
+
+
+def hash_file(path):
+    """Return the SHA-256 hash of the content of `path`."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_payloads(payloads):
+    """Return the SHA-256 hash of a list of decoded EasyEDA responses."""
+    digest = hashlib.sha256()
+    for payload in payloads:
+        # the keys are sorted for the hash not to depend on their order
+        digest.update(json.dumps(payload, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    The manifest of the output directory `output_dir`.
+
+    An entry holds, for a component:
+        footprint : path of its footprint file, None if not created
+        models : path of its 3D model file by format ("STEP", "WRL"), None if
+            EasyEDA has no 3D model for the footprint
+        symbol : name of its symbol, None if not created
+        symbol_library : path of the library holding its symbol
+        symbol_library_mtime : modification time in nanoseconds of the library
+            once its symbol was written
+        hashes : SHA-256 hash of its footprint and 3D model files, by path
+        source : SHA-256 hash of the EasyEDA data ("data"), version of
+            JLC2KiCadLib ("version") and options ("options") it is created
+            from, None if unknown
+        duration : number of seconds taken to create its files
+    The paths are relative to `output_dir`.
+
+    The number of components created for the first time (`new`), created
+    again (`updated`) and left as they are (`unchanged`) is counted, with the
+    seconds saved by the latter (`saved`).
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self._entries = {}
+        self._symbols = {}
+        self._lock = threading.Lock()
+        self.new = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.saved = 0.0
+        self._load()
+
+    def get(self, component_id):
+        """Return the entry of `component_id`, or None if not recorded."""
+        with self._lock:
+            return self._entries.get(component_id)
+
+    def record(self, component_id, entry):
+        """Record the `entry` of `component_id`, replacing any previous one."""
+        line = json.dumps({"component_id": component_id, **entry}, sort_keys=True)
+        with self._lock:
+            if component_id in self._entries:
+                self.updated += 1
+            else:
+                self.new += 1
+            self._entries[component_id] = entry
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def keep(self, component_id):
+        """Count the recorded component `component_id` as left unchanged."""
+        with self._lock:
+            self.unchanged += 1
+            self.saved += self._entries[component_id].get("duration") or 0
+
+    def log_sync_report(self):
+        """Log the number of components new, updated and left unchanged."""
+        logging.info(
+            f"{self.unchanged} components unchanged, {self.updated} updated, "
+            f"{self.new} new. About {self.saved:.1f}s saved by leaving the "
+            "unchanged components as they were"
+        )
+
+    def exists(self, path):
+        """Return whether `path`, relative to the output directory, is a file."""
+        return os.path.isfile(os.path.join(self.output_dir, path))
+
+    def modified(self, path):
+        """
+        Return the modification time in nanoseconds of `path`, relative to the
+        output directory, or None if it does not exist.
+        """
+        try:
+            return os.stat(os.path.join(self.output_dir, path)).st_mtime_ns
+        except OSError:
+            return None
+
+    def symbols(self, path):
+        """
+        Return the names of the symbols of the library `path`, relative to the
+        output directory. The library is only read again once modified.
+        """
+        mtime = self.modified(path)
+        with self._lock:
+            cached = self._symbols.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with open(os.path.join(self.output_dir, path)) as f:
+                names = set(_SYMBOL_NAME.findall(f.read()))
+        except OSError:
+            names = set()
+        with self._lock:
+            self._symbols[path] = (mtime, names)
+        return names
+
+    def compact(self):
+        """Rewrite the manifest with the last entry of each component."""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    for component_id, entry in sorted(self._entries.items()):
+                        line = {"component_id": component_id, **entry}
+                        f.write(json.dumps(line, sort_keys=True) + "\n")
+                os.replace(tmp_path, self.path)
+            except OSError:
+                logging.exception(f"failed to write {self.path}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                component_id = entry.pop("component_id")
+            except (ValueError, KeyError, AttributeError):
+                # e.g. the last line of an interrupted run
+                logging.warning(f"{self.path}, line {number}: invalid entry, ignored")
+                continue
+            self._entries[component_id] = entry
@@ -0,0 +1,928 @@
+"""
+HTTP access to the EasyEDA servers.
+
+Every request made by JLC2KiCadLib goes through a single process-wide
+`requests.Session`, so TCP and TLS connections are kept alive and reused from
+one component to the next instead of being re-established for every call.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, replace
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import helper
+from .cache import get_cache
+from .ratelimit import RateLimiter, WaitTimeout, get_retry_after
+
+EASYEDA_API_URL = "https://easyeda.com/api"
+# `qAxj6KHrDKw4blvCG8QJPs7Y` is a constant in
+# https://modules.lceda.cn/smt-gl-engine/0.8.22.6032922c/smt-gl-engine.js
+# and points to the bucket containing the step files.
+STEP_MODEL_URL = "https://modules.easyeda.com/qAxj6KHrDKw4blvCG8QJPs7Y"
+OBJ_MODEL_URL = "https://easyeda.com/analyzer/api/3dmodel"
+
+# Number of per-host connection pools kept by the session. JLC2KiCadLib only
+# talks to a handful of hosts (easyeda.com, modules.easyeda.com).
+DEFAULT_POOL_CONNECTIONS = 4
+# Maximum number of keep-alive connections per host. When every connection to
+# a host is in use, further requests to that host wait for one to be released.
+DEFAULT_POOL_MAXSIZE = 10
+# Seconds to wait for a connection to be established, and for the server to
+# send data, before a request fails
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+# Number of times a request failing with a connection error, a timeout or a
+# 500/502/504 answer is sent again
+DEFAULT_RETRIES = 3
+# The n-th retry is sent after a random delay of up to RETRY_BACKOFF * 2**n
+RETRY_BACKOFF = 0.5  # seconds
+MAX_RETRY_BACKOFF = 30  # seconds
+# Number of times a request throttled by EasyEDA (429 or 503) is sent again
+MAX_THROTTLE_RETRIES = 5
+# Pause after a throttled request without Retry-After, doubled at each retry
+THROTTLE_PAUSE = 1.0  # seconds
+
+# Size of the blocks in which downloads are written to disk. Only one block of
+# a download is held in memory at a time.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+_pool_connections = DEFAULT_POOL_CONNECTIONS
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+_timeout = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+_retries = DEFAULT_RETRIES
+_offline = False
+_transport = None
+
+# _Deadline of the component being created, see deadline()
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+# Requests started ahead of time, _Prefetched keyed by (fetch function, key),
+# waiting to be picked up by the converters needing them
+_prefetched = {}
+# owner of the requests prefetched, see prefetch_owner()
+_owner = contextvars.ContextVar("prefetch_owner", default=None)
+_prefetched_lock = threading.Lock()
+_executor = None
+
+# Fetches in flight, keyed by (fetch function, key), see _coalesced()
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+# RateLimiter of each endpoint family, created on first use
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class DeadlineExceeded(requests.Timeout):
+    """A request was sent after the deadline of the component had passed."""
+
+
+class OfflineError(requests.ConnectionError):
+    """A request was needed in offline mode, the data is not in the cache."""
+
+
+@dataclass
+class CoalescingStats:
+    """Counters of the fetches of component data and 3D models."""
+
+    calls: int = 0
+    # calls that waited for an identical fetch already in flight, instead of
+    # sending their own requests
+    coalesced: int = 0
+
+
+_coalescing_stats = CoalescingStats()
+
+
+@dataclass(frozen=True)
+class Endpoints:
+    """Base URLs of the EasyEDA endpoint families."""
+
+    api: str = EASYEDA_API_URL
+    step_models: str = STEP_MODEL_URL
+    obj_models: str = OBJ_MODEL_URL
+
+    @classmethod
+    def from_base_url(cls, base_url):
+        """
+        Endpoints of a server standing in for EasyEDA at `base_url`, such as
+        JLC2KiCadLib-standin (see standin).
+        """
+        base_url = base_url.rstrip("/")
+        return cls(f"{base_url}/api", f"{base_url}/step", f"{base_url}/obj")
+
+
+_endpoints = Endpoints()
+
+
+def configure_session(
+    pool_connections=DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize=DEFAULT_POOL_MAXSIZE,
+    connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+    read_timeout=DEFAULT_READ_TIMEOUT,
+    retries=DEFAULT_RETRIES,
+    offline=False,
+    base_url=None,
+    transport=None,
+):
+    """
+    Set the connection pool limits and the timeout and retry policy of the
+    shared session.
+
+    The current session, if any, is closed and a new one is created with the
+    given limits on the next request. Rate limiters start over from their
+    initial limits.
+
+    offline : if True, no request is sent at all, requests raise OfflineError
+    base_url : if set, requests are sent to a server standing in for EasyEDA
+        at this URL instead, see Endpoints.from_base_url
+    transport : requests transport adapter sending all the requests, instead
+        of the pooled HTTPAdapter, e.g. to serve recorded responses
+    """
+    global _pool_connections, _pool_maxsize, _timeout, _retries, _offline
+    global _transport, _endpoints
+
+    with _session_lock:
+        _pool_connections = pool_connections
+        _pool_maxsize = pool_maxsize
+        _timeout = (connect_timeout, read_timeout)
+        _retries = retries
+        _offline = offline
+        _transport = transport
+        _endpoints = Endpoints.from_base_url(base_url) if base_url else Endpoints()
+        _close_session()
+    _shutdown_executor()
+    with _limiters_lock:
+        _limiters.clear()
+    with _in_flight_lock:
+        _coalescing_stats.calls = _coalescing_stats.coalesced = 0
+
+
+def get_endpoints():
+    """Return the Endpoints requests are sent to."""
+    return _endpoints
+
+
+def get_session():
+    """Return the shared session, creating it on first use."""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = _new_session()
+        return _session
+
+
+def close_session():
+    """Close the shared session and release its pooled connections."""
+    with _session_lock:
+        _close_session()
+    _shutdown_executor()
+
+
+def get(url, **kwargs):
+    """
+    Send a GET request through the shared session.
+
+    Requests are paced by the rate limiter of their endpoint family. Requests
+    throttled by the server are sent again once the limiter allows, and
+    requests failing with a connection error, a timeout or a server error are
+    retried after a randomized exponential backoff.
+
+    Raises DeadlineExceeded once the deadline of the component is passed,
+    OfflineError in offline mode, or the last requests.RequestException if all
+    the retries failed.
+    """
+    if _offline:
+        raise OfflineError(f"offline, {url} is not in the cache")
+
+    kwargs.setdefault("timeout", _timeout)
+    limiter = get_rate_limiter(url)
+    throttled = failures = 0
+    while True:
+        kwargs["timeout"] = _check_deadline(url, kwargs["timeout"])
+        logging.debug(f"GET {url}")
+        try:
+            with limiter.request(_time_left()):
+                response = get_session().get(url, **kwargs)
+        except WaitTimeout as e:
+            raise _deadline_exceeded(url) from e
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if failures >= _retries:
+                raise
+            failures += 1
+            _backoff(url, failures, e)
+            continue
+
+        if (
+            response.status_code
+            in (requests.codes.too_many_requests, requests.codes.service_unavailable)
+            and throttled < MAX_THROTTLE_RETRIES
+        ):
+            response.close()
+            pause = get_retry_after(response)
+            if pause is None:
+                pause = THROTTLE_PAUSE * 2**throttled
+            # the other requests slow down even if this component gives up
+            limiter.on_throttled(pause)
+            _check_deadline(url, kwargs["timeout"], pause)
+            throttled += 1
+            continue
+
+        if (
+            response.status_code
+            in (
+                requests.codes.internal_server_error,
+                requests.codes.bad_gateway,
+                requests.codes.gateway_timeout,
+            )
+            and failures < _retries
+        ):
+            response.close()
+            failures += 1
+            _backoff(url, failures, f"error code {response.status_code}")
+            continue
+
+        limiter.on_success()
+        return response
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """
+    Give the requests sent within the block, including those sent in the
+    background on its behalf, `seconds` to complete.
+
+    Once the deadline has passed, requests raise DeadlineExceeded, and so does
+    the block when it exits. `seconds` None sets no deadline.
+    """
+    if seconds is None:
+        yield
+        return
+
+    state = _Deadline(time.monotonic() + seconds, seconds)
+    token = _deadline.set(state)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+    if state.exceeded:
+        raise DeadlineExceeded(f"exceeded the deadline of {seconds}s")
+
+
+def get_rate_limiter(url):
+    """Return the RateLimiter of the endpoint family of `url`."""
+    family = next(
+        (
+            name
+            for name, prefix in (
+                ("component API", _endpoints.api),
+                ("STEP models", _endpoints.step_models),
+                ("OBJ models", _endpoints.obj_models),
+            )
+            if url.startswith(prefix)
+        ),
+        urllib.parse.urlsplit(url).netloc,
+    )
+    with _limiters_lock:
+        if family not in _limiters:
+            _limiters[family] = RateLimiter(family)
+        return _limiters[family]
+
+
+def download(url, path):
+    """
+    Stream the response to `url` into the file `path`, one chunk at a time.
+
+    The data is written to `path` + ".part" and renamed once complete, so that
+    `path` never holds a partial download. A ".part" file left over by an
+    interrupted download is resumed with a Range request.
+
+    Returns False if the download failed.
+    """
+    part_path = f"{path}.part"
+    response = _stream(url, part_path)
+    if response is None:
+        return False
+    os.replace(part_path, path)
+    return True
+
+
+def get_coalescing_stats():
+    """Return a copy of the counters of the single-flight fetch layer."""
+    with _in_flight_lock:
+        return replace(_coalescing_stats)
+
+
+def get_component_uuids(component_id):
+    """
+    Return the footprint uuid and the list of symbol uuids of a JLCPCB part, or
+    None if the part could not be found on EasyEDA.
+
+    Resolutions are kept in the `parts` index of the cache, when enabled, and
+    are only requested again once older than the index time-to-live.
+    """
+    return _coalesced(_get_component_uuids, component_id)
+
+
+def _get_component_uuids(component_id):
+    cache = get_cache()
+    if cache is not None:
+        content = cache.get("parts", component_id)
+        if content is not None:
+            entry = json.loads(content.decode())
+            return entry["footprint_uuid"], entry["symbol_uuids"]
+
+    response = get(f"{_endpoints.api}/products/{component_id}/svgs")
+    if response.status_code != requests.codes.ok:
+        logging.error(
+            f"failed to get component uuid for {component_id}. Requests returned "
+            f"with error code {response.status_code}"
+        )
+        return None
+
+    data = json.loads(response.content.decode())
+    if not data["success"]:
+        return None
+
+    footprint_uuid = data["result"][-1]["component_uuid"]
+    symbol_uuids = [i["component_uuid"] for i in data["result"][:-1]]
+
+    if cache is not None:
+        entry = {
+            "footprint_uuid": footprint_uuid,
+            "symbol_uuids": symbol_uuids,
+            "fetched_at": time.time(),
+        }
+        cache.put("parts", component_id, json.dumps(entry).encode())
+    return footprint_uuid, symbol_uuids
+
+
+def prefetch_component_data(component_uuids):
+    """
+    Start fetching the data of the given components in the background.
+
+    A later get_component_data for one of these components waits for its
+    request to complete instead of sending a new one, so that the footprint
+    and all the symbol units of a component are downloaded concurrently.
+    """
+    for component_uuid in component_uuids:
+        _prefetch(_get_component_data, component_uuid)
+
+
+def prefetch_component_metadata(component_uuids):
+    """Start fetching the metadata of the given components in the background."""
+    for component_uuid in component_uuids:
+        _prefetch(_get_component_metadata, component_uuid)
+
+
+@contextlib.contextmanager
+def prefetch_owner(owner):
+    """
+    Prefetch the requests of the block on behalf of `owner`, e.g. the JLCPCB
+    part # of the component being created.
+
+    Components sharing a footprint or a 3D model share its prefetched request,
+    which is forgotten once all the owners that started it picked it up or
+    discarded it.
+    """
+    token = _owner.set(owner)
+    try:
+        yield
+    finally:
+        _owner.reset(token)
+
+
+def wait_prefetched(keys):
+    """
+    Wait for the requests for `keys` prefetched by the current owner to
+    complete, leaving them to be picked up by the converters.
+
+    Returns the component data fetched for each of the keys, by key.
+    """
+    owner = _owner.get()
+    with _prefetched_lock:
+        futures = {
+            (function, key): prefetched.future
+            for (function, key), prefetched in _prefetched.items()
+            if key in keys and owner in prefetched.owners
+        }
+    wait(futures.values())
+    return {
+        key: future.result()
+        for (function, key), future in futures.items()
+        if function is _get_component_data
+        and not future.cancelled()
+        and future.exception() is None
+    }
+
+
+def discard_prefetched(keys, function=None):
+    """
+    Forget the requests for `keys` prefetched by the current owner that were
+    not picked up. A request still owned by others is left to them.
+
+    function : only forget the requests of this fetch function (e.g.
+        get_step_model), all of them if None
+    """
+    owner = _owner.get()
+    fetch = _fetches()[function] if function is not None else None
+    with _prefetched_lock:
+        for (prefetched_function, key), prefetched in list(_prefetched.items()):
+            if (
+                key in keys
+                and fetch in (None, prefetched_function)
+                and owner in prefetched.owners
+            ):
+                _release(prefetched_function, key, owner, cancel=True)
+
+
+def get_component_data(component_uuid):
+    """
+    Return the decoded `/api/components/{uuid}` response of a component, or
+    None if it could not be retrieved.
+
+    The cache, when enabled, is consulted before any request is made.
+    """
+    future = _take_prefetched(_get_component_data, component_uuid)
+    if future is not None:
+        return future.result()
+    return _coalesced(_get_component_data, component_uuid)
+
+
+def _get_component_data(component_uuid):
+    cache = get_cache()
+    if cache is not None:
+        content = cache.get("components", component_uuid)
+        if content is not None:
+            return json.loads(content.decode())
+
+    response = get(f"{_endpoints.api}/components/{component_uuid}")
+    if response.status_code != requests.codes.ok:
+        logging.error(
+            f"failed to get component {component_uuid}. Requests returned with "
+            f"error code {response.status_code}"
+        )
+        return None
+
+    data = json.loads(response.content.decode())
+    if cache is not None and data.get("success", True):
+        cache.put("components", component_uuid, response.content)
+        _store_metadata(cache, component_uuid, data)
+    return data
+
+
+def get_component_metadata(component_uuid):
+    """
+    Return the metadata of a component, a dict of its "title", "datasheet"
+    link and reference "prefix", or None if it could not be retrieved.
+
+    The metadata is kept in its own namespace of the cache, when enabled, so
+    that it is read without decoding the whole (often large) component data.
+    """
+    future = _take_prefetched(_get_component_metadata, component_uuid)
+    if future is not None:
+        return future.result()
+    return _coalesced(_get_component_metadata, component_uuid)
+
+
+def _get_component_metadata(component_uuid):
+    cache = get_cache()
+    if cache is not None:
+        content = cache.get("metadata", component_uuid)
+        if content is not None:
+            return json.loads(content.decode())
+
+    data = get_component_data(component_uuid)
+    if data is None:
+        return None
+    if cache is None:
+        return _component_metadata(data)
+    return _store_metadata(cache, component_uuid, data)
+
+
+def _component_metadata(data):
+    result = data.get("result") or {}
+    try:
+        c_para = result["dataStr"]["head"]["c_para"]
+    except (KeyError, TypeError):
+        c_para = {}
+    return {
+        "title": result.get("title", ""),
+        "datasheet": c_para.get("link", ""),
+        "prefix": c_para.get("pre", ""),
+    }
+
+
+def _store_metadata(cache, component_uuid, data):
+    metadata = _component_metadata(data)
+    cache.put("metadata", component_uuid, json.dumps(metadata).encode())
+    return metadata
+
+
+def prefetch_models(model_uuid, models):
+    """
+    Start downloading the 3D model of `model_uuid` in the background, in the
+    given formats ("STEP" and/or "WRL").
+    """
+    cache = get_cache()
+    # without a cache, STEP models are streamed straight to the library
+    if "STEP" in models and cache and not cache.contains("step", model_uuid):
+        _prefetch(_get_step_model, model_uuid)
+    # the OBJ source is not needed once the converted model is stored
+    if "WRL" in models and not (cache and cache.contains("wrl", model_uuid)):
+        _prefetch(_get_obj_model, model_uuid)
+
+
+def get_step_model(model_uuid):
+    """
+    Download the STEP model of a 3D model uuid into the cache, and return the
+    path of the cached file, or None if not found or if the cache is disabled.
+    """
+    future = _take_prefetched(_get_step_model, model_uuid)
+    if future is not None:
+        return future.result()
+    return _coalesced(_get_step_model, model_uuid)
+
+
+def download_step_model(model_uuid, path):
+    """
+    Download the STEP model of a 3D model uuid to `path`, without going through
+    the cache. Returns False if not found.
+    """
+    return download(f"{_endpoints.step_models}/{model_uuid}", path)
+
+
+def get_obj_model(model_uuid):
+    """Return the OBJ-like source of a 3D model uuid, or None if not found."""
+    future = _take_prefetched(_get_obj_model, model_uuid)
+    if future is not None:
+        return future.result()
+    return _coalesced(_get_obj_model, model_uuid)
+
+
+def _get_step_model(model_uuid):
+    cache = get_cache()
+    if cache is None:
+        return None
+
+    # STEP models can weigh tens of MB, they are streamed to disk instead of
+    # being held in memory
+    url = f"{_endpoints.step_models}/{model_uuid}"
+    path = cache.path("step", model_uuid)
+    part_path = cache.partial_path("step", model_uuid)
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    with helper.path_lock(part_path):
+        if cache.contains("step", model_uuid):
+            return path
+
+        response = _stream(url, part_path, _conditional_headers("step", model_uuid))
+        if response is not None and response.status_code == requests.codes.not_modified:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            if cache.touch("step", model_uuid):
+                _store_validators("step", model_uuid, response)
+                return path
+            # the stale model was evicted in the meantime
+            response = _stream(url, part_path)
+        if response is None:
+            return None
+
+        cache.put_file("step", model_uuid, part_path)
+        _store_validators("step", model_uuid, response)
+    return path if cache.contains("step", model_uuid) else None
+
+
+def _get_obj_model(model_uuid):
+    content = _get_cached("obj", model_uuid, f"{_endpoints.obj_models}/{model_uuid}")
+    return content.decode() if content is not None else None
+
+
+def _get_cached(namespace, key, url):
+    cache = get_cache()
+    headers = {}
+    if cache is not None:
+        content = cache.get(namespace, key)
+        if content is not None:
+            return content
+        headers = _conditional_headers(namespace, key)
+
+    response = get(url, headers=headers) if headers else get(url)
+    if response.status_code == requests.codes.not_modified:
+        if cache.touch(namespace, key):
+            _store_validators(namespace, key, response)
+            return cache.get(namespace, key)
+        # the stale entry was evicted in the meantime
+        response = get(url)
+    if response.status_code != requests.codes.ok:
+        logging.debug(f"GET {url} returned with error code {response.status_code}")
+        return None
+
+    if cache is not None:
+        cache.put(namespace, key, response.content)
+        _store_validators(namespace, key, response)
+    return response.content
+
+
+def _conditional_headers(namespace, key):
+    """Return the headers revalidating the stale cache entry `key`, if any."""
+    content = get_cache().get("validators", f"{key}.{namespace}")
+    if content is None:
+        return {}
+
+    validators = json.loads(content.decode())
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    if headers:
+        logging.debug(f"revalidating {namespace}/{key}")
+    return headers
+
+
+def _store_validators(namespace, key, response):
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    if any(validators.values()):
+        get_cache().put(
+            "validators", f"{key}.{namespace}", json.dumps(validators).encode()
+        )
+
+
+def _stream(url, part_path, headers=None):
+    """
+    Download `url` into `part_path`, resuming a previous partial download.
+
+    Returns the response, whose body has been written unless it is a 304, or
+    None if the download failed.
+    """
+    try:
+        offset = os.path.getsize(part_path)
+    except OSError:
+        offset = 0
+
+    # models are practically never updated, the part downloaded before an
+    # interruption is assumed to still be valid
+    request_headers = dict(headers or {})
+    if offset:
+        # the part holds the decoded body, while ranges of a compressed
+        # response would count the compressed bytes
+        request_headers["Range"] = f"bytes={offset}-"
+        request_headers["Accept-Encoding"] = "identity"
+    try:
+        response = get(url, headers=request_headers, stream=True)
+        try:
+            if response.status_code == requests.codes.requested_range_not_satisfiable:
+                # the part is complete already, or is not what we expect
+                os.remove(part_path)
+                return _stream(url, part_path, headers)
+            if response.status_code == requests.codes.not_modified:
+                return response
+            if response.status_code == requests.codes.partial_content:
+                logging.info(f"resuming download of {url} at {offset} bytes")
+                mode = "ab"
+            elif response.status_code == requests.codes.ok:
+                mode = "wb"
+            else:
+                logging.debug(
+                    f"GET {url} returned with error code {response.status_code}"
+                )
+                return None
+
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        finally:
+            response.close()
+    except (requests.RequestException, OSError) as e:
+        logging.warning(f"download of {url} interrupted: {e}")
+        return None
+    return response
+
+
+@dataclass
+class _Deadline:
+    at: float
+    seconds: float
+    exceeded: bool = False
+
+
+def _check_deadline(url, timeout, delay=0):
+    """
+    Raise DeadlineExceeded if the deadline will have passed after `delay`
+    seconds, or return `timeout` shortened to the time left.
+    """
+    state = _deadline.get()
+    if state is None:
+        return timeout
+
+    remaining = state.at - time.monotonic() - delay
+    if remaining <= 0:
+        raise _deadline_exceeded(url)
+    connect_timeout, read_timeout = timeout
+    return (min(connect_timeout, remaining), min(read_timeout, remaining))
+
+
+def _time_left():
+    """Return the seconds left before the deadline, or None without one."""
+    state = _deadline.get()
+    if state is None:
+        return None
+    return max(0.0, state.at - time.monotonic())
+
+
+def _deadline_exceeded(url):
+    """Mark the deadline block as failed and return the error to raise."""
+    state = _deadline.get()
+    state.exceeded = True
+    return DeadlineExceeded(
+        f"GET {url} not sent, the deadline of {state.seconds}s has passed"
+    )
+
+
+def _wait_within_deadline(future, key):
+    """
+    Return the result of `future`, raising DeadlineExceeded if the deadline of
+    the component passes first.
+    """
+    state = _deadline.get()
+    if state is None:
+        return future.result()
+
+    try:
+        return future.result(timeout=max(0, state.at - time.monotonic()))
+    except FutureTimeoutError:
+        state.exceeded = True
+        raise DeadlineExceeded(
+            f"{key} not fetched, the deadline of {state.seconds}s has passed"
+        ) from None
+
+
+def _backoff(url, failures, reason):
+    delay = random.uniform(0, min(MAX_RETRY_BACKOFF, RETRY_BACKOFF * 2**failures))
+    _check_deadline(url, _timeout, delay)
+    logging.warning(
+        f"GET {url} failed ({reason}), retry {failures}/{_retries} in {delay:.1f}s"
+    )
+    time.sleep(delay)
+
+
+def _coalesced(function, key):
+    """
+    Call `function(key)`, or wait for the result of the identical call already
+    in flight in another thread, so that components sharing a footprint or a
+    3D model only fetch it once.
+
+    A waiting call waits no longer than its own deadline (see deadline), and
+    fetches again if the call in flight failed on the deadline of another
+    component.
+    """
+    with _in_flight_lock:
+        _coalescing_stats.calls += 1
+        future = _in_flight.get((function, key))
+        if future is not None:
+            _coalescing_stats.coalesced += 1
+        else:
+            _in_flight[(function, key)] = leader = Future()
+
+    if future is not None:
+        logging.debug(f"waiting for the fetch of {key} already in flight")
+        try:
+            return _wait_within_deadline(future, key)
+        except DeadlineExceeded:
+            if future.done() and isinstance(future.exception(), DeadlineExceeded):
+                # the fetch failed on the deadline of another component, this
+                # one may still have time left to fetch it itself
+                logging.debug(f"fetching {key} again, the fetch in flight timed out")
+                return _coalesced(function, key)
+            raise
+
+    try:
+        result = function(key)
+    except BaseException as e:
+        leader.set_exception(e)
+        raise
+    else:
+        leader.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            del _in_flight[(function, key)]
+
+
+@dataclass
+class _Prefetched:
+    future: Future
+    # owners that did not pick up or discard the request yet
+    owners: set
+    # whether a converter waits for it, it is then no longer cancelled
+    picked_up: bool = False
+
+
+def _prefetch(function, key):
+    global _executor
+
+    owner = _owner.get()
+    with _prefetched_lock:
+        prefetched = _prefetched.get((function, key))
+        if prefetched is not None:
+            prefetched.owners.add(owner)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_pool_maxsize, thread_name_prefix="JLC2KiCadLib-fetch"
+            )
+        # run in the context of the caller, so that log records are attributed
+        # to the component being created
+        context = contextvars.copy_context()
+        future = _executor.submit(context.run, _coalesced, function, key)
+        _prefetched[(function, key)] = _Prefetched(future, {owner})
+
+
+def _fetches():
+    """Return the functions fetching in the background, by public function."""
+    return {
+        get_component_data: _get_component_data,
+        get_component_metadata: _get_component_metadata,
+        get_step_model: _get_step_model,
+        get_obj_model: _get_obj_model,
+    }
+
+
+def _take_prefetched(function, key):
+    """
+    Return the future of the prefetched request, or None if not prefetched.
+    The request is picked up by the current owner if it started it, other
+    owners only wait for it.
+    """
+    owner = _owner.get()
+    with _prefetched_lock:
+        prefetched = _prefetched.get((function, key))
+        if prefetched is None:
+            return None
+        prefetched.picked_up = True
+        if owner in prefetched.owners:
+            _release(function, key, owner)
+        return prefetched.future
+
+
+def _release(function, key, owner, cancel=False):
+    """Release the prefetched request of `owner`, with _prefetched_lock held."""
+    prefetched = _prefetched[(function, key)]
+    prefetched.owners.discard(owner)
+    if not prefetched.owners:
+        del _prefetched[(function, key)]
+        if cancel and not prefetched.picked_up:
+            prefetched.future.cancel()
+
+
+def _shutdown_executor():
+    global _executor
+
+    with _prefetched_lock:
+        executor, _executor = _executor, None
+        for prefetched in _prefetched.values():
+            prefetched.future.cancel()
+        _prefetched.clear()
+
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _new_session():
+    session = requests.Session()
+    session.headers["User-Agent"] = helper.get_user_agent()
+
+    adapter = _transport or HTTPAdapter(
+        pool_connections=_pool_connections,
+        pool_maxsize=_pool_maxsize,
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _close_session():
+    global _session
+
+    if _session is not None:
+        _session.close()
+        _session = None
@@ -0,0 +1,178 @@
+"""
+Staged conversion of a batch of components.
+
+The conversion of a component is split in stages (e.g. resolving its uuids,
+downloading its data, converting it), each run by its own pool of worker
+threads and connected to the next one by a bounded queue. While some
+components are converted, the data of the next ones is being downloaded, so
+that neither the network nor the CPU waits on the other, and the bounded
+queues keep long lists of components (e.g. large BOMs) from being read ahead
+without limit.
+
+As with run_batch, the log records of a component are written once it is
+done, in the order the components were given.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .batch import ComponentResult, capture_logs, flush, run_in_component
+
+# Number of components waiting in front of each stage
+DEFAULT_QUEUE_SIZE = 16
+# Number of threads resolving JLCPCB part # to uuids, a single request each
+DEFAULT_RESOLVE_WORKERS = 4
+
+_END = object()
+
+
+@dataclass
+class Stage:
+    """
+    A stage of the pipeline, calling `function` with `workers` threads.
+
+    The function of the first stage is called with the component id, the
+    function of the next stages with the component id and the return value of
+    the previous stage. A stage returning `()` fails the component as not
+    found, and a stage returning None completes it (e.g. already created). In
+    both cases the component skips the remaining stages.
+    """
+
+    name: str
+    function: Callable
+    workers: int = 1
+    # number of components that went through the stage, and failed in it
+    processed: int = 0
+    failed: int = 0
+    # seconds spent in `function`, summed over the workers
+    busy: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, duration, failed):
+        with self._lock:
+            self.processed += 1
+            self.failed += failed
+            self.busy += duration
+
+
+@dataclass
+class _Job:
+    index: int
+    result: ComponentResult
+    # arguments passed to the next stage, after the component id
+    args: tuple = ()
+
+
+def run_pipeline(component_ids, stages, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Pass each component through the `stages`, in order.
+
+    Returns the list of ComponentResult, in the order of `component_ids`.
+    """
+    inboxes = [queue.Queue(maxsize=queue_size) for _ in stages]
+    done = queue.Queue()
+    # components done out of order wait for the components before them, their
+    # number is bounded too
+    slots = threading.BoundedSemaphore(
+        queue_size * len(stages) + sum(stage.workers for stage in stages)
+    )
+
+    workers = []
+    for index, stage in enumerate(stages):
+        outbox = inboxes[index + 1] if index + 1 < len(stages) else done
+        for number in range(stage.workers):
+            worker = threading.Thread(
+                target=_work,
+                args=(stage, inboxes[index], outbox, done),
+                name=f"JLC2KiCadLib-{stage.name}-{number}",
+                daemon=True,
+            )
+            workers.append(worker)
+
+    results = []
+    feed_error = []
+    with capture_logs():
+        for worker in workers:
+            worker.start()
+        feeder = threading.Thread(
+            target=_feed,
+            args=(component_ids, inboxes[0], done, slots, feed_error),
+            name="JLC2KiCadLib-feed",
+            daemon=True,
+        )
+        feeder.start()
+
+        pending = {}
+        total = None
+        while total is None or len(results) < total:
+            job = done.get()
+            if isinstance(job, int):
+                # all the components were fed, this is their number
+                total = job
+                continue
+            pending[job.index] = job
+            while len(results) in pending:
+                results.append(flush(pending.pop(len(results)).result))
+                slots.release()
+
+        for inbox, stage in zip(inboxes, stages):
+            for _ in range(stage.workers):
+                inbox.put(_END)
+        for worker in workers:
+            worker.join()
+        feeder.join()
+
+    if feed_error:
+        raise feed_error[0]
+    return results
+
+
+def log_stages(stages, elapsed):
+    """Log the counters of each stage of a pipeline run lasting `elapsed`."""
+    for stage in stages:
+        utilization = stage.busy / (stage.workers * elapsed) if elapsed else 0
+        logging.info(
+            f"{stage.name}: {stage.processed} components ({stage.failed} failed), "
+            f"{stage.processed / elapsed if elapsed else 0:.1f} components/s, "
+            f"{stage.workers} workers {utilization:.0%} busy"
+        )
+
+
+def _feed(component_ids, inbox, done, slots, feed_error):
+    count = 0
+    try:
+        for component_id in component_ids:
+            slots.acquire()
+            inbox.put(_Job(count, ComponentResult(component_id=component_id)))
+            count += 1
+    except Exception as e:
+        # e.g. an unreadable list of components, raised by run_pipeline
+        feed_error.append(e)
+    done.put(count)
+
+
+def _work(stage, inbox, outbox, done):
+    while True:
+        job = inbox.get()
+        if job is _END:
+            return
+
+        result = job.result
+        args = (result.component_id, *job.args)
+        start = time.perf_counter()
+        value = run_in_component(result, stage.function, *args)
+        if value == () and result.status != "failed":
+            result.status = "failed"
+            result.message = "component not found"
+        failed = result.status == "failed"
+        stage.record(time.perf_counter() - start, failed)
+
+        if failed or value is None:
+            done.put(job)
+        else:
+            job.args = (value,)
+            outbox.put(job)
@@ -0,0 +1,140 @@
+"""
+Concurrent download of the EasyEDA data of a whole list of components.
+
+The `svgs` resolutions, the footprint and symbol data and the 3D models of
+every component are requested from an asyncio event loop, with at most
+`concurrency` requests in flight, and stored in the cache. The synchronous
+converters (`create_footprint`, `create_symbol`, ...) then read them from the
+cache instead of waiting on the network one component at a time.
+
+The requests themselves are made by worker threads through the shared pooled
+session of `JLC2KiCadLib.network`.
+"""
+
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+
+from . import network
+
+DEFAULT_CONCURRENCY = 32
+
+# returned by _Fetcher.run for a request that raised, told apart from a
+# component not found
+_FAILED = object()
+
+
+@dataclass
+class PrefetchStats:
+    components: int = 0
+    not_found: int = 0
+    requests: int = 0
+    failed_requests: int = 0
+
+
+def prefetch(component_ids, models=("STEP",), concurrency=DEFAULT_CONCURRENCY):
+    """
+    Download the data of all `component_ids` into the cache.
+
+    models : the 3D model formats to download ("STEP" and/or "WRL")
+
+    Returns a PrefetchStats.
+    """
+    return asyncio.run(_prefetch(list(component_ids), models, concurrency))
+
+
+def get_model_uuids(footprint_data):
+    """Return the uuids of the 3D models referenced by footprint data."""
+    try:
+        footprint_shape = footprint_data["result"]["dataStr"]["shape"]
+    except (KeyError, TypeError):
+        return []
+
+    model_uuids = []
+    for line in footprint_shape:
+        args = line.split("~")
+        if args[0] != "SVGNODE":
+            continue
+        try:
+            model_uuids.append(json.loads(args[1])["attrs"]["uuid"])
+        except (ValueError, KeyError, IndexError):
+            continue
+    return model_uuids
+
+
+class _Fetcher:
+    def __init__(self, concurrency, executor, stats):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.executor = executor
+        self.stats = stats
+
+    async def run(self, function, *args):
+        async with self.semaphore:
+            self.stats.requests += 1
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, function, *args
+                )
+            except requests.RequestException as e:
+                logging.warning(f"prefetch: {e}")
+                result = _FAILED
+            except (ValueError, KeyError, IndexError) as e:
+                # e.g. an HTML error page, or an empty `svgs` result, only fails
+                # the component it belongs to
+                logging.warning(
+                    f"prefetch: malformed response for {args[0]}, "
+                    f"{type(e).__name__}: {e}"
+                )
+                result = _FAILED
+        if result is None or result is _FAILED:
+            self.stats.failed_requests += 1
+        return result
+
+
+async def _prefetch(component_ids, models, concurrency):
+    stats = PrefetchStats(components=len(component_ids))
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        fetcher = _Fetcher(concurrency, executor, stats)
+        await asyncio.gather(
+            *(
+                _prefetch_component(fetcher, component_id, models)
+                for component_id in component_ids
+            )
+        )
+    logging.info(
+        f"prefetched {stats.components} components with {stats.requests} "
+        f"requests ({stats.failed_requests} failed, {stats.not_found} components "
+        "not found)"
+    )
+    return stats
+
+
+async def _prefetch_component(fetcher, component_id, models):
+    component_uuids = await fetcher.run(network.get_component_uuids, component_id)
+    if component_uuids is _FAILED:
+        return
+    if component_uuids is None:
+        fetcher.stats.not_found += 1
+        return
+
+    footprint_uuid, symbol_uuids = component_uuids
+    footprint_data, *_ = await asyncio.gather(
+        *(
+            fetcher.run(network.get_component_data, uuid)
+            for uuid in [footprint_uuid, *symbol_uuids]
+        )
+    )
+    if footprint_data is None or footprint_data is _FAILED:
+        return
+
+    model_requests = []
+    for model_uuid in get_model_uuids(footprint_data):
+        if "STEP" in models:
+            model_requests.append(fetcher.run(network.get_step_model, model_uuid))
+        if "WRL" in models:
+            model_requests.append(fetcher.run(network.get_obj_model, model_uuid))
+    await asyncio.gather(*model_requests)
@@ -0,0 +1,92 @@
+"""
+Process pool running the CPU-bound conversions.
+
+Converting the shapes of a footprint and the OBJ source of a WRL model is
+pure-Python work, which threads only run one at a time. Once a pool is
+configured with `configure_processes`, these conversions run in worker
+processes instead: the converting threads send them the EasyEDA data (JSON
+shapes, OBJ text) and get back the converted footprint, as a Footprint tree
+the 3D models are then added to, or the contents of the WRL file.
+
+The log records emitted in a worker process are sent back with the result,
+and handled by the calling thread as if it had emitted them, so that they are
+attributed to the component being converted (see batch.run_in_component).
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+_executor = None
+
+
+def configure_processes(processes):
+    """
+    Run the conversions in a pool of `processes` worker processes, or in the
+    calling thread if `processes` is 0.
+    """
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+    if processes:
+        _executor = ProcessPoolExecutor(
+            max_workers=processes,
+            # forking a process running threads would copy the locks they hold
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(logging.getLogger().getEffectiveLevel(),),
+        )
+
+
+def run(function, *args):
+    """
+    Return `function(*args)`, called in a worker process if there is a pool.
+
+    `function` must be defined at module level, and its arguments and return
+    value picklable.
+    """
+    executor = _executor
+    if executor is None:
+        return function(*args)
+
+    value, records, error = executor.submit(_call, function, args).result()
+    for record in records:
+        logging.getLogger(record.name).handle(record)
+    if error is not None:
+        raise error
+    return value
+
+
+class _RecordCollector(logging.Handler):
+    """Collect the records emitted in a worker process, in a picklable form."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        # the arguments and traceback of a record may not be picklable, format
+        # them before sending the record back
+        self.format(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+def _init_worker(level):
+    logging.getLogger().setLevel(level)
+
+
+def _call(function, args):
+    root_logger = logging.getLogger()
+    collector = _RecordCollector()
+    root_logger.addHandler(collector)
+    try:
+        return function(*args), collector.records, None
+    except Exception as e:
+        return None, collector.records, e
+    finally:
+        root_logger.removeHandler(collector)
@@ -0,0 +1,152 @@
+"""
+Adaptive rate limiting of the requests sent to EasyEDA.
+
+Each endpoint family (the component API, the STEP model bucket, the OBJ model
+analyzer) has its own RateLimiter: a token bucket bounding the request rate,
+combined with a limit on the number of requests in flight. Both limits grow
+additively while requests succeed, and are halved when the server answers
+with 429 Too Many Requests or 503 Service Unavailable (AIMD), so that the
+throughput settles just below the point where EasyEDA starts throttling.
+"""
+
+import email.utils
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_RATE = 20.0  # requests per second
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_MAX_RATE = 100.0
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_CONCURRENCY = 32
+# Longest pause honoured from a Retry-After header
+MAX_RETRY_AFTER = 120  # seconds
+
+
+class WaitTimeout(Exception):
+    """No request slot was free before the timeout passed."""
+
+
+class RateLimiter:
+    """
+    Token bucket with an adaptive rate and an adaptive concurrency limit.
+
+    rate : initial number of requests per second
+    min_rate, max_rate : bounds of the adaptive rate
+    concurrency : initial number of requests in flight
+    max_concurrency : upper bound of the adaptive concurrency
+    """
+
+    def __init__(
+        self,
+        name,
+        rate=DEFAULT_RATE,
+        min_rate=DEFAULT_MIN_RATE,
+        max_rate=DEFAULT_MAX_RATE,
+        concurrency=DEFAULT_CONCURRENCY,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+    ):
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.throttled = 0
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def request(self, timeout=None):
+        """
+        Wait for a token and a free slot, and hold the slot while active.
+
+        timeout : longest wait in seconds before raising WaitTimeout, None to
+            wait for as long as needed
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self.in_flight >= int(self.concurrency):
+                    wait = None
+                elif self._tokens < 1:
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    break
+                if end is not None:
+                    if now >= end:
+                        raise WaitTimeout(
+                            f"{self.name}: no request slot free within {timeout:.1f}s"
+                        )
+                    wait = end - now if wait is None else min(wait, end - now)
+                self._condition.wait(wait)
+            self._tokens -= 1
+            self.in_flight += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self):
+        """Additive increase of the rate and concurrency limits."""
+        with self._condition:
+            self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+            self.concurrency = min(
+                self.max_concurrency, self.concurrency + 1 / self.concurrency
+            )
+
+    def on_throttled(self, pause):
+        """
+        Multiplicative decrease of the rate and concurrency limits, and pause
+        all requests for `pause` seconds.
+        """
+        with self._condition:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.concurrency = max(1, self.concurrency / 2)
+            self._tokens = min(self._tokens, 0)
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._condition.notify_all()
+
+        logging.warning(
+            f"{self.name}: throttled by the server, pausing for {pause:.1f}s and "
+            f"slowing down to {self.rate:.1f} requests/s"
+        )
+
+    def _refill(self, now):
+        # at most one second worth of requests can be sent in a burst
+        self._tokens = min(
+            max(1.0, self.rate), self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+def get_retry_after(response):
+    """
+    Return the delay in seconds requested by the Retry-After header of a
+    response, or None if it has none.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        delay = date.timestamp() - time.time()
+    return min(MAX_RETRY_AFTER, max(0.0, delay))
@@ -0,0 +1,243 @@
+"""
+Local stand-in for the EasyEDA endpoints used by JLC2KiCadLib.
+
+The server answers the `svgs` and `components` requests of the component API
+and the STEP and OBJ model downloads with the data recorded in a JLC2KiCadLib
+cache directory (fill one with `JLC2KiCadLib-prefetch -cache_dir DIR ...`).
+Responses can be delayed and errors injected, so that the concurrency and
+retry behaviour of the library can be measured and tested without internet
+access.
+
+Usage:
+    JLC2KiCadLib-standin -cache_dir recorded -latency 0.2 -error_rate 0.05
+    JLC2KiCadLib C1337258 -base_url http://127.0.0.1:8000 --no_cache
+
+The paths served are those of `network.Endpoints.from_base_url`.
+"""
+
+import argparse
+import http.server
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from .cache import Cache, get_default_cache_dir
+
+_ROUTES = [
+    (re.compile(r"/api/products/([^/]+)/svgs"), "svgs"),
+    (re.compile(r"/api/components/([^/]+)"), "components"),
+    (re.compile(r"/step/([^/]+)"), "step"),
+    (re.compile(r"/obj/([^/]+)"), "obj"),
+]
+
+
+class EasyEDAServer:
+    """
+    Serve the payloads recorded in the cache `directory`.
+
+    latency : seconds each response is delayed by
+    jitter : random extra delay of up to `jitter` seconds
+    error_rate : fraction of requests answered with 500 Internal Server Error
+    throttle_rate : fraction of requests answered with 429 Too Many Requests
+    drop_rate : fraction of requests whose connection is closed unanswered
+    retry_after : Retry-After header of the throttled responses, in seconds
+    seed : seed of the random delays and injected errors
+    """
+
+    def __init__(
+        self,
+        directory,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        throttle_rate=0.0,
+        drop_rate=0.0,
+        retry_after=0,
+        seed=None,
+    ):
+        self.store = Cache(directory, ttl=None, max_size=None)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.drop_rate = drop_rate
+        self.retry_after = retry_after
+        # number of requests, and of responses by outcome
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(
+            (host, port), _handler_class(self)
+        )
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve requests until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def respond(self, path, headers):
+        """
+        Return the (status, headers, body) of the response to `path`, or None
+        if the connection is to be dropped.
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            draw = self._random.random()
+        time.sleep(delay)
+
+        if draw < self.drop_rate:
+            return self._count("dropped", None)
+        draw -= self.drop_rate
+        if draw < self.error_rate:
+            return self._count("errors", (500, {}, b"injected error"))
+        draw -= self.error_rate
+        if draw < self.throttle_rate:
+            retry_after = {"Retry-After": str(self.retry_after)}
+            return self._count("throttled", (429, retry_after, b""))
+
+        route = _route(path)
+        if route is None:
+            return self._count("not found", (404, {}, b""))
+
+        namespace, key = route
+        if namespace == "svgs":
+            content = self._svgs(key)
+        else:
+            content = self.store.get(namespace, key)
+        if content is None:
+            return self._count("not found", (404, {}, b""))
+
+        status, response_headers = 200, {}
+        offset = _range_start(headers.get("Range"))
+        if namespace == "step" and offset is not None:
+            if offset >= len(content):
+                return self._count("unsatisfiable", (416, {}, b""))
+            status, content = 206, content[offset:]
+            response_headers["Content-Range"] = (
+                f"bytes {offset}-{offset + len(content) - 1}/*"
+            )
+        return self._count("ok", (status, response_headers, content))
+
+    def _svgs(self, component_id):
+        content = self.store.get("parts", component_id)
+        if content is None:
+            # EasyEDA answers unknown parts with an unsuccessful result
+            return json.dumps({"success": False, "result": []}).encode()
+        entry = json.loads(content.decode())
+        uuids = entry["symbol_uuids"] + [entry["footprint_uuid"]]
+        result = [{"component_uuid": uuid} for uuid in uuids]
+        return json.dumps({"success": True, "result": result}).encode()
+
+    def _count(self, outcome, response):
+        with self._lock:
+            self.stats[outcome] += 1
+        return response
+
+
+def _route(path):
+    """Return the (namespace, key) requested by `path`, or None."""
+    for pattern, namespace in _ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            return namespace, match.group(1)
+    return None
+
+
+def _range_start(value):
+    match = re.fullmatch(r"bytes=(\d+)-", value or "")
+    return int(match.group(1)) if match else None
+
+
+def _handler_class(server):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        # keep-alive, so that the pooled connections of the session are reused
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            response = server.respond(self.path, self.headers)
+            if response is None:
+                self.close_connection = True
+                return
+
+            status, headers, body = response
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local EasyEDA stand-in server")
+    parser.add_argument(
+        "-cache_dir",
+        default=get_default_cache_dir(),
+        help="JLC2KiCadLib cache directory holding the recorded payloads",
+    )
+    parser.add_argument("-port", type=int, default=8000)
+    parser.add_argument("-latency", type=float, default=0.0, help="in seconds")
+    parser.add_argument("-jitter", type=float, default=0.0, help="in seconds")
+    parser.add_argument("-error_rate", type=float, default=0.0)
+    parser.add_argument("-throttle_rate", type=float, default=0.0)
+    parser.add_argument("-drop_rate", type=float, default=0.0)
+    parser.add_argument("-retry_after", type=int, default=1, help="in seconds")
+    args = parser.parse_args()
+
+    server = EasyEDAServer(
+        args.cache_dir,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        drop_rate=args.drop_rate,
+        retry_after=args.retry_after,
+    )
+    print(f"serving {args.cache_dir} at {server.url}")
+    server.serve_forever()
+    print(dict(server.stats))
+
+
+if __name__ == "__main__":
+    main()
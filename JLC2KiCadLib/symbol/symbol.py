@@ -1,11 +1,8 @@
-import json
 import logging
 import os
 import re
 
-import requests
-
-from .. import helper
+from .. import helper, network
 from .symbol_handlers import handlers
 
 template_lib_header = """\
@@ -40,35 +37,28 @@ def create_symbol(
     kicad_symbol = kicad_symbol()
 
     ComponentName = ""
-    for component_uuid in symbol_component_uuid:
-        response = requests.get(
-            f"https://easyeda.com/api/components/{component_uuid}",
-            headers={"User-Agent": helper.get_user_agent()},
-        )
-        if response.status_code == requests.codes.ok:
-            data = json.loads(response.content.decode())
-        else:
-            logging.error(
-                f"create_symbol error. Requests returned with error code "
-                f"{response.status_code}"
-            )
+    unit_uuids = symbol_component_uuid
+    if len(symbol_component_uuid) >= 2:
+        # the first uuid of a multi-unit symbol is the whole component, only
+        # its title is used, to name the symbol
+        metadata = network.get_component_metadata(symbol_component_uuid[0])
+        if metadata is None:
+            logging.error("create_symbol error. Could not retrieve symbol data")
+            return ()
+        ComponentName = sanitize_title(metadata["title"])
+        unit_uuids = symbol_component_uuid[1:]
+
+    for component_uuid in unit_uuids:
+        data = network.get_component_data(component_uuid)
+        if data is None:
+            logging.error("create_symbol error. Could not retrieve symbol data")
             return ()
 
         symbol_shape = data["result"]["dataStr"]["shape"]
         symmbol_prefix = data["result"]["packageDetail"]["dataStr"]["head"]["c_para"][
             "pre"
         ].replace("?", "")
-        component_title = (
-            data["result"]["title"]
-            .replace(" ", "_")
-            .replace(".", "_")
-            .replace("/", "{slash}")
-            .replace("\\", "{backslash}")
-            .replace("<", "{lt}")
-            .replace(">", "{gt}")
-            .replace(":", "{colon}")
-            .replace('"', "{dblquote}")
-        )
+        component_title = sanitize_title(data["result"]["title"])
 
         component_types_values = []
         for value_type in supported_value_types:
@@ -83,11 +73,6 @@ def create_symbol(
         if not ComponentName:
             ComponentName = component_title
             component_title += "_0"
-        if (
-            len(symbol_component_uuid) >= 2
-            and component_uuid == symbol_component_uuid[0]
-        ):
-            continue
 
         # if library_name is not defined, use component_title as library name
         if not library_name:
@@ -142,31 +127,47 @@ def create_symbol(
 """
     # ruff: enable [E501]
 
-    if not os.path.exists(f"{output_dir}/{symbol_path}"):
-        os.makedirs(f"{output_dir}/{symbol_path}")
-
-    if os.path.exists(filename):
-        update_library(
-            library_name,
-            symbol_path,
-            ComponentName,
-            template_lib_component,
-            output_dir,
-            skip_existing,
-        )
-    else:
-        with open(filename, "w") as f:
-            logging.info(f"writing in {filename} file")
-            f.write(template_lib_header)
-            f.write(template_lib_footer)
-        update_library(
-            library_name,
-            symbol_path,
-            ComponentName,
-            template_lib_component,
-            output_dir,
-            skip_existing,
-        )
+    os.makedirs(f"{output_dir}/{symbol_path}", exist_ok=True)
+
+    # several components may be written concurrently in the same library
+    with helper.path_lock(filename):
+        if os.path.exists(filename):
+            update_library(
+                library_name,
+                symbol_path,
+                ComponentName,
+                template_lib_component,
+                output_dir,
+                skip_existing,
+            )
+        else:
+            with open(filename, "w") as f:
+                logging.info(f"writing in {filename} file")
+                f.write(template_lib_header)
+                f.write(template_lib_footer)
+            update_library(
+                library_name,
+                symbol_path,
+                ComponentName,
+                template_lib_component,
+                output_dir,
+                skip_existing,
+            )
+
+    return library_name, ComponentName
+
+
+def sanitize_title(title):
+    return (
+        title.replace(" ", "_")
+        .replace(".", "_")
+        .replace("/", "{slash}")
+        .replace("\\", "{backslash}")
+        .replace("<", "{lt}")
+        .replace(">", "{gt}")
+        .replace(":", "{colon}")
+        .replace('"', "{dblquote}")
+    )
 
 
 def get_type_values_properties(start_index, component_types_values):
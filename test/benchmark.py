@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the JLC2KiCadLib network layer.
+
+Usage:
+    python -m test.benchmark session C1337258 C24112 C2040
+    python -m test.benchmark engine -f parts.txt
+    python -m test.benchmark download -sizes 1 16 64
+    python -m test.benchmark cache -levels 0 3 6 19
+    python -m test.benchmark standin -latency 0.2 -error_rate 0.05 -jobs 1 4 16
+
+session: fetch the `svgs` and component data of a batch of parts twice, once
+    with a bare `requests.get` per request (a new connection every time) and
+    once through the shared pooled session, and report the wall-clock time and
+    the number of TCP/TLS handshakes of each run.
+engine: create the libraries of a batch of parts (e.g. 500 parts listed in a
+    file, one per line) from an empty cache, once with the sequential loop of
+    `main()`, once with the asyncio prefetch engine and once with the staged
+    pipeline (converting in `-processes` worker processes, if given), and
+    report the wall-clock time of each run.
+download: download STEP-sized files of growing sizes (in MB) from a local
+    HTTP server, once holding the whole response in memory and once streamed
+    to disk with `network.download`, and report the peak growth of the
+    resident memory of the process during each download (sampled from
+    /proc, Linux only).
+cache: store the JSON and OBJ payloads of an existing cache (by default the
+    user's cache, fill it first with JLC2KiCadLib-prefetch) in a new cache at
+    each compression level, and report the bytes on disk and the mean time to
+    read an entry back.
+standin: create the libraries of all the parts recorded in a cache directory
+    (by default the user's cache) from the local EasyEDA stand-in server of
+    JLC2KiCadLib.standin, with the given latency and injected errors, once
+    per number of jobs, and report the wall-clock time of each run and the
+    requests answered by the server.
+"""
+
+import argparse
+import gc
+import http.server
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from argparse import Namespace
+from contextlib import contextmanager
+from functools import partial
+
+import requests
+import urllib3.connection
+
+from JLC2KiCadLib import (
+    batch,
+    cache,
+    helper,
+    network,
+    pipeline,
+    prefetch,
+    processes,
+)
+from JLC2KiCadLib.JLC2KiCadLib import add_component, get_pipeline_stages
+from JLC2KiCadLib.standin import EasyEDAServer
+
+API_URL = "https://easyeda.com/api"
+
+
+@contextmanager
+def count_connections():
+    """Count the connections opened by urllib3 while the context is active."""
+    counter = {"connections": 0}
+    original_new_conn = urllib3.connection.HTTPConnection._new_conn
+
+    def new_conn(self):
+        counter["connections"] += 1
+        return original_new_conn(self)
+
+    urllib3.connection.HTTPConnection._new_conn = new_conn
+    try:
+        yield counter
+    finally:
+        urllib3.connection.HTTPConnection._new_conn = original_new_conn
+
+
+def fetch_batch(component_ids, get):
+    """Fetch the uuids and component data of each part with the given `get`."""
+    for component_id in component_ids:
+        data = json.loads(get(f"{API_URL}/products/{component_id}/svgs").content)
+        if not data["success"]:
+            continue
+        for result in data["result"]:
+            get(f"{API_URL}/components/{result['component_uuid']}")
+
+
+def bare_get(url):
+    return requests.get(url, headers={"User-Agent": helper.get_user_agent()})
+
+
+def run(label, component_ids, get):
+    with count_connections() as counter:
+        start = time.perf_counter()
+        fetch_batch(component_ids, get)
+        elapsed = time.perf_counter() - start
+    print(f"{label:8} {elapsed:8.2f}s {counter['connections']:6} handshakes")
+    return elapsed
+
+
+def benchmark_session(args):
+    print(f"{'':8} {'time':>9} {'':6} {len(args.components)} parts")
+    bare = run("bare", args.components, bare_get)
+    network.configure_session()
+    pooled = run("pooled", args.components, network.get)
+    network.close_session()
+    print(f"speedup: {bare / pooled:.2f}x")
+
+
+def run_engine(label, component_ids, engine, concurrency, jobs=1, base_url=None):
+    work_dir = tempfile.mkdtemp(prefix="jlc2kicad_benchmark_")
+    cache.configure_cache(f"{work_dir}/cache")
+    network.configure_session(base_url=base_url)
+    args = Namespace(
+        output_dir=f"{work_dir}/output",
+        footprint_creation=True,
+        symbol_creation=True,
+        symbol_lib=None,
+        symbol_lib_dir="symbol",
+        footprint_lib="footprint",
+        models=["STEP"],
+        model_dir="packages3d",
+        skip_existing=False,
+        model_base_variable="",
+        jobs=jobs,
+        prefetch_concurrency=concurrency,
+    )
+
+    try:
+        start = time.perf_counter()
+        if engine == "pipeline":
+            results = pipeline.run_pipeline(component_ids, get_pipeline_stages(args))
+        else:
+            if engine == "prefetch":
+                prefetch.prefetch(
+                    component_ids, models=args.models, concurrency=concurrency
+                )
+            results = batch.run_batch(
+                component_ids, partial(add_component, args=args), jobs=jobs
+            )
+        elapsed = time.perf_counter() - start
+    finally:
+        network.close_session()
+        cache.configure_cache(None)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    failed = sum(result.status == "failed" for result in results)
+    print(f"{label:8} {elapsed:8.2f}s {failed:6} failed")
+    return elapsed
+
+
+def benchmark_engine(args):
+    component_ids = list(args.components)
+    if args.file:
+        with open(args.file) as f:
+            component_ids += [line.strip() for line in f if line.strip()]
+
+    logging.basicConfig(level=logging.CRITICAL)
+    print(f"{'':8} {'time':>9} {'':6} {len(component_ids)} parts")
+    loop = run_engine("loop", component_ids, "loop", args.concurrency)
+    engine = run_engine("prefetch", component_ids, "prefetch", args.concurrency)
+    processes.configure_processes(args.processes)
+    try:
+        staged = run_engine(
+            "pipeline", component_ids, "pipeline", args.concurrency, args.jobs
+        )
+    finally:
+        processes.configure_processes(0)
+    print(f"speedup: {loop / engine:.2f}x (prefetch), {loop / staged:.2f}x (pipeline)")
+
+
+class SizedFileHandler(http.server.BaseHTTPRequestHandler):
+    """Serve `/{size}` as `size` bytes of data, written in 1 MB blocks."""
+
+    def do_GET(self):
+        size = int(self.path.strip("/"))
+        self.send_response(200)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        block = b"x" * (1024 * 1024)
+        for offset in range(0, size, len(block)):
+            self.wfile.write(block[: size - offset])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def buffered_download(url, path):
+    content = network.get(url).content
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def resident_memory():
+    """Return the resident set size of the process in bytes."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def peak_memory(download, url, path):
+    """
+    Return the peak growth in MB of the resident memory of the process while
+    running `download`, sampled every millisecond.
+    """
+    gc.collect()
+    baseline = peak = resident_memory()
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(0.001):
+            peak = max(peak, resident_memory())
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        download(url, path)
+    finally:
+        done.set()
+        sampler.join()
+    peak = max(peak, resident_memory())
+    os.remove(path)
+    return (peak - baseline) / 1024 / 1024
+
+
+def benchmark_download(args):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SizedFileHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    work_dir = tempfile.mkdtemp(prefix="jlc2kicad_benchmark_")
+    network.configure_session()
+
+    print(f"{'size':>8} {'buffered':>10} {'streamed':>10}  (peak RSS growth, MB)")
+    try:
+        for size in args.sizes:
+            url = f"http://127.0.0.1:{server.server_port}/{size * 1024 * 1024}"
+            path = f"{work_dir}/model.step"
+            buffered = peak_memory(buffered_download, url, path)
+            streamed = peak_memory(network.download, url, path)
+            print(f"{size:6}MB {buffered:10.1f} {streamed:10.1f}")
+    finally:
+        network.close_session()
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def read_payloads(directory):
+    """Return the (namespace, key, payload) of the compressible entries."""
+    source = cache.Cache(directory, ttl=None)
+    payloads = []
+    for namespace in cache.COMPRESSED_NAMESPACES:
+        namespace_dir = os.path.join(directory, namespace)
+        if not os.path.isdir(namespace_dir):
+            continue
+        for fanout in os.listdir(namespace_dir):
+            for key in os.listdir(os.path.join(namespace_dir, fanout)):
+                data = source.get(namespace, key)
+                if data is not None:
+                    payloads.append((namespace, key, data))
+    return payloads
+
+
+def benchmark_cache(args):
+    payloads = read_payloads(args.cache_dir)
+    if not payloads:
+        print(f"no cached payloads in {args.cache_dir}")
+        return
+    backend = "zstd" if cache.zstandard is not None else "gzip"
+    raw_size = sum(len(data) for _, _, data in payloads)
+    print(f"{len(payloads)} entries, {raw_size / 1024:.0f} kB uncompressed ({backend})")
+
+    print(f"{'level':>6} {'on disk':>10} {'ratio':>6} {'get':>10}")
+    for level in args.levels:
+        work_dir = tempfile.mkdtemp(prefix="jlc2kicad_benchmark_")
+        try:
+            store = cache.Cache(
+                work_dir, ttl=None, max_size=None, compression_level=level
+            )
+            for namespace, key, data in payloads:
+                store.put(namespace, key, data)
+            start = time.perf_counter()
+            for namespace, key, _ in payloads:
+                store.get(namespace, key)
+            latency = (time.perf_counter() - start) / len(payloads)
+            size = store.size()
+            print(
+                f"{level:6} {size / 1024:8.0f}kB {raw_size / size:6.1f} "
+                f"{latency * 1e6:8.0f}us"
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def recorded_parts(directory):
+    """Return the JLCPCB part # resolved in the cache `directory`."""
+    parts_dir = os.path.join(directory, "parts")
+    if not os.path.isdir(parts_dir):
+        return []
+    return sorted(
+        key
+        for fanout in os.listdir(parts_dir)
+        for key in os.listdir(os.path.join(parts_dir, fanout))
+    )
+
+
+def benchmark_standin(args):
+    component_ids = recorded_parts(args.cache_dir)
+    if not component_ids:
+        print(f"no recorded parts in {args.cache_dir}")
+        return
+
+    logging.basicConfig(level=logging.CRITICAL)
+    print(f"{'jobs':>8} {'time':>9} {'':6} {len(component_ids)} parts")
+    for jobs in args.jobs:
+        server = EasyEDAServer(
+            args.cache_dir,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            drop_rate=args.drop_rate,
+            seed=0,
+        )
+        with server:
+            run_engine(f"{jobs:8}", component_ids, "loop", 0, jobs, server.url)
+        print(f"{'':8} {dict(server.stats)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JLC2KiCadLib benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    session_parser = subparsers.add_parser(
+        "session", help="compare bare requests with the pooled session"
+    )
+    session_parser.add_argument("components", nargs="+", help="JLCPCB part #")
+    session_parser.set_defaults(func=benchmark_session)
+
+    engine_parser = subparsers.add_parser(
+        "engine", help="compare the sequential loop with the prefetch engine"
+    )
+    engine_parser.add_argument("components", nargs="*", help="JLCPCB part #")
+    engine_parser.add_argument("-f", dest="file", help="file of JLCPCB part #")
+    engine_parser.add_argument(
+        "-concurrency", type=int, default=prefetch.DEFAULT_CONCURRENCY
+    )
+    engine_parser.add_argument(
+        "-jobs", type=int, default=os.cpu_count(), help="pipeline convert threads"
+    )
+    engine_parser.add_argument(
+        "-processes", type=int, default=0, help="pipeline convert processes"
+    )
+    engine_parser.set_defaults(func=benchmark_engine)
+
+    download_parser = subparsers.add_parser(
+        "download", help="compare buffered and streamed model downloads"
+    )
+    download_parser.add_argument(
+        "-sizes", type=int, nargs="+", default=[1, 16, 64], help="sizes in MB"
+    )
+    download_parser.set_defaults(func=benchmark_download)
+
+    cache_parser = subparsers.add_parser(
+        "cache", help="compare the cache compression levels"
+    )
+    cache_parser.add_argument("-cache_dir", default=cache.get_default_cache_dir())
+    cache_parser.add_argument(
+        "-levels", type=int, nargs="+", default=[0, 3, 6, 9], help="compression levels"
+    )
+    cache_parser.set_defaults(func=benchmark_cache)
+
+    standin_parser = subparsers.add_parser(
+        "standin", help="create libraries from the local EasyEDA stand-in"
+    )
+    standin_parser.add_argument("-cache_dir", default=cache.get_default_cache_dir())
+    standin_parser.add_argument("-jobs", type=int, nargs="+", default=[1, 4, 16])
+    standin_parser.add_argument("-latency", type=float, default=0.2)
+    standin_parser.add_argument("-jitter", type=float, default=0.05)
+    standin_parser.add_argument("-error_rate", type=float, default=0.0)
+    standin_parser.add_argument("-throttle_rate", type=float, default=0.0)
+    standin_parser.add_argument("-drop_rate", type=float, default=0.0)
+    standin_parser.set_defaults(func=benchmark_standin)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
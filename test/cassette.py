@@ -0,0 +1,153 @@
+"""
+Record/replay of the EasyEDA responses used by the integration tests.
+
+A Cassette is a requests transport adapter (see `network.configure_session`)
+keeping the response to each URL in a directory, one gzip-compressed JSON
+file per URL. Once recorded, the integration tests replay the responses
+instead of querying EasyEDA, so that they run offline, quickly and always on
+the same data. The cassettes are not committed, they are recorded by a first
+run of the integration tests with network access.
+
+Modes:
+    auto: replay the recorded responses, record the missing ones
+    replay: only replay, a request that was not recorded fails
+    record: record all the responses again
+    live: send all the requests to EasyEDA, nothing is recorded
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from io import BytesIO
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODES = ("auto", "replay", "record", "live")
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(__file__), "cassettes")
+
+# Headers describing the encoded body or the connection, which do not apply
+# to the decoded body that is recorded
+_DROPPED_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "keep-alive",
+    "set-cookie",
+    "transfer-encoding",
+}
+
+_PARTIAL_HEADERS = ("Range", "If-None-Match", "If-Modified-Since")
+
+
+class CassetteMiss(requests.RequestException):
+    """A request was not recorded, in replay mode."""
+
+
+class Cassette(BaseAdapter):
+    """
+    Transport adapter recording and replaying the responses in `directory`.
+
+    mode : one of MODES
+    adapter : adapter sending the requests that are not replayed
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, mode="auto", adapter=None):
+        super().__init__()
+        if mode not in MODES:
+            raise ValueError(f"unknown cassette mode {mode!r}")
+        self.directory = directory
+        self.mode = mode
+        self.adapter = adapter or HTTPAdapter()
+        # number of "replayed", "recorded" and "live" responses
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def path(self, url):
+        """Return the file holding the response to `url`."""
+        name = hashlib.sha256(url.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}.json.gz")
+
+    def send(self, request, **kwargs):
+        if self.mode in ("auto", "replay"):
+            entry = self._load(request.url)
+            if entry is not None:
+                return self._count("replayed", _build_response(request, entry))
+            if self.mode == "replay":
+                raise CassetteMiss(
+                    f"{request.url} is not recorded in {self.directory}",
+                    request=request,
+                )
+
+        kwargs["stream"] = False
+        response = self.adapter.send(request, **kwargs)
+        if (
+            self.mode == "live"
+            # transient errors are retried, and answers to range or
+            # conditional requests are not the response to the URL
+            or response.status_code >= 500
+            or response.status_code == requests.codes.too_many_requests
+            or any(name in request.headers for name in _PARTIAL_HEADERS)
+        ):
+            return self._count("live", response)
+
+        entry = {
+            "url": request.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in _DROPPED_HEADERS
+            },
+            "body": base64.b64encode(response.content).decode(),
+        }
+        self._save(entry)
+        return self._count("recorded", _build_response(request, entry))
+
+    def close(self):
+        self.adapter.close()
+
+    def _load(self, url):
+        try:
+            with gzip.open(self.path(url), "rt") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        # two URLs sharing a file name would be a hash collision
+        return entry if entry["url"] == url else None
+
+    def _save(self, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, gzip.open(f, "wt") as gz:
+                json.dump(entry, gz, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path(entry["url"]))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _count(self, outcome, response):
+        with self._lock:
+            self.stats[outcome] += 1
+        return response
+
+
+def _build_response(request, entry):
+    response = requests.Response()
+    response.request = request
+    response.url = request.url
+    response.status_code = entry["status"]
+    response.reason = entry["reason"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.raw = BytesIO(base64.b64decode(entry["body"]))
+    return response
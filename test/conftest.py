@@ -12,12 +12,26 @@ from pathlib import Path
 
 import pytest
 
+from .cassette import MODES, Cassette
 from .component_cases import TEST_CASES
 
 # Project root directory
 PROJECT_ROOT = Path(__file__).parent.parent
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--cassette",
+        choices=MODES,
+        default="auto",
+        help=(
+            "How the integration tests use the EasyEDA responses recorded in "
+            "test/cassettes: auto (replay, record the missing ones), replay, "
+            "record or live"
+        ),
+    )
+
+
 @dataclass
 class GeneratedComponent:
     """Holds the generated files and status for a component."""
@@ -64,9 +78,24 @@ def session_output_dir():
     shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+@pytest.fixture(scope="session")
+def cassette(pytestconfig):
+    """
+    Send the requests of the session through the cassette of recorded EasyEDA
+    responses (see test/cassette.py).
+    """
+    from JLC2KiCadLib import network
+
+    cassette = Cassette(mode=pytestconfig.getoption("cassette"))
+    network.configure_session(transport=cassette)
+    yield cassette
+    network.configure_session()
+
+
 @pytest.fixture(scope="session")
 def generated_components(
     session_output_dir: Path,
+    cassette: Cassette,
 ) -> dict[str, GeneratedComponent]:
     """
     Generate all test components once per session.
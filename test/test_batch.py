@@ -0,0 +1,152 @@
+"""
+Unit tests for concurrent batch conversion (`JLC2KiCadLib.batch`).
+
+The conversion function is a stub, so these tests check the scheduling, log
+ordering and result reporting of `run_batch` without any network access.
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from JLC2KiCadLib.batch import log_summary, run_batch
+
+
+def fake_convert(component_id):
+    """Log a few records, with random delays to shuffle completion order."""
+    logging.info(f"start {component_id}")
+    time.sleep(random.uniform(0, 0.01))
+    logging.info(f"end {component_id}")
+
+
+class TestRunBatch:
+    @pytest.mark.parametrize("jobs", [1, 4])
+    def test_results_are_in_input_order(self, jobs):
+        component_ids = [f"C{i}" for i in range(20)]
+
+        results = run_batch(component_ids, fake_convert, jobs=jobs)
+
+        assert [result.component_id for result in results] == component_ids
+        assert all(result.status == "ok" for result in results)
+
+    def test_logs_are_written_in_input_order(self, caplog):
+        component_ids = [f"C{i}" for i in range(20)]
+
+        with caplog.at_level("INFO"):
+            run_batch(component_ids, fake_convert, jobs=8)
+
+        expected = []
+        for component_id in component_ids:
+            expected += [f"start {component_id}", f"end {component_id}"]
+        assert caplog.messages == expected
+
+    def test_components_are_converted_concurrently(self):
+        threads = set()
+
+        def convert(component_id):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.01)
+
+        run_batch([f"C{i}" for i in range(8)], convert, jobs=4)
+
+        assert len(threads) > 1
+
+    def test_logged_errors_are_counted(self):
+        def convert(component_id):
+            logging.error("request error, no Step model found")
+
+        (result,) = run_batch(["C1"], convert, jobs=2)
+
+        assert result.status == "errors"
+        assert result.errors == 1
+
+    def test_records_of_background_tasks_are_attributed_to_the_component(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        def convert(component_id):
+            context = contextvars.copy_context()
+            executor.submit(context.run, logging.error, "background error").result()
+
+        (result,) = run_batch(["C1"], convert, jobs=2)
+        executor.shutdown()
+
+        assert result.errors == 1
+
+    def test_component_not_found_is_a_failure(self):
+        (result,) = run_batch(["C1"], lambda component_id: (), jobs=1)
+
+        assert result.status == "failed"
+        assert result.message == "component not found"
+
+    @pytest.mark.parametrize("jobs", [1, 4])
+    def test_exception_fails_only_its_component(self, jobs, caplog):
+        def convert(component_id):
+            if component_id == "C2":
+                raise ValueError("bad data")
+
+        with caplog.at_level("ERROR"):
+            results = run_batch(["C1", "C2", "C3"], convert, jobs=jobs)
+
+        assert [result.status for result in results] == ["ok", "failed", "ok"]
+        assert results[1].message == "ValueError: bad data"
+        assert "unexpected error while creating C2" in caplog.text
+
+    def test_network_errors_are_logged_without_traceback(self, caplog):
+        def convert(component_id):
+            raise ConnectionError("connection refused")
+
+        with caplog.at_level("ERROR"):
+            (result,) = run_batch(["C1"], convert)
+
+        assert result.status == "failed"
+        assert "failed to create C1: connection refused" in caplog.text
+        assert caplog.records[0].exc_info is None
+
+    def test_input_is_consumed_lazily(self):
+        consumed = []
+
+        def component_ids():
+            for i in range(100):
+                consumed.append(i)
+                yield f"C{i}"
+
+        def convert(component_id):
+            # no more than a bounded window of components is read ahead
+            assert len(consumed) <= 2 * 2 + int(component_id[1:]) + 1
+
+        results = run_batch(component_ids(), convert, jobs=2)
+
+        assert len(results) == 100
+        assert all(result.status == "ok" for result in results)
+
+    def test_handlers_are_restored(self):
+        root_logger = logging.getLogger()
+        handlers = root_logger.handlers[:]
+
+        run_batch(["C1"], fake_convert, jobs=2)
+
+        assert root_logger.handlers == handlers
+        assert all(not handler.filters for handler in handlers)
+
+
+class TestLogSummary:
+    def test_summary_lists_components_that_are_not_ok(self, caplog):
+        def convert(component_id):
+            if component_id == "C2":
+                logging.error("request error, no 3D model found")
+            if component_id == "C3":
+                return ()
+
+        results = run_batch(["C1", "C2", "C3"], convert)
+
+        with caplog.at_level("INFO"):
+            log_summary(results)
+
+        assert "3 components processed: 1 ok, 1 with errors, 1 failed" in caplog.text
+        assert "C2: created with 1 error(s)" in caplog.text
+        assert "C3: failed, component not found" in caplog.text
@@ -0,0 +1,110 @@
+"""
+Unit tests for the reading of lists of components (`JLC2KiCadLib.bom`).
+"""
+
+import io
+import sys
+
+import pytest
+
+from JLC2KiCadLib.bom import read_components
+
+JLCPCB_BOM = (
+    "\ufeffComment,Designator,Footprint,JLCPCB Part #（optional）\n"
+    '100nF,"C1,C2,C3",C0402,C1525\n'
+    "10k,R1,R0402,C25744\n"
+    "Header,J1,PinHeader_1x04,\n"
+)
+
+KICAD_BOM = (
+    '"Source:","/home/user/board/board.kicad_sch"\n'
+    '"Date:","2024-05-01"\n'
+    '"Tool:","Eeschema 8.0.2"\n'
+    '"Component Count:","4"\n'
+    '"Ref","Qnty","Value","Footprint","LCSC Part"\n'
+    '"C1 C2 C3","3","100nF","C_0402","C1525"\n'
+    '"R1","1","10k","R_0402","C25744"\n'
+)
+
+
+def read(tmp_path, content):
+    path = tmp_path / "bom.csv"
+    path.write_text(content, encoding="utf-8")
+    return list(read_components(str(path)))
+
+
+class TestReadComponents:
+    def test_jlcpcb_bom(self, tmp_path):
+        assert read(tmp_path, JLCPCB_BOM) == ["C1525", "C25744"]
+
+    def test_kicad_bom_with_preamble(self, tmp_path):
+        assert read(tmp_path, KICAD_BOM) == ["C1525", "C25744"]
+
+    def test_tab_separated_bom(self, tmp_path):
+        content = "Reference\tValue\tLCSC\nR1\t10k\tC25744\n"
+
+        assert read(tmp_path, content) == ["C25744"]
+
+    def test_plain_list(self, tmp_path):
+        content = "# power supply\nC1525\n\n  C25744  \n"
+
+        assert read(tmp_path, content) == ["C1525", "C25744"]
+
+    def test_duplicates_are_read_once(self, tmp_path):
+        content = "Reference,LCSC\nC1,C1525\nC2,C1525\nR1,C25744\n"
+
+        assert read(tmp_path, content) == ["C1525", "C25744"]
+
+    def test_rows_without_part_number_are_skipped(self, tmp_path, caplog):
+        with caplog.at_level("WARNING"):
+            read(tmp_path, JLCPCB_BOM)
+
+        assert "BOM line 4: no JLCPCB part #, skipped" in caplog.text
+
+    def test_bom_without_part_number_column_is_rejected(self, tmp_path):
+        path = tmp_path / "bom.csv"
+        path.write_text("Reference,Value\nR1,10k\n")
+
+        with pytest.raises(ValueError, match="no JLCPCB part # column"):
+            read_components(str(path))
+
+    def test_missing_file_is_rejected(self, tmp_path):
+        with pytest.raises(OSError):
+            read_components(str(tmp_path / "missing.csv"))
+
+    def test_empty_file(self, tmp_path):
+        assert read(tmp_path, "\n") == []
+
+    def test_standard_input_is_read_lazily(self, monkeypatch):
+        lines = iter(["Reference,LCSC\n"] + [f"R{i},C{i}\n" for i in range(1000)])
+        monkeypatch.setattr(sys, "stdin", lines)
+
+        component_ids = read_components("-")
+
+        assert next(component_ids) == "C0"
+        # only the lines of the first part were read
+        assert next(lines) == "R1,C1\n"
+
+    def test_file_is_closed_once_read(self, tmp_path, monkeypatch):
+        files = []
+        real_open = open
+
+        def recording_open(*args, **kwargs):
+            files.append(real_open(*args, **kwargs))
+            return files[-1]
+
+        monkeypatch.setattr("builtins.open", recording_open)
+        path = tmp_path / "parts.txt"
+        path.write_text("C1525\n")
+
+        component_ids = read_components(str(path))
+        assert not files[0].closed
+        assert list(component_ids) == ["C1525"]
+        assert files[0].closed
+
+    def test_standard_input_is_not_closed(self, monkeypatch):
+        stdin = io.StringIO("C1525\n")
+        monkeypatch.setattr(sys, "stdin", stdin)
+
+        assert list(read_components("-")) == ["C1525"]
+        assert not stdin.closed
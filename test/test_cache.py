@@ -0,0 +1,265 @@
+"""
+Unit tests for the on-disk payload cache (`JLC2KiCadLib.cache`).
+
+All entries are written to a temporary directory, expiry and LRU order are
+driven by setting the entries' modification and access times explicitly.
+"""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from JLC2KiCadLib import cache
+from JLC2KiCadLib.cache import Cache
+
+
+@pytest.fixture(autouse=True)
+def disable_cache():
+    yield
+    cache.configure_cache(None)
+
+
+def set_times(path, atime=None, mtime=None):
+    stat = os.stat(path)
+    os.utime(
+        path,
+        (
+            stat.st_atime if atime is None else atime,
+            stat.st_mtime if mtime is None else mtime,
+        ),
+    )
+
+
+class TestCache:
+    def test_missing_entry_returns_none(self, tmp_path):
+        assert Cache(str(tmp_path)).get("components", "uuid-1") is None
+
+    def test_put_then_get_returns_payload(self, tmp_path):
+        store = Cache(str(tmp_path))
+
+        store.put("components", "uuid-1", b"payload")
+
+        assert store.get("components", "uuid-1") == b"payload"
+
+    def test_namespaces_are_independent(self, tmp_path):
+        store = Cache(str(tmp_path))
+
+        store.put("components", "key", b"component")
+
+        assert store.get("parts", "key") is None
+
+    def test_keys_cannot_escape_the_cache_directory(self, tmp_path):
+        store = Cache(str(tmp_path / "cache"))
+
+        store.put("components", "../../outside", b"payload")
+
+        assert store.get("components", "../../outside") == b"payload"
+        assert not (tmp_path / "outside").exists()
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        store = Cache(str(tmp_path), ttl=60)
+        store.put("components", "uuid-1", b"payload")
+
+        set_times(store.path("components", "uuid-1"), mtime=time.time() - 120)
+
+        assert store.get("components", "uuid-1") is None
+
+    def test_no_ttl_never_expires(self, tmp_path):
+        store = Cache(str(tmp_path), ttl=None)
+        store.put("components", "uuid-1", b"payload")
+
+        set_times(store.path("components", "uuid-1"), mtime=0)
+
+        assert store.get("components", "uuid-1") == b"payload"
+
+    def test_namespace_ttl_overrides_default_ttl(self, tmp_path):
+        store = Cache(str(tmp_path), ttl=60, namespace_ttls={"parts": 3600})
+        store.put("components", "key", b"component")
+        store.put("parts", "key", b"part")
+
+        for namespace in ("components", "parts"):
+            set_times(store.path(namespace, "key"), mtime=time.time() - 120)
+
+        assert store.get("components", "key") is None
+        assert store.get("parts", "key") == b"part"
+
+    def test_hit_refreshes_access_time_but_not_storage_time(self, tmp_path):
+        store = Cache(str(tmp_path))
+        store.put("components", "uuid-1", b"payload")
+        path = store.path("components", "uuid-1")
+        set_times(path, atime=1000)
+        mtime = os.stat(path).st_mtime
+
+        store.get("components", "uuid-1")
+
+        assert os.stat(path).st_atime > 1000
+        assert os.stat(path).st_mtime == mtime
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        store = Cache(str(tmp_path), max_size=25, compression_level=0)
+        store.put("components", "old", b"x" * 10)
+        store.put("components", "recent", b"x" * 10)
+        set_times(store.path("components", "old"), atime=1000)
+        set_times(store.path("components", "recent"), atime=2000)
+
+        store.put("components", "new", b"x" * 10)
+
+        assert store.get("components", "old") is None
+        assert store.get("components", "recent") is not None
+        assert store.get("components", "new") is not None
+        assert store.size() == 20
+
+    def test_eviction_leaves_room_for_further_entries(self, tmp_path):
+        store = Cache(str(tmp_path), max_size=100, compression_level=0)
+        for i in range(11):
+            store.put("components", f"uuid-{i}", b"x" * 10)
+        assert store.size() <= 90
+
+        with patch.object(store, "_entries", wraps=store._entries) as entries:
+            store.put("components", "uuid-11", b"x" * 10)
+
+        entries.assert_not_called()
+
+    def test_overwriting_an_entry_keeps_size_accurate(self, tmp_path):
+        store = Cache(str(tmp_path), compression_level=0)
+        store.put("components", "uuid-1", b"x" * 10)
+        assert store.size() == 10
+
+        store.put("components", "uuid-1", b"x" * 4)
+
+        assert store.size() == 4
+
+    def test_contains_ignores_expired_entries(self, tmp_path):
+        store = Cache(str(tmp_path), ttl=60)
+        store.put("step", "uuid-1", b"model")
+        assert store.contains("step", "uuid-1")
+
+        set_times(store.path("step", "uuid-1"), mtime=time.time() - 120)
+
+        assert not store.contains("step", "uuid-1")
+
+    def test_touch_makes_an_expired_entry_fresh(self, tmp_path):
+        store = Cache(str(tmp_path), ttl=60)
+        store.put("step", "uuid-1", b"model")
+        set_times(store.path("step", "uuid-1"), mtime=time.time() - 120)
+
+        assert store.touch("step", "uuid-1")
+
+        assert store.get("step", "uuid-1") == b"model"
+        assert not store.touch("step", "uuid-2")
+
+    def test_materialize_links_entry_to_destination(self, tmp_path):
+        store = Cache(str(tmp_path / "cache"))
+        store.put("step", "uuid-1", b"model")
+        destination = tmp_path / "model.step"
+        destination.write_bytes(b"outdated")
+
+        assert store.materialize("step", "uuid-1", str(destination))
+
+        assert destination.read_bytes() == b"model"
+        assert os.path.samefile(destination, store.path("step", "uuid-1"))
+
+    def test_materialize_twice_leaves_no_temporary_file(self, tmp_path):
+        store = Cache(str(tmp_path / "cache"))
+        store.put("step", "uuid-1", b"model")
+        destination = tmp_path / "out" / "model.step"
+        destination.parent.mkdir()
+
+        assert store.materialize("step", "uuid-1", str(destination))
+        assert store.materialize("step", "uuid-1", str(destination))
+
+        assert os.listdir(destination.parent) == ["model.step"]
+
+    def test_materialize_copies_when_links_are_not_supported(
+        self, monkeypatch, tmp_path
+    ):
+        store = Cache(str(tmp_path / "cache"))
+        store.put("step", "uuid-1", b"model")
+        destination = tmp_path / "model.step"
+
+        def link(src, dst):
+            raise OSError("cross-device link")
+
+        monkeypatch.setattr(cache.os, "link", link)
+
+        assert store.materialize("step", "uuid-1", str(destination))
+        assert destination.read_bytes() == b"model"
+        assert not os.path.samefile(destination, store.path("step", "uuid-1"))
+
+    def test_materialize_missing_entry_returns_false(self, tmp_path):
+        destination = tmp_path / "model.step"
+
+        assert not Cache(str(tmp_path / "cache")).materialize(
+            "step", "uuid-1", str(destination)
+        )
+        assert not destination.exists()
+
+
+class TestCompression:
+    PAYLOAD = b'{"success": true, "result": {"dataStr": "' + b"x" * 1000 + b'"}}'
+
+    @pytest.mark.parametrize("zstandard", [True, False])
+    def test_entries_are_compressed_on_disk(self, monkeypatch, tmp_path, zstandard):
+        if not zstandard:
+            monkeypatch.setattr(cache, "zstandard", None)
+        elif cache.zstandard is None:
+            pytest.skip("zstandard is not installed")
+        store = Cache(str(tmp_path))
+
+        store.put("components", "uuid-1", self.PAYLOAD)
+
+        assert os.path.getsize(store.path("components", "uuid-1")) < 100
+        assert store.size() < 100
+        assert store.get("components", "uuid-1") == self.PAYLOAD
+
+    def test_models_are_stored_as_is(self, tmp_path):
+        store = Cache(str(tmp_path))
+
+        store.put("step", "uuid-1", self.PAYLOAD)
+
+        with open(store.path("step", "uuid-1"), "rb") as f:
+            assert f.read() == self.PAYLOAD
+
+    def test_uncompressed_entries_are_readable(self, tmp_path):
+        Cache(str(tmp_path), compression_level=0).put(
+            "components", "uuid-1", self.PAYLOAD
+        )
+
+        assert Cache(str(tmp_path)).get("components", "uuid-1") == self.PAYLOAD
+
+    def test_zstd_entry_without_zstandard_is_a_miss(self, monkeypatch, tmp_path):
+        store = Cache(str(tmp_path), compression_level=0)
+        store.put("components", "uuid-1", b"\x28\xb5\x2f\xfd" + b"frame")
+        monkeypatch.setattr(cache, "zstandard", None)
+
+        assert store.get("components", "uuid-1") is None
+
+    def test_corrupted_entry_is_a_miss(self, tmp_path):
+        store = Cache(str(tmp_path), compression_level=0)
+        store.put("components", "uuid-1", b"\x1f\x8b" + b"truncated")
+
+        assert store.get("components", "uuid-1") is None
+
+
+class TestConfigureCache:
+    def test_cache_is_disabled_by_default(self):
+        assert cache.get_cache() is None
+
+    def test_configure_cache_enables_and_disables(self, tmp_path):
+        configured = cache.configure_cache(str(tmp_path), ttl=10, max_size=100)
+
+        assert cache.get_cache() is configured
+        assert configured.ttl == 10
+        assert configured.max_size == 100
+        assert configured.namespace_ttls == cache.DEFAULT_NAMESPACE_TTLS
+
+        cache.configure_cache(None)
+        assert cache.get_cache() is None
+
+    def test_default_cache_dir_honours_xdg_cache_home(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(cache.sys, "platform", "linux")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        assert cache.get_default_cache_dir() == str(tmp_path / "JLC2KiCadLib")
@@ -0,0 +1,122 @@
+"""
+Unit tests for the record/replay transport of the integration tests
+(`test/cassette.py`).
+
+The recorded responses come from a fake adapter, so these tests run offline.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from JLC2KiCadLib import network
+
+from .cassette import Cassette, CassetteMiss
+
+URL = f"{network.EASYEDA_API_URL}/components/uuid-1"
+
+
+def fake_adapter(content=b'{"success": true, "result": {}}', status_code=200):
+    """Adapter answering every request with `content`."""
+    adapter = MagicMock(spec=requests.adapters.BaseAdapter)
+
+    def send(request, **kwargs):
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = status_code
+        response.headers["Content-Type"] = "application/json"
+        response.headers["Content-Encoding"] = "gzip"
+        response._content = content
+        return response
+
+    adapter.send.side_effect = send
+    return adapter
+
+
+@pytest.fixture
+def use_cassette(monkeypatch):
+    monkeypatch.setattr(network, "RETRY_BACKOFF", 0)
+
+    def use_cassette(cassette):
+        network.configure_session(transport=cassette)
+        return cassette
+
+    yield use_cassette
+    network.configure_session()
+
+
+class TestCassette:
+    def test_recorded_response_is_replayed(self, use_cassette, tmp_path):
+        use_cassette(Cassette(str(tmp_path), adapter=fake_adapter()))
+        recorded = network.get_component_data("uuid-1")
+
+        adapter = fake_adapter()
+        cassette = use_cassette(Cassette(str(tmp_path), "replay", adapter))
+
+        assert network.get_component_data("uuid-1") == recorded
+        adapter.send.assert_not_called()
+        assert cassette.stats == {"replayed": 1}
+
+    def test_replayed_response_is_decoded(self, use_cassette, tmp_path):
+        use_cassette(Cassette(str(tmp_path), adapter=fake_adapter(b"\x00\xff")))
+        network.get(URL)
+
+        use_cassette(Cassette(str(tmp_path), "replay"))
+        response = network.get(URL)
+
+        assert response.content == b"\x00\xff"
+        assert response.headers["Content-Type"] == "application/json"
+        assert "Content-Encoding" not in response.headers
+
+    def test_missing_response_fails_in_replay_mode(self, use_cassette, tmp_path):
+        adapter = fake_adapter()
+        use_cassette(Cassette(str(tmp_path), "replay", adapter))
+
+        with pytest.raises(CassetteMiss):
+            network.get(URL)
+        adapter.send.assert_not_called()
+
+    def test_record_mode_records_again(self, use_cassette, tmp_path):
+        use_cassette(Cassette(str(tmp_path), adapter=fake_adapter(b"old")))
+        network.get(URL)
+
+        use_cassette(Cassette(str(tmp_path), "record", fake_adapter(b"new")))
+        network.get(URL)
+
+        use_cassette(Cassette(str(tmp_path), "replay"))
+        assert network.get(URL).content == b"new"
+
+    def test_live_mode_records_nothing(self, use_cassette, tmp_path):
+        use_cassette(Cassette(str(tmp_path / "cassette"), "live", fake_adapter()))
+
+        network.get(URL)
+
+        assert not (tmp_path / "cassette").exists()
+
+    def test_server_errors_are_not_recorded(self, use_cassette, tmp_path):
+        cassette = use_cassette(
+            Cassette(str(tmp_path), adapter=fake_adapter(b"", status_code=502))
+        )
+
+        assert network.get(URL).status_code == 502
+
+        assert not any(tmp_path.iterdir())
+        assert cassette.stats["recorded"] == 0
+
+    def test_range_requests_are_not_recorded(self, use_cassette, tmp_path):
+        use_cassette(Cassette(str(tmp_path), adapter=fake_adapter()))
+
+        network.get(URL, headers={"Range": "bytes=4-"})
+
+        assert not any(tmp_path.iterdir())
+
+    def test_responses_are_keyed_by_url(self, tmp_path):
+        cassette = Cassette(str(tmp_path))
+
+        assert cassette.path(URL) != cassette.path(f"{URL}?version=2")
+
+    def test_unknown_mode_is_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            Cassette(str(tmp_path), "rewind")
@@ -0,0 +1,337 @@
+"""
+Unit tests for the manifest of the output directory (`JLC2KiCadLib.manifest`),
+the skipping of the components it records (--skip_existing) and the creation
+of the changed components only (--sync).
+"""
+
+import json
+import logging
+import os
+from argparse import Namespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from JLC2KiCadLib import JLC2KiCadLib, manifest, network
+from JLC2KiCadLib.batch import run_batch
+from JLC2KiCadLib.JLC2KiCadLib import (
+    add_component,
+    convert_component,
+    fetch_component,
+    is_created,
+    record_component,
+)
+from JLC2KiCadLib.manifest import MANIFEST_NAME, Manifest, hash_payloads
+
+COMPONENT_UUIDS = ("footprint-uuid", ["symbol-uuid"])
+
+
+def make_args(output_dir, **options):
+    args = Namespace(
+        output_dir=str(output_dir),
+        footprint_creation=True,
+        symbol_creation=True,
+        symbol_lib=None,
+        symbol_lib_dir="symbol",
+        footprint_lib="footprint",
+        models=["STEP"],
+        model_dir="packages3d",
+        skip_existing=True,
+        model_base_variable="",
+    )
+    vars(args).update(options)
+    return args
+
+
+def create_files(output_dir):
+    """Create the files of a component named FP_C1 / SYM_C1."""
+    (output_dir / "footprint" / "packages3d").mkdir(parents=True)
+    (output_dir / "footprint" / "FP_C1.kicad_mod").write_text("(module FP_C1)")
+    (output_dir / "footprint" / "packages3d" / "FP_C1.step").write_text("step")
+    (output_dir / "symbol").mkdir()
+    (output_dir / "symbol" / "SYM_C1.kicad_sym").write_text("(kicad_symbol_lib)")
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    yield tmp_path
+    manifest.configure_manifest(None)
+
+
+class TestManifest:
+    def test_entries_are_reloaded(self, tmp_path):
+        Manifest(str(tmp_path)).record("C1", {"symbol": "SYM_C1"})
+
+        assert Manifest(str(tmp_path)).get("C1") == {"symbol": "SYM_C1"}
+
+    def test_last_entry_wins(self, tmp_path):
+        first = Manifest(str(tmp_path))
+        first.record("C1", {"symbol": "old"})
+        first.record("C1", {"symbol": "new"})
+
+        assert Manifest(str(tmp_path)).get("C1") == {"symbol": "new"}
+
+    def test_compact_keeps_one_line_per_component(self, tmp_path):
+        component_manifest = Manifest(str(tmp_path))
+        for symbol in ("old", "new"):
+            component_manifest.record("C1", {"symbol": symbol})
+        component_manifest.record("C2", {"symbol": "other"})
+
+        component_manifest.compact()
+
+        lines = (tmp_path / MANIFEST_NAME).read_text().splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {"component_id": "C1", "symbol": "new"},
+            {"component_id": "C2", "symbol": "other"},
+        ]
+
+    def test_truncated_line_is_ignored(self, tmp_path, caplog):
+        Manifest(str(tmp_path)).record("C1", {"symbol": "SYM_C1"})
+        with open(tmp_path / MANIFEST_NAME, "a") as f:
+            f.write('{"component_id": "C2", "sym')
+
+        component_manifest = Manifest(str(tmp_path))
+
+        assert component_manifest.get("C1") == {"symbol": "SYM_C1"}
+        assert component_manifest.get("C2") is None
+        assert "line 2: invalid entry" in caplog.text
+
+    def test_payload_hash_does_not_depend_on_key_order(self):
+        assert hash_payloads([{"a": 1, "b": 2}]) == hash_payloads([{"b": 2, "a": 1}])
+        assert hash_payloads([{"a": 1}]) != hash_payloads([{"a": 2}])
+
+
+class TestSkipExisting:
+    def test_created_component_is_recorded(self, output_dir):
+        create_files(output_dir)
+        manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir)
+
+        record_component("C1", args, "footprint:FP_C1", ("SYM_C1", "SYM_C1"))
+
+        entry = manifest.get_manifest().get("C1")
+        assert entry["footprint"] == "footprint/FP_C1.kicad_mod"
+        assert entry["models"] == {"STEP": "footprint/packages3d/FP_C1.step"}
+        assert entry["symbol_library"] == "symbol/SYM_C1.kicad_sym"
+        assert set(entry["hashes"]) == {
+            "footprint/FP_C1.kicad_mod",
+            "footprint/packages3d/FP_C1.step",
+        }
+        assert is_created("C1", args)
+
+    def test_missing_model_is_recorded_as_unavailable(self, output_dir):
+        create_files(output_dir)
+        manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir, models=["STEP", "WRL"])
+
+        record_component("C1", args, "footprint:FP_C1", ("SYM_C1", "SYM_C1"))
+
+        assert manifest.get_manifest().get("C1")["models"]["WRL"] is None
+        assert is_created("C1", args)
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            {"models": ["STEP", "WRL"]},
+            {"footprint_lib": "other_footprint"},
+            {"model_dir": "models"},
+            {"symbol_lib": "other_lib"},
+        ],
+    )
+    def test_component_created_with_other_options_is_not_skipped(
+        self, output_dir, options
+    ):
+        create_files(output_dir)
+        manifest.configure_manifest(str(output_dir))
+        record_component(
+            "C1", make_args(output_dir), "footprint:FP_C1", ("SYM_C1", "SYM_C1")
+        )
+
+        assert not is_created("C1", make_args(output_dir, **options))
+
+    def test_component_with_a_deleted_file_is_not_skipped(self, output_dir):
+        create_files(output_dir)
+        manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir)
+        record_component("C1", args, "footprint:FP_C1", ("SYM_C1", "SYM_C1"))
+
+        (output_dir / "footprint" / "FP_C1.kicad_mod").unlink()
+
+        assert not is_created("C1", args)
+
+    def test_component_removed_from_its_symbol_library_is_not_skipped(self, output_dir):
+        create_files(output_dir)
+        library = output_dir / "symbol" / "SYM_C1.kicad_sym"
+        library.write_text('(kicad_symbol_lib\n  (symbol "SYM_C1"\n  )\n)\n')
+        manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir)
+        record_component("C1", args, "footprint:FP_C1", ("SYM_C1", "SYM_C1"))
+
+        library.write_text('(kicad_symbol_lib\n  (symbol "SYM_C2"\n  )\n)\n')
+        os.utime(library, (1000, 1000))
+
+        assert not is_created("C1", args)
+
+    def test_component_kept_in_a_modified_symbol_library_is_skipped(self, output_dir):
+        create_files(output_dir)
+        library = output_dir / "symbol" / "SYM_C1.kicad_sym"
+        library.write_text('(kicad_symbol_lib\n  (symbol "SYM_C1"\n  )\n)\n')
+        manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir)
+        record_component("C1", args, "footprint:FP_C1", ("SYM_C1", "SYM_C1"))
+
+        library.write_text(
+            '(kicad_symbol_lib\n  (symbol "SYM_C1"\n    (symbol "SYM_C2_0_1")\n  )\n'
+            '  (symbol "SYM_C2"\n  )\n)\n'
+        )
+        os.utime(library, (1000, 1000))
+
+        assert is_created("C1", args)
+
+    def test_recorded_component_is_skipped_without_request(
+        self, output_dir, monkeypatch
+    ):
+        create_files(output_dir)
+        manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir)
+        record_component("C1", args, "footprint:FP_C1", ("SYM_C1", "SYM_C1"))
+        get = MagicMock()
+        monkeypatch.setattr(network, "get", get)
+
+        assert add_component("C1", args) is None
+        get.assert_not_called()
+
+    def test_component_created_with_errors_is_not_recorded(self, output_dir):
+        create_files(output_dir)
+        manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir)
+
+        def convert(component_id):
+            logging.error("request error, no Step model found")
+            record_component(component_id, args, "footprint:FP_C1", ("SYM_C1",) * 2)
+
+        run_batch(["C1"], convert)
+
+        assert manifest.get_manifest().get("C1") is None
+
+    def test_nothing_is_recorded_without_manifest(self, output_dir):
+        create_files(output_dir)
+        args = make_args(output_dir)
+
+        record_component("C1", args, "footprint:FP_C1", ("SYM_C1", "SYM_C1"))
+
+        assert not (output_dir / MANIFEST_NAME).exists()
+        assert not is_created("C1", args)
+
+
+class TestSync:
+    @pytest.fixture
+    def converters(self, monkeypatch):
+        """Stub the network and the converters of a component named FP_C1 / SYM_C1."""
+        payloads = {"footprint-uuid": {"shape": 1}, "symbol-uuid": {"shape": 2}}
+        monkeypatch.setattr(network, "get_component_data", payloads.get)
+        create_footprint = MagicMock(return_value=("footprint:FP_C1", ""))
+        create_symbol = MagicMock(return_value=("SYM_C1", "SYM_C1"))
+        monkeypatch.setattr(JLC2KiCadLib, "create_footprint", create_footprint)
+        monkeypatch.setattr(JLC2KiCadLib, "create_symbol", create_symbol)
+        return payloads, create_footprint, create_symbol
+
+    def test_unchanged_component_is_not_created_again(self, output_dir, converters):
+        _, create_footprint, create_symbol = converters
+        create_files(output_dir)
+        component_manifest = manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir, skip_existing=False, sync=True)
+
+        convert_component("C1", COMPONENT_UUIDS, args)
+        convert_component("C1", COMPONENT_UUIDS, args)
+
+        assert create_footprint.call_count == 1
+        assert create_symbol.call_count == 1
+        assert (component_manifest.new, component_manifest.unchanged) == (1, 1)
+
+    def test_unchanged_component_is_skipped_before_its_models_are_downloaded(
+        self, output_dir, converters, monkeypatch
+    ):
+        payloads, create_footprint, _ = converters
+        create_files(output_dir)
+        component_manifest = manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir, skip_existing=False, sync=True)
+        convert_component("C1", COMPONENT_UUIDS, args)
+        prefetch_models = MagicMock()
+        svgnode = 'SVGNODE~{"attrs": {"uuid": "model-uuid"}}'
+        fetched = {"footprint-uuid": {"result": {"dataStr": {"shape": [svgnode]}}}}
+        monkeypatch.setattr(network, "prefetch_component_data", MagicMock())
+        monkeypatch.setattr(network, "prefetch_component_metadata", MagicMock())
+        monkeypatch.setattr(network, "wait_prefetched", lambda keys: fetched)
+        monkeypatch.setattr(network, "prefetch_models", prefetch_models)
+
+        assert fetch_component("C1", COMPONENT_UUIDS, args, wait=True) is None
+        prefetch_models.assert_not_called()
+        assert component_manifest.unchanged == 1
+
+        payloads["footprint-uuid"] = {"shape": 3}
+        assert fetch_component("C1", COMPONENT_UUIDS, args, wait=True) == (
+            COMPONENT_UUIDS,
+            ["model-uuid"],
+        )
+        prefetch_models.assert_called_once_with("model-uuid", ["STEP"])
+
+    def test_component_is_created_again_if_its_data_changed(
+        self, output_dir, converters
+    ):
+        payloads, create_footprint, _ = converters
+        create_files(output_dir)
+        component_manifest = manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir, skip_existing=False, sync=True)
+        convert_component("C1", COMPONENT_UUIDS, args)
+
+        payloads["symbol-uuid"] = {"shape": 3}
+        convert_component("C1", COMPONENT_UUIDS, args)
+
+        assert create_footprint.call_count == 2
+        assert (component_manifest.updated, component_manifest.unchanged) == (1, 0)
+
+    def test_component_is_created_again_by_another_version(
+        self, output_dir, converters, monkeypatch
+    ):
+        _, create_footprint, _ = converters
+        create_files(output_dir)
+        manifest.configure_manifest(str(output_dir))
+        args = make_args(output_dir, skip_existing=False, sync=True)
+        convert_component("C1", COMPONENT_UUIDS, args)
+
+        monkeypatch.setattr(JLC2KiCadLib, "__version__", "99.0.0")
+        convert_component("C1", COMPONENT_UUIDS, args)
+
+        assert create_footprint.call_count == 2
+
+    def test_component_is_created_again_with_other_options(
+        self, output_dir, converters
+    ):
+        _, create_footprint, _ = converters
+        create_files(output_dir)
+        manifest.configure_manifest(str(output_dir))
+        convert_component(
+            "C1", COMPONENT_UUIDS, make_args(output_dir, skip_existing=False)
+        )
+
+        args = make_args(
+            output_dir, skip_existing=False, sync=True, model_base_variable="MODELS"
+        )
+        convert_component("C1", COMPONENT_UUIDS, args)
+
+        assert create_footprint.call_count == 2
+
+    def test_sync_report_is_logged(self, output_dir, caplog):
+        component_manifest = Manifest(str(output_dir))
+        component_manifest.record("C1", {"duration": 1.5})
+        component_manifest.record("C2", {"duration": 2.0})
+        component_manifest.keep("C1")
+        component_manifest.keep("C2")
+        component_manifest.record("C3", {"duration": 1.0})
+
+        with caplog.at_level("INFO"):
+            component_manifest.log_sync_report()
+
+        assert "2 components unchanged, 0 updated, 3 new" in caplog.text
+        assert "About 3.5s saved" in caplog.text
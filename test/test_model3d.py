@@ -1,20 +1,28 @@
 """
 Unit tests for 3D model generation (`JLC2KiCadLib.footprint.model3d`).
 
-These tests mock all network calls (`requests.get`) so they run offline and
-deterministically, exercising the STEP/WRL download+conversion logic and its
-error branches directly.
+These tests mock all network calls (`JLC2KiCadLib.network.get`) so they run
+offline and deterministically, exercising the STEP/WRL download+conversion
+logic and its error branches directly.
 """
 
-from unittest.mock import MagicMock, patch
+import io
+import json
+from unittest.mock import patch
 
+import pytest
+import requests
 from KicadModTree import Footprint, Model
 
-from JLC2KiCadLib.footprint.footprint import FootprintInfo
+from JLC2KiCadLib import cache, network
+from JLC2KiCadLib.footprint import footprint as footprint_module
+from JLC2KiCadLib.footprint.footprint import FootprintInfo, create_footprint
+from JLC2KiCadLib.footprint.footprint_handlers import h_SVGNODE
 from JLC2KiCadLib.footprint.model3d import (
     ensure_footprint_lib_directories_exist,
     get_StepModel,
     get_WrlModel,
+    obj_to_wrl,
 )
 
 # A minimal but well-formed EasyEDA 3D model response: one material and one
@@ -51,6 +59,13 @@ f 2 4 3
 """
 
 
+def model_response(content, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(content)
+    return response
+
+
 def new_footprint_info(tmp_path, model_base_variable="") -> FootprintInfo:
     return FootprintInfo(
         footprint_name="test_footprint",
@@ -81,9 +96,9 @@ class TestEnsureFootprintLibDirectoriesExist:
 
 
 class TestGetStepModel:
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_downloads_and_appends_model_on_success(self, mock_get, tmp_path):
-        mock_get.return_value = MagicMock(status_code=200, content=b"fake-step-data")
+        mock_get.return_value = model_response(b"fake-step-data")
         info = new_footprint_info(tmp_path)
         footprint = Footprint("test")
 
@@ -107,9 +122,9 @@ class TestGetStepModel:
         assert len(models) == 1
         assert models[0].filename == "packages3d/test_footprint.step"
 
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_http_error_skips_model_creation(self, mock_get, tmp_path, caplog):
-        mock_get.return_value = MagicMock(status_code=404, content=b"")
+        mock_get.return_value = model_response(b"", status_code=404)
         info = new_footprint_info(tmp_path)
         footprint = Footprint("test")
 
@@ -129,9 +144,9 @@ class TestGetStepModel:
         assert not step_file.exists()
         assert list(footprint.getAllChilds()) == []
 
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_uses_model_base_variable_with_dollar_prefix(self, mock_get, tmp_path):
-        mock_get.return_value = MagicMock(status_code=200, content=b"data")
+        mock_get.return_value = model_response(b"data")
         info = new_footprint_info(tmp_path, model_base_variable="${KICAD_3RD_PARTY}")
         footprint = Footprint("test")
 
@@ -150,9 +165,9 @@ class TestGetStepModel:
             models[0].filename
         ) == '"${KICAD_3RD_PARTY}/packages3d/test_footprint.step"'
 
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_uses_model_base_variable_without_dollar_prefix(self, mock_get, tmp_path):
-        mock_get.return_value = MagicMock(status_code=200, content=b"data")
+        mock_get.return_value = model_response(b"data")
         info = new_footprint_info(tmp_path, model_base_variable="KICAD_3RD_PARTY")
         footprint = Footprint("test")
 
@@ -173,11 +188,9 @@ class TestGetStepModel:
 
 
 class TestGetWrlModel:
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_downloads_and_converts_model_on_success(self, mock_get, tmp_path):
-        mock_get.return_value = MagicMock(
-            status_code=200, content=SAMPLE_WRL_SOURCE.encode()
-        )
+        mock_get.return_value = model_response(SAMPLE_WRL_SOURCE.encode())
         info = new_footprint_info(tmp_path)
         footprint = Footprint("test")
 
@@ -204,12 +217,12 @@ class TestGetWrlModel:
         assert len(models) == 1
         assert models[0].filename == "packages3d/test_footprint.wrl"
 
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_reused_vertex_indices_across_faces_are_deduplicated(
         self, mock_get, tmp_path
     ):
-        mock_get.return_value = MagicMock(
-            status_code=200, content=SAMPLE_WRL_SOURCE_SHARED_VERTICES.encode()
+        mock_get.return_value = model_response(
+            SAMPLE_WRL_SOURCE_SHARED_VERTICES.encode()
         )
         info = new_footprint_info(tmp_path)
         footprint = Footprint("test")
@@ -230,11 +243,9 @@ class TestGetWrlModel:
         # list, even though 2 of them are referenced by both faces.
         assert content.count("coordIndex") == 1
 
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_uses_model_base_variable_with_dollar_prefix(self, mock_get, tmp_path):
-        mock_get.return_value = MagicMock(
-            status_code=200, content=SAMPLE_WRL_SOURCE.encode()
-        )
+        mock_get.return_value = model_response(SAMPLE_WRL_SOURCE.encode())
         info = new_footprint_info(tmp_path, model_base_variable="${KICAD_3RD_PARTY}")
         footprint = Footprint("test")
 
@@ -253,11 +264,9 @@ class TestGetWrlModel:
             '"${KICAD_3RD_PARTY}/packages3d/test_footprint.wrl"'
         )
 
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_uses_model_base_variable_without_dollar_prefix(self, mock_get, tmp_path):
-        mock_get.return_value = MagicMock(
-            status_code=200, content=SAMPLE_WRL_SOURCE.encode()
-        )
+        mock_get.return_value = model_response(SAMPLE_WRL_SOURCE.encode())
         info = new_footprint_info(tmp_path, model_base_variable="KICAD_3RD_PARTY")
         footprint = Footprint("test")
 
@@ -276,9 +285,9 @@ class TestGetWrlModel:
             '"$(KICAD_3RD_PARTY)/packages3d/test_footprint.wrl"'
         )
 
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_http_error_skips_model_creation(self, mock_get, tmp_path, caplog):
-        mock_get.return_value = MagicMock(status_code=500, content=b"")
+        mock_get.return_value = model_response(b"", status_code=500)
         info = new_footprint_info(tmp_path)
         footprint = Footprint("test")
 
@@ -298,16 +307,14 @@ class TestGetWrlModel:
         wrl_file = tmp_path / "footprint" / "packages3d" / "test_footprint.wrl"
         assert not wrl_file.exists()
 
-    @patch("JLC2KiCadLib.footprint.model3d.requests.get")
+    @patch("JLC2KiCadLib.network.get")
     def test_wrl_model_not_added_if_step_model_already_present(
         self, mock_get, tmp_path, caplog
     ):
         # Simulate STEP model already having been added to the footprint
         # (i.e. both STEP and WRL requested): WRL file should still be
         # written to disk, but not appended as a second 3D model reference.
-        mock_get.return_value = MagicMock(
-            status_code=200, content=SAMPLE_WRL_SOURCE.encode()
-        )
+        mock_get.return_value = model_response(SAMPLE_WRL_SOURCE.encode())
         info = new_footprint_info(tmp_path)
         footprint = Footprint("test")
         footprint.append(Model(filename="packages3d/test_footprint.step"))
@@ -331,3 +338,192 @@ class TestGetWrlModel:
         ]
         assert len(models) == 1  # still just the STEP model
         assert "prevent duplicates" in caplog.text
+
+
+def svgnode_data(model_uuid="uuid-1"):
+    attrs = {
+        "uuid": model_uuid,
+        "c_origin": "0,0",
+        "z": "0",
+        "c_rotation": "0,0,0",
+    }
+    return [json.dumps({"attrs": attrs})]
+
+
+class TestSvgNodeBackgroundDownload:
+    @pytest.fixture(autouse=True)
+    def reset_network(self):
+        yield
+        network.close_session()
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_models_are_downloaded_before_being_added(self, mock_get, tmp_path):
+        model_cache = cache.configure_cache(str(tmp_path / "cache"))
+        mock_get.return_value = model_response(b"step")
+        info = new_footprint_info(tmp_path)
+        info.models = ["STEP"]
+        footprint = Footprint("test")
+
+        h_SVGNODE(svgnode_data(), footprint, info)
+
+        # the download is started, but the model is only added later on
+        assert len(info.pending_models) == 1
+        assert list(footprint.getAllChilds()) == []
+        future = network._take_prefetched(network._get_step_model, "uuid-1")
+        assert future.result() == model_cache.path("step", "uuid-1")
+        cache.configure_cache(None)
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_step_model_is_streamed_to_the_library_without_cache(
+        self, mock_get, tmp_path
+    ):
+        mock_get.return_value = model_response(b"step")
+        info = new_footprint_info(tmp_path)
+        info.models = ["STEP"]
+        footprint = Footprint("test")
+
+        h_SVGNODE(svgnode_data(), footprint, info)
+        assert network._take_prefetched(network._get_step_model, "uuid-1") is None
+        info.pending_models[0]()
+
+        step_file = tmp_path / "footprint" / "packages3d" / "test_footprint.step"
+        assert step_file.read_bytes() == b"step"
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_pending_models_are_added_in_order(self, mock_get, tmp_path):
+        mock_get.side_effect = lambda url, **kwargs: model_response(
+            SAMPLE_WRL_SOURCE.encode() if "3dmodel" in url else b"step"
+        )
+        info = new_footprint_info(tmp_path)
+        info.models = ["STEP", "WRL"]
+        footprint = Footprint("test")
+
+        h_SVGNODE(svgnode_data(), footprint, info)
+        for add_model in info.pending_models:
+            add_model()
+
+        models = [
+            child for child in footprint.getAllChilds() if isinstance(child, Model)
+        ]
+        assert [model.filename for model in models] == [
+            "packages3d/test_footprint.step"
+        ]
+        assert (tmp_path / "footprint" / "packages3d" / "test_footprint.wrl").exists()
+        assert mock_get.call_count == 2
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_create_footprint_adds_pending_models(self, mock_get, tmp_path):
+        mock_get.return_value = model_response(b"step")
+        shape = ["SVGNODE~" + svgnode_data()[0]]
+
+        with patch(
+            "JLC2KiCadLib.footprint.footprint.get_footprint_info",
+            return_value=("test_footprint", "", shape, (0, 0)),
+        ):
+            create_footprint(
+                footprint_component_uuid="fake-uuid",
+                component_id="C1234",
+                footprint_lib="footprint",
+                output_dir=str(tmp_path),
+                model_base_variable="",
+                model_dir="packages3d",
+                skip_existing=False,
+                models=["STEP"],
+            )
+
+        content = (tmp_path / "footprint" / "test_footprint.kicad_mod").read_text()
+        assert "packages3d/test_footprint.step" in content
+
+    def test_shapes_are_converted_while_models_are_downloaded(self, tmp_path):
+        shape = ["SVGNODE~" + svgnode_data()[0]]
+        steps = []
+        convert = footprint_module.convert_footprint
+
+        def convert_footprint(*args):
+            steps.append("convert")
+            return convert(*args)
+
+        with patch(
+            "JLC2KiCadLib.footprint.footprint.get_footprint_info",
+            return_value=("test_footprint", "", shape, (0, 0)),
+        ), patch(
+            "JLC2KiCadLib.network.prefetch_models",
+            side_effect=lambda *args: steps.append("download"),
+        ), patch(
+            "JLC2KiCadLib.footprint.footprint_handlers.get_StepModel",
+            side_effect=lambda **kwargs: steps.append("create"),
+        ), patch.object(footprint_module, "convert_footprint", convert_footprint):
+            create_footprint(
+                footprint_component_uuid="fake-uuid",
+                component_id="C1234",
+                footprint_lib="footprint",
+                output_dir=str(tmp_path),
+                model_base_variable="",
+                model_dir="packages3d",
+                skip_existing=False,
+                models=["STEP"],
+            )
+
+        assert steps == ["download", "convert", "create"]
+
+
+class TestModelStore:
+    @pytest.fixture(autouse=True)
+    def model_cache(self, tmp_path):
+        yield cache.configure_cache(str(tmp_path / "cache"))
+        cache.configure_cache(None)
+        network.close_session()
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_step_model_is_downloaded_once_per_model_uuid(self, mock_get, tmp_path):
+        mock_get.return_value = model_response(b"step")
+
+        for footprint_name in ("first", "second"):
+            info = new_footprint_info(tmp_path)
+            info.footprint_name = footprint_name
+            get_StepModel("uuid-1", info, Footprint("test"), 0, 0, 0, "0,0,0")
+
+        assert mock_get.call_count == 1
+        model_dir = tmp_path / "footprint" / "packages3d"
+        assert (model_dir / "first.step").read_bytes() == b"step"
+        assert (model_dir / "second.step").read_bytes() == b"step"
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_wrl_model_is_converted_once_per_model_uuid(self, mock_get, tmp_path):
+        mock_get.return_value = model_response(SAMPLE_WRL_SOURCE.encode())
+
+        with patch(
+            "JLC2KiCadLib.footprint.model3d.obj_to_wrl", wraps=obj_to_wrl
+        ) as convert:
+            for footprint_name in ("first", "second"):
+                info = new_footprint_info(tmp_path)
+                info.footprint_name = footprint_name
+                get_WrlModel("uuid-1", info, Footprint("test"), 0, 0, 0, "0,0,0")
+
+        assert mock_get.call_count == 1
+        assert convert.call_count == 1
+        model_dir = tmp_path / "footprint" / "packages3d"
+        assert (model_dir / "first.wrl").read_text() == (
+            model_dir / "second.wrl"
+        ).read_text()
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_stored_step_model_keeps_the_obj_download(self, mock_get, tmp_path):
+        mock_get.return_value = model_response(b"step")
+        info = new_footprint_info(tmp_path)
+        get_StepModel("uuid-1", info, Footprint("test"), 0, 0, 0, "0,0,0")
+
+        network.prefetch_models("uuid-1", ["STEP", "WRL"])
+        get_StepModel("uuid-1", info, Footprint("test"), 0, 0, 0, "0,0,0")
+
+        assert network._take_prefetched(network._get_obj_model, "uuid-1") is not None
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_stored_models_are_not_prefetched(self, mock_get, tmp_path):
+        mock_get.return_value = model_response(b"step")
+        info = new_footprint_info(tmp_path)
+        get_StepModel("uuid-1", info, Footprint("test"), 0, 0, 0, "0,0,0")
+
+        network.prefetch_models("uuid-1", ["STEP"])
+
+        assert network._take_prefetched(network._get_step_model, "uuid-1") is None
@@ -0,0 +1,883 @@
+"""
+Unit tests for the shared HTTP session (`JLC2KiCadLib.network`).
+
+No request leaves the process: the session is inspected directly, and
+`requests.Session.get` is mocked where a request is issued.
+"""
+
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from JLC2KiCadLib import cache, helper, network
+
+
+@pytest.fixture(autouse=True)
+def reset_session():
+    network.configure_session()
+    yield
+    network.configure_session()
+
+
+class TestSharedSession:
+    def test_session_is_reused_between_calls(self):
+        assert network.get_session() is network.get_session()
+
+    def test_session_sends_user_agent(self):
+        session = network.get_session()
+
+        assert session.headers["User-Agent"] == helper.get_user_agent()
+
+    def test_default_pool_limits(self):
+        adapter = network.get_session().get_adapter("https://easyeda.com")
+
+        assert adapter._pool_connections == network.DEFAULT_POOL_CONNECTIONS
+        assert adapter._pool_maxsize == network.DEFAULT_POOL_MAXSIZE
+        assert adapter._pool_block
+
+    def test_configure_session_replaces_session_with_new_limits(self):
+        old_session = network.get_session()
+
+        network.configure_session(pool_connections=2, pool_maxsize=32)
+        session = network.get_session()
+
+        assert session is not old_session
+        adapter = session.get_adapter("https://modules.easyeda.com")
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 32
+
+    def test_close_session_forces_a_new_session(self):
+        old_session = network.get_session()
+
+        network.close_session()
+
+        assert network.get_session() is not old_session
+
+
+class TestEndpoints:
+    def test_requests_are_sent_to_easyeda_by_default(self):
+        assert network.get_endpoints() == network.Endpoints(
+            network.EASYEDA_API_URL, network.STEP_MODEL_URL, network.OBJ_MODEL_URL
+        )
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_base_url_replaces_easyeda(self, mock_get):
+        network.configure_session(base_url="http://127.0.0.1:8000/")
+        mock_get.return_value = MagicMock(status_code=404, content=b"")
+
+        network.get_component_data("uuid-1")
+        network.get_obj_model("uuid-1")
+
+        assert [call.args[0] for call in mock_get.call_args_list] == [
+            "http://127.0.0.1:8000/api/components/uuid-1",
+            "http://127.0.0.1:8000/obj/uuid-1",
+        ]
+
+    def test_endpoint_families_of_a_base_url_have_their_own_limiter(self):
+        network.configure_session(base_url="http://127.0.0.1:8000")
+
+        limiter = network.get_rate_limiter("http://127.0.0.1:8000/step/uuid-1")
+
+        assert limiter.name == "STEP models"
+
+    def test_transport_sends_the_requests(self):
+        transport = MagicMock(spec=requests.adapters.BaseAdapter)
+        response = requests.Response()
+        response.status_code = 200
+        transport.send.return_value = response
+        network.configure_session(transport=transport)
+
+        assert network.get("https://easyeda.com/api/components/uuid-1") is response
+        (request,), _ = transport.send.call_args
+        assert request.url == "https://easyeda.com/api/components/uuid-1"
+
+
+class TestGet:
+    def test_get_goes_through_shared_session(self):
+        response = MagicMock(status_code=200)
+        with patch.object(
+            network.get_session(), "get", return_value=response
+        ) as mock_get:
+            result = network.get("https://easyeda.com/api/components/uuid-1")
+
+        assert result is response
+        mock_get.assert_called_once_with(
+            "https://easyeda.com/api/components/uuid-1",
+            timeout=(network.DEFAULT_CONNECT_TIMEOUT, network.DEFAULT_READ_TIMEOUT),
+        )
+
+    def test_session_accepts_compressed_responses(self):
+        assert "gzip" in network.get_session().headers["Accept-Encoding"]
+
+    def test_throttled_request_is_sent_again(self):
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        response = MagicMock(status_code=200)
+        with patch.object(
+            network.get_session(), "get", side_effect=[throttled, response]
+        ) as mock_get:
+            result = network.get("https://easyeda.com/api/components/uuid-1")
+
+        assert result is response
+        assert mock_get.call_count == 2
+        limiter = network.get_rate_limiter("https://easyeda.com/api/components/x")
+        assert limiter.throttled == 1
+
+    def test_gives_up_after_max_throttle_retries(self, monkeypatch):
+        monkeypatch.setattr(network, "MAX_THROTTLE_RETRIES", 2)
+        throttled = MagicMock(status_code=503, headers={"Retry-After": "0"})
+        with patch.object(
+            network.get_session(), "get", return_value=throttled
+        ) as mock_get:
+            result = network.get("https://easyeda.com/api/components/uuid-1")
+
+        assert result is throttled
+        assert mock_get.call_count == 3
+
+    def test_endpoint_families_have_their_own_limiter(self):
+        api = network.get_rate_limiter(f"{network.EASYEDA_API_URL}/components/a")
+        step = network.get_rate_limiter(f"{network.STEP_MODEL_URL}/model-1")
+        obj = network.get_rate_limiter(f"{network.OBJ_MODEL_URL}/model-1")
+
+        assert len({id(api), id(step), id(obj)}) == 3
+        assert api is network.get_rate_limiter(f"{network.EASYEDA_API_URL}/products")
+
+
+class TestRetryPolicy:
+    @pytest.fixture(autouse=True)
+    def no_backoff(self, monkeypatch):
+        monkeypatch.setattr(network, "RETRY_BACKOFF", 0)
+
+    def test_connection_errors_are_retried(self):
+        response = MagicMock(status_code=200)
+        with patch.object(
+            network.get_session(),
+            "get",
+            side_effect=[requests.ConnectionError("reset"), response],
+        ) as mock_get:
+            assert network.get("https://easyeda.com/api/components/a") is response
+
+        assert mock_get.call_count == 2
+
+    def test_last_error_is_raised_once_retries_are_exhausted(self):
+        network.configure_session(retries=2)
+        with patch.object(
+            network.get_session(), "get", side_effect=requests.ReadTimeout("slow")
+        ) as mock_get, pytest.raises(requests.ReadTimeout):
+            network.get("https://easyeda.com/api/components/a")
+
+        assert mock_get.call_count == 3
+
+    def test_server_errors_are_retried(self):
+        network.configure_session(retries=1)
+        error = MagicMock(status_code=502)
+        with patch.object(network.get_session(), "get", return_value=error) as mock_get:
+            assert network.get("https://easyeda.com/api/components/a") is error
+
+        assert mock_get.call_count == 2
+
+    def test_configured_timeouts_are_used(self):
+        network.configure_session(connect_timeout=1, read_timeout=2)
+        with patch.object(
+            network.get_session(), "get", return_value=MagicMock(status_code=200)
+        ) as mock_get:
+            network.get("https://easyeda.com/api/components/a")
+
+        assert mock_get.call_args.kwargs["timeout"] == (1, 2)
+
+
+class TestDeadline:
+    def test_requests_fail_once_the_deadline_has_passed(self):
+        mock_get = MagicMock()
+        network.get_session().get = mock_get
+
+        with pytest.raises(network.DeadlineExceeded), network.deadline(0.01):
+            time.sleep(0.02)
+            network.get("https://easyeda.com/api/components/a")
+
+        mock_get.assert_not_called()
+
+    def test_timeouts_are_shortened_to_the_time_left(self):
+        with patch.object(
+            network.get_session(), "get", return_value=MagicMock(status_code=200)
+        ) as mock_get, network.deadline(5):
+            network.get("https://easyeda.com/api/components/a")
+
+        connect_timeout, read_timeout = mock_get.call_args.kwargs["timeout"]
+        assert connect_timeout <= 5
+        assert read_timeout <= 5
+
+    def test_block_fails_even_if_the_error_was_handled(self):
+        def get_ignoring_errors():
+            with contextlib.suppress(requests.RequestException):
+                network.get("https://easyeda.com/api/components/a")
+
+        with pytest.raises(network.DeadlineExceeded), network.deadline(0):
+            get_ignoring_errors()
+
+    def test_background_requests_share_the_deadline(self):
+        with pytest.raises(network.DeadlineExceeded), network.deadline(0):
+            network.prefetch_component_data(["uuid-1"])
+            future = network._take_prefetched(network._get_component_data, "uuid-1")
+            with pytest.raises(network.DeadlineExceeded):
+                future.result()
+
+    def test_throttling_is_reported_before_giving_up(self):
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "60"})
+        limiter = network.get_rate_limiter("https://easyeda.com/api/components/a")
+        with patch.object(
+            network.get_session(), "get", return_value=throttled
+        ), pytest.raises(network.DeadlineExceeded), network.deadline(5):
+            network.get("https://easyeda.com/api/components/a")
+
+        assert limiter.throttled == 1
+
+    def test_wait_for_the_rate_limiter_is_bounded(self):
+        mock_get = MagicMock()
+        network.get_session().get = mock_get
+        limiter = network.get_rate_limiter("https://easyeda.com/api/components/a")
+        limiter.on_throttled(60)
+
+        start = time.monotonic()
+        with pytest.raises(network.DeadlineExceeded), network.deadline(0.1):
+            network.get("https://easyeda.com/api/components/a")
+
+        assert time.monotonic() - start < 5
+        mock_get.assert_not_called()
+
+    def test_no_deadline_by_default(self):
+        with patch.object(
+            network.get_session(), "get", return_value=MagicMock(status_code=200)
+        ), network.deadline(None):
+            network.get("https://easyeda.com/api/components/a")
+
+
+class TestOffline:
+    @pytest.fixture
+    def offline_cache(self, tmp_path):
+        network.configure_session(offline=True)
+        yield cache.configure_cache(
+            str(tmp_path), ttl=None, max_size=None, namespace_ttls={"parts": None}
+        )
+        cache.configure_cache(None)
+
+    def test_no_request_is_sent(self, offline_cache):
+        mock_get = MagicMock()
+        network.get_session().get = mock_get
+
+        with pytest.raises(network.OfflineError):
+            network.get("https://easyeda.com/api/components/uuid-1")
+
+        mock_get.assert_not_called()
+
+    def test_cached_data_is_used_however_old(self, offline_cache):
+        offline_cache.put("components", "uuid-1", b'{"success": true}')
+        path = offline_cache.path("components", "uuid-1")
+        os.utime(path, (0, 0))
+
+        assert network.get_component_data("uuid-1") == {"success": True}
+
+    def test_missing_step_model_is_not_found(self, offline_cache):
+        assert network.get_step_model("model-1") is None
+
+
+class TestGetComponentData:
+    @pytest.fixture
+    def component_cache(self, tmp_path):
+        yield cache.configure_cache(str(tmp_path))
+        cache.configure_cache(None)
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_returns_decoded_component_data(self, mock_get):
+        mock_get.return_value = MagicMock(
+            status_code=200, content=b'{"success": true, "result": {}}'
+        )
+
+        data = network.get_component_data("uuid-1")
+
+        assert data == {"success": True, "result": {}}
+        mock_get.assert_called_once_with("https://easyeda.com/api/components/uuid-1")
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_http_error_returns_none(self, mock_get, caplog):
+        mock_get.return_value = MagicMock(status_code=404, content=b"")
+
+        with caplog.at_level("ERROR"):
+            assert network.get_component_data("uuid-1") is None
+        assert "error code 404" in caplog.text
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_cached_component_is_not_downloaded_again(self, mock_get, component_cache):
+        mock_get.return_value = MagicMock(
+            status_code=200, content=b'{"success": true, "result": {}}'
+        )
+
+        first = network.get_component_data("uuid-1")
+        second = network.get_component_data("uuid-1")
+
+        assert first == second
+        mock_get.assert_called_once()
+        assert component_cache.get("components", "uuid-1") is not None
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_unsuccessful_response_is_not_cached(self, mock_get, component_cache):
+        mock_get.return_value = MagicMock(
+            status_code=200, content=b'{"success": false}'
+        )
+
+        network.get_component_data("uuid-1")
+
+        assert component_cache.get("components", "uuid-1") is None
+
+
+FOOTPRINT_RESPONSE = json.dumps(
+    {
+        "success": True,
+        "result": {
+            "title": "SOT-23-3_L2.9-W1.3-P1.90-LS2.4-BR",
+            "dataStr": {
+                "head": {"c_para": {"link": "https://lcsc.com/C1.pdf", "pre": "U?"}},
+                "shape": ["TRACK~1~3~~0 0 1 1~id1"] * 1000,
+            },
+        },
+    }
+).encode()
+FOOTPRINT_METADATA = {
+    "title": "SOT-23-3_L2.9-W1.3-P1.90-LS2.4-BR",
+    "datasheet": "https://lcsc.com/C1.pdf",
+    "prefix": "U?",
+}
+
+
+class TestGetComponentMetadata:
+    @pytest.fixture
+    def component_cache(self, tmp_path):
+        yield cache.configure_cache(str(tmp_path))
+        cache.configure_cache(None)
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_metadata_is_read_from_the_component_data(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, content=FOOTPRINT_RESPONSE)
+
+        assert network.get_component_metadata("uuid-1") == FOOTPRINT_METADATA
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_cached_metadata_does_not_decode_the_component_data(
+        self, mock_get, monkeypatch, component_cache
+    ):
+        mock_get.return_value = MagicMock(status_code=200, content=FOOTPRINT_RESPONSE)
+        network.get_component_data("uuid-1")
+        mock_get.reset_mock()
+
+        get_component_data = MagicMock()
+        monkeypatch.setattr(network, "get_component_data", get_component_data)
+
+        assert network.get_component_metadata("uuid-1") == FOOTPRINT_METADATA
+        get_component_data.assert_not_called()
+        mock_get.assert_not_called()
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_metadata_of_older_cached_data_is_stored(self, mock_get, component_cache):
+        component_cache.put("components", "uuid-1", FOOTPRINT_RESPONSE)
+
+        assert network.get_component_metadata("uuid-1") == FOOTPRINT_METADATA
+        assert component_cache.get("metadata", "uuid-1") is not None
+        mock_get.assert_not_called()
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_missing_fields_are_empty(self, mock_get):
+        mock_get.return_value = MagicMock(
+            status_code=200, content=b'{"success": true, "result": {}}'
+        )
+
+        assert network.get_component_metadata("uuid-1") == {
+            "title": "",
+            "datasheet": "",
+            "prefix": "",
+        }
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_http_error_returns_none(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=404, content=b"")
+
+        assert network.get_component_metadata("uuid-1") is None
+
+
+SVGS_RESPONSE = (
+    b'{"success": true, "result": [{"component_uuid": "symbol-1"}, '
+    b'{"component_uuid": "symbol-2"}, {"component_uuid": "footprint"}]}'
+)
+
+
+class TestGetComponentUuids:
+    @pytest.fixture
+    def component_cache(self, tmp_path):
+        yield cache.configure_cache(str(tmp_path))
+        cache.configure_cache(None)
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_last_result_is_the_footprint(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, content=SVGS_RESPONSE)
+
+        footprint_uuid, symbol_uuids = network.get_component_uuids("C1234")
+
+        assert footprint_uuid == "footprint"
+        assert symbol_uuids == ["symbol-1", "symbol-2"]
+        mock_get.assert_called_once_with("https://easyeda.com/api/products/C1234/svgs")
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_unknown_part_returns_none(self, mock_get):
+        mock_get.return_value = MagicMock(
+            status_code=200, content=b'{"success": false}'
+        )
+
+        assert network.get_component_uuids("C0") is None
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_resolution_is_read_from_the_index(self, mock_get, component_cache):
+        mock_get.return_value = MagicMock(status_code=200, content=SVGS_RESPONSE)
+
+        first = network.get_component_uuids("C1234")
+        second = network.get_component_uuids("C1234")
+
+        assert first == second
+        mock_get.assert_called_once()
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_index_entry_records_fetch_time(self, mock_get, component_cache):
+        mock_get.return_value = MagicMock(status_code=200, content=SVGS_RESPONSE)
+
+        network.get_component_uuids("C1234")
+
+        entry = json.loads(component_cache.get("parts", "C1234"))
+        assert entry["footprint_uuid"] == "footprint"
+        assert entry["symbol_uuids"] == ["symbol-1", "symbol-2"]
+        assert entry["fetched_at"] > 0
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_stale_resolution_is_revalidated(self, mock_get, tmp_path):
+        cache.configure_cache(str(tmp_path), namespace_ttls={"parts": 0})
+        mock_get.return_value = MagicMock(status_code=200, content=SVGS_RESPONSE)
+
+        network.get_component_uuids("C1234")
+        time.sleep(0.01)
+        network.get_component_uuids("C1234")
+
+        assert mock_get.call_count == 2
+        cache.configure_cache(None)
+
+
+class TestGetModels:
+    @pytest.fixture
+    def component_cache(self, tmp_path):
+        yield cache.configure_cache(str(tmp_path))
+        cache.configure_cache(None)
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_step_model_is_downloaded_from_the_model_bucket(
+        self, mock_get, component_cache
+    ):
+        mock_get.return_value = streamed_response(b"step")
+
+        path = network.get_step_model("model-1")
+
+        assert path == component_cache.path("step", "model-1")
+        with open(path, "rb") as f:
+            assert f.read() == b"step"
+        mock_get.assert_called_once_with(
+            "https://modules.easyeda.com/qAxj6KHrDKw4blvCG8QJPs7Y/model-1",
+            headers={},
+            stream=True,
+        )
+
+    def test_step_model_needs_the_cache(self):
+        assert network.get_step_model("model-1") is None
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_obj_model_is_decoded(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, content=b"newmtl")
+
+        assert network.get_obj_model("model-1") == "newmtl"
+        mock_get.assert_called_once_with(
+            "https://easyeda.com/analyzer/api/3dmodel/model-1"
+        )
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_missing_model_returns_none(self, mock_get, component_cache):
+        mock_get.return_value = streamed_response(b"", status_code=404)
+
+        assert network.get_step_model("model-1") is None
+        assert network.get_obj_model("model-1") is None
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_models_are_cached(self, mock_get, component_cache):
+        mock_get.return_value = streamed_response(b"step")
+
+        network.get_step_model("model-1")
+        network.get_step_model("model-1")
+
+        mock_get.assert_called_once()
+        assert component_cache.get("step", "model-1") == b"step"
+
+
+class TestModelRevalidation:
+    @pytest.fixture
+    def component_cache(self, tmp_path):
+        yield cache.configure_cache(str(tmp_path), ttl=60)
+        cache.configure_cache(None)
+
+    @staticmethod
+    def expire(component_cache, namespace, key):
+        path = component_cache.path(namespace, key)
+        os.utime(path, (time.time(), time.time() - 120))
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_unchanged_step_model_costs_a_304(self, mock_get, component_cache):
+        mock_get.return_value = streamed_response(b"step", headers={"ETag": '"v1"'})
+        path = network.get_step_model("model-1")
+        self.expire(component_cache, "step", "model-1")
+        mock_get.return_value = streamed_response(b"", status_code=304)
+
+        assert network.get_step_model("model-1") == path
+
+        assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert component_cache.contains("step", "model-1")
+        assert component_cache.get("step", "model-1") == b"step"
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_updated_step_model_is_downloaded(self, mock_get, component_cache):
+        mock_get.return_value = streamed_response(b"step", headers={"ETag": '"v1"'})
+        network.get_step_model("model-1")
+        self.expire(component_cache, "step", "model-1")
+        mock_get.return_value = streamed_response(b"new", headers={"ETag": '"v2"'})
+
+        network.get_step_model("model-1")
+
+        assert component_cache.get("step", "model-1") == b"new"
+        assert json.loads(component_cache.get("validators", "model-1.step")) == {
+            "etag": '"v2"',
+            "last_modified": None,
+        }
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_unchanged_obj_model_costs_a_304(self, mock_get, component_cache):
+        last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+        mock_get.return_value = MagicMock(
+            status_code=200, content=b"newmtl", headers={"Last-Modified": last_modified}
+        )
+        network.get_obj_model("model-1")
+        self.expire(component_cache, "obj", "model-1")
+        mock_get.return_value = MagicMock(status_code=304, content=b"", headers={})
+
+        assert network.get_obj_model("model-1") == "newmtl"
+
+        mock_get.assert_called_with(
+            "https://easyeda.com/analyzer/api/3dmodel/model-1",
+            headers={"If-Modified-Since": last_modified},
+        )
+
+    @patch("JLC2KiCadLib.network.get")
+    def test_models_without_validators_are_downloaded(self, mock_get, component_cache):
+        mock_get.return_value = MagicMock(
+            status_code=200, content=b"newmtl", headers={}
+        )
+        network.get_obj_model("model-1")
+        self.expire(component_cache, "obj", "model-1")
+
+        network.get_obj_model("model-1")
+
+        mock_get.assert_called_with("https://easyeda.com/analyzer/api/3dmodel/model-1")
+
+
+class TestCoalescing:
+    @staticmethod
+    def slow_get(url, **kwargs):
+        time.sleep(0.05)
+        if url.endswith("broken"):
+            raise requests.ConnectionError("connection reset")
+        return MagicMock(status_code=200, content=b'{"success": true}')
+
+    def fetch_concurrently(self, uuids):
+        with ThreadPoolExecutor(max_workers=len(uuids)) as executor:
+            futures = [
+                executor.submit(network.get_component_data, uuid) for uuid in uuids
+            ]
+        return futures
+
+    def test_concurrent_fetches_of_a_uuid_share_one_request(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        futures = self.fetch_concurrently(["uuid-1"] * 4)
+
+        assert get.call_count == 1
+        results = [future.result() for future in futures]
+        assert all(result == {"success": True} for result in results)
+        assert network.get_coalescing_stats() == network.CoalescingStats(
+            calls=4, coalesced=3
+        )
+
+    def test_different_uuids_are_fetched_independently(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        self.fetch_concurrently(["uuid-1", "uuid-2"])
+
+        assert get.call_count == 2
+        assert network.get_coalescing_stats().coalesced == 0
+
+    def test_errors_are_shared_with_waiting_fetches(self, monkeypatch):
+        monkeypatch.setattr(network, "get", MagicMock(side_effect=self.slow_get))
+
+        futures = self.fetch_concurrently(["broken"] * 2)
+
+        for future in futures:
+            with pytest.raises(requests.ConnectionError):
+                future.result()
+
+    def test_waiting_fetch_is_bounded_by_its_deadline(self, monkeypatch):
+        def very_slow_get(url, **kwargs):
+            time.sleep(0.5)
+            return MagicMock(status_code=200, content=b'{"success": true}')
+
+        def fetch_within(seconds):
+            with network.deadline(seconds):
+                return network.get_component_data("uuid-1")
+
+        monkeypatch.setattr(network, "get", very_slow_get)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(network.get_component_data, "uuid-1")
+            time.sleep(0.05)
+            start = time.monotonic()
+            waiter = executor.submit(fetch_within, 0.05)
+
+            with pytest.raises(network.DeadlineExceeded):
+                waiter.result()
+            assert time.monotonic() - start < 0.3
+            assert leader.result() == {"success": True}
+
+    def test_deadline_of_another_component_is_not_shared(self, monkeypatch):
+        def get(url, **kwargs):
+            time.sleep(0.05)
+            # the deadline of the component sending the request, if any
+            network._check_deadline(url, (1, 1))
+            return MagicMock(status_code=200, content=b'{"success": true}')
+
+        def fetch_within(seconds):
+            with contextlib.suppress(network.DeadlineExceeded), network.deadline(
+                seconds
+            ):
+                return network.get_component_data("uuid-1")
+
+        get = MagicMock(side_effect=get)
+        monkeypatch.setattr(network, "get", get)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(fetch_within, 0.01)
+            time.sleep(0.01)
+            waiter = executor.submit(network.get_component_data, "uuid-1")
+
+            assert leader.result() is None
+            assert waiter.result() == {"success": True}
+        assert get.call_count == 2
+
+    def test_later_fetches_are_not_coalesced(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        network.get_component_data("uuid-1")
+        network.get_component_data("uuid-1")
+
+        assert get.call_count == 2
+
+
+class InterruptedStream(io.BytesIO):
+    """A response body whose connection drops after `length` bytes."""
+
+    def __init__(self, content, length):
+        super().__init__(content[:length])
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            raise requests.exceptions.ChunkedEncodingError("connection dropped")
+        return data
+
+
+def streamed_response(content, status_code=200, raw=None, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.raw = raw if raw is not None else io.BytesIO(content)
+    return response
+
+
+class TestDownload:
+    def test_response_is_written_in_chunks(self, monkeypatch, tmp_path):
+        content = bytes(range(256)) * 1024
+        monkeypatch.setattr(network, "DOWNLOAD_CHUNK_SIZE", 1000)
+        chunk_sizes = []
+        response = streamed_response(content)
+        iter_content = response.iter_content
+
+        def tracked_iter_content(chunk_size):
+            for chunk in iter_content(chunk_size):
+                chunk_sizes.append(len(chunk))
+                yield chunk
+
+        response.iter_content = tracked_iter_content
+        monkeypatch.setattr(network, "get", MagicMock(return_value=response))
+
+        assert network.download("https://example.com/model", tmp_path / "model")
+
+        assert (tmp_path / "model").read_bytes() == content
+        assert max(chunk_sizes) == 1000
+        assert not (tmp_path / "model.part").exists()
+
+    def test_interrupted_download_leaves_only_a_part_file(self, monkeypatch, tmp_path):
+        raw = InterruptedStream(b"0123456789", 4)
+        get = MagicMock(return_value=streamed_response(None, raw=raw))
+        monkeypatch.setattr(network, "get", get)
+
+        assert not network.download("https://example.com/model", tmp_path / "model")
+
+        assert not (tmp_path / "model").exists()
+        assert (tmp_path / "model.part").read_bytes() == b"0123"
+
+    def test_part_file_is_resumed_with_a_range_request(self, monkeypatch, tmp_path):
+        (tmp_path / "model.part").write_bytes(b"0123")
+        get = MagicMock(return_value=streamed_response(b"456789", status_code=206))
+        monkeypatch.setattr(network, "get", get)
+
+        assert network.download("https://example.com/model", tmp_path / "model")
+
+        assert (tmp_path / "model").read_bytes() == b"0123456789"
+        get.assert_called_once_with(
+            "https://example.com/model",
+            headers={"Range": "bytes=4-", "Accept-Encoding": "identity"},
+            stream=True,
+        )
+
+    def test_ignored_range_request_restarts_the_download(self, monkeypatch, tmp_path):
+        (tmp_path / "model.part").write_bytes(b"0123")
+        get = MagicMock(return_value=streamed_response(b"0123456789"))
+        monkeypatch.setattr(network, "get", get)
+
+        assert network.download("https://example.com/model", tmp_path / "model")
+
+        assert (tmp_path / "model").read_bytes() == b"0123456789"
+
+    def test_unsatisfiable_range_discards_the_part_file(self, monkeypatch, tmp_path):
+        (tmp_path / "model.part").write_bytes(b"0123456789-too-long")
+        get = MagicMock(
+            side_effect=[
+                streamed_response(b"", status_code=416),
+                streamed_response(b"0123456789"),
+            ]
+        )
+        monkeypatch.setattr(network, "get", get)
+
+        assert network.download("https://example.com/model", tmp_path / "model")
+
+        assert (tmp_path / "model").read_bytes() == b"0123456789"
+        assert get.call_args_list[1].kwargs["headers"] == {}
+
+
+class TestPrefetchComponentData:
+    @staticmethod
+    def slow_get(url, **kwargs):
+        time.sleep(0.05)
+        uuid = url.rsplit("/", 1)[-1]
+        content = json.dumps({"success": True, "result": {"uuid": uuid}}).encode()
+        return MagicMock(status_code=200, content=content)
+
+    def test_components_are_fetched_concurrently(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+        uuids = [f"uuid-{i}" for i in range(5)]
+
+        start = time.perf_counter()
+        network.prefetch_component_data(uuids)
+        data = [network.get_component_data(uuid) for uuid in uuids]
+        elapsed = time.perf_counter() - start
+
+        assert [d["result"]["uuid"] for d in data] == uuids
+        assert get.call_count == 5
+        # bounded by the slowest request rather than the sum of the requests
+        assert elapsed < 5 * 0.05
+
+    def test_prefetched_data_is_picked_up_once(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        network.prefetch_component_data(["uuid-1"])
+        network.get_component_data("uuid-1")
+        network.get_component_data("uuid-1")
+
+        assert get.call_count == 2
+
+    def test_prefetching_twice_sends_one_request(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        network.prefetch_component_data(["uuid-1"])
+        network.prefetch_component_data(["uuid-1"])
+        network.get_component_data("uuid-1")
+
+        assert get.call_count == 1
+
+    def test_discarded_prefetch_is_not_picked_up(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        network.prefetch_component_data(["uuid-1"])
+        network.discard_prefetched(["uuid-1"])
+
+        assert network._take_prefetched(network._get_component_data, "uuid-1") is None
+
+    def test_shared_prefetch_is_kept_for_its_other_owners(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        for component_id in ("C1", "C2"):
+            with network.prefetch_owner(component_id):
+                network.prefetch_component_data(["uuid-1"])
+        with network.prefetch_owner("C1"):
+            network.discard_prefetched(["uuid-1"])
+
+        with network.prefetch_owner("C2"):
+            future = network._take_prefetched(network._get_component_data, "uuid-1")
+        assert future is not None
+        assert future.result()["success"]
+        assert get.call_count == 1
+
+    def test_prefetch_of_another_owner_is_waited_for_not_picked_up(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        with network.prefetch_owner("C1"):
+            network.prefetch_component_data(["uuid-1"])
+        with network.prefetch_owner("C2"):
+            assert network.get_component_data("uuid-1")["success"]
+
+        with network.prefetch_owner("C1"):
+            future = network._take_prefetched(network._get_component_data, "uuid-1")
+            network.discard_prefetched(["uuid-1"])
+        assert future is not None
+        assert get.call_count == 1
+
+    def test_waited_prefetch_is_still_picked_up(self, monkeypatch):
+        get = MagicMock(side_effect=self.slow_get)
+        monkeypatch.setattr(network, "get", get)
+
+        network.prefetch_component_data(["uuid-1", "uuid-2"])
+        fetched = network.wait_prefetched(["uuid-1"])
+
+        assert list(fetched) == ["uuid-1"]
+        assert network.get_component_data("uuid-1") == fetched["uuid-1"]
+        assert get.call_count == 2
@@ -0,0 +1,178 @@
+"""
+Unit tests for staged batch conversion (`JLC2KiCadLib.pipeline`).
+
+The stage functions are stubs, so these tests check the scheduling, log
+ordering and result reporting of `run_pipeline` without any network access.
+"""
+
+import logging
+import random
+import threading
+import time
+
+import pytest
+
+from JLC2KiCadLib.pipeline import Stage, log_stages, run_pipeline
+
+
+def fake_resolve(component_id):
+    logging.info(f"resolve {component_id}")
+    time.sleep(random.uniform(0, 0.01))
+    return component_id.lower()
+
+
+def fake_convert(component_id, uuid):
+    time.sleep(random.uniform(0, 0.01))
+    logging.info(f"convert {component_id} {uuid}")
+
+
+def fake_stages(workers=2):
+    return [
+        Stage("resolve", fake_resolve, workers),
+        Stage("convert", fake_convert, workers),
+    ]
+
+
+class TestRunPipeline:
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_results_are_in_input_order(self, workers):
+        component_ids = [f"C{i}" for i in range(20)]
+
+        results = run_pipeline(component_ids, fake_stages(workers))
+
+        assert [result.component_id for result in results] == component_ids
+        assert all(result.status == "ok" for result in results)
+
+    def test_logs_are_written_in_input_order(self, caplog):
+        component_ids = [f"C{i}" for i in range(20)]
+
+        with caplog.at_level("INFO"):
+            run_pipeline(component_ids, fake_stages(4))
+
+        expected = []
+        for component_id in component_ids:
+            expected += [
+                f"resolve {component_id}",
+                f"convert {component_id} {component_id.lower()}",
+            ]
+        assert caplog.messages == expected
+
+    def test_stages_run_concurrently(self):
+        running = set()
+        overlapped = threading.Event()
+        lock = threading.Lock()
+
+        def step(name):
+            def function(component_id, *args):
+                with lock:
+                    running.add(name)
+                    if len(running) > 1:
+                        overlapped.set()
+                time.sleep(0.01)
+                with lock:
+                    running.discard(name)
+                return component_id
+
+            return function
+
+        stages = [Stage("fetch", step("fetch")), Stage("convert", step("convert"))]
+        run_pipeline([f"C{i}" for i in range(8)], stages)
+
+        assert overlapped.is_set()
+
+    def test_component_not_found_skips_the_next_stages(self):
+        converted = []
+
+        stages = [
+            Stage("resolve", lambda component_id: ()),
+            Stage("convert", lambda *args: converted.append(args)),
+        ]
+        (result,) = run_pipeline(["C1"], stages)
+
+        assert result.status == "failed"
+        assert result.message == "component not found"
+        assert converted == []
+
+    def test_stage_returning_none_completes_the_component(self):
+        converted = []
+
+        stages = [
+            Stage("resolve", lambda component_id: None),
+            Stage("convert", lambda *args: converted.append(args)),
+        ]
+        (result,) = run_pipeline(["C1"], stages)
+
+        assert result.status == "ok"
+        assert converted == []
+        assert stages[1].processed == 0
+
+    def test_exception_fails_only_its_component(self, caplog):
+        def convert(component_id, uuid):
+            if component_id == "C2":
+                raise ValueError("bad data")
+
+        stages = [Stage("resolve", fake_resolve), Stage("convert", convert, 2)]
+        with caplog.at_level("ERROR"):
+            results = run_pipeline(["C1", "C2", "C3"], stages)
+
+        assert [result.status for result in results] == ["ok", "failed", "ok"]
+        assert results[1].message == "ValueError: bad data"
+        assert "unexpected error while creating C2" in caplog.text
+
+    def test_stages_are_counted(self):
+        def resolve(component_id):
+            return () if component_id == "C2" else component_id
+
+        stages = [Stage("resolve", resolve), Stage("convert", fake_convert)]
+        run_pipeline(["C1", "C2", "C3"], stages)
+
+        assert (stages[0].processed, stages[0].failed) == (3, 1)
+        assert (stages[1].processed, stages[1].failed) == (2, 0)
+        assert stages[1].busy > 0
+
+    def test_input_is_consumed_lazily(self):
+        consumed = []
+
+        def component_ids():
+            for i in range(100):
+                consumed.append(i)
+                yield f"C{i}"
+
+        def convert(component_id, uuid):
+            # no more than a bounded window of components is read ahead
+            assert len(consumed) <= 2 * (2 + 1) + 2 + int(component_id[1:]) + 1
+
+        stages = [Stage("resolve", fake_resolve), Stage("convert", convert)]
+        results = run_pipeline(component_ids(), stages, queue_size=2)
+
+        assert len(results) == 100
+        assert all(result.status == "ok" for result in results)
+
+    def test_input_errors_are_raised(self):
+        def component_ids():
+            yield "C1"
+            raise OSError("unreadable list")
+
+        with pytest.raises(OSError, match="unreadable list"):
+            run_pipeline(component_ids(), fake_stages())
+
+    def test_handlers_are_restored(self):
+        root_logger = logging.getLogger()
+        handlers = root_logger.handlers[:]
+
+        run_pipeline(["C1"], fake_stages())
+
+        assert root_logger.handlers == handlers
+        assert all(not handler.filters for handler in handlers)
+
+
+class TestLogStages:
+    def test_stage_counters_are_logged(self, caplog):
+        stages = fake_stages(workers=2)
+        run_pipeline(["C1", "C2"], stages)
+
+        with caplog.at_level("INFO"):
+            log_stages(stages, 1.0)
+
+        assert "resolve: 2 components (0 failed), 2.0 components/s" in caplog.text
+        assert "convert: 2 components (0 failed)" in caplog.text
@@ -0,0 +1,274 @@
+"""
+Unit tests for the concurrent prefetch engine (`JLC2KiCadLib.prefetch`).
+
+`JLC2KiCadLib.network.get` is replaced by a fake EasyEDA serving a few
+synthetic components, so these tests run offline.
+"""
+
+import io
+import json
+import sys
+import threading
+import time
+from argparse import Namespace
+
+import pytest
+import requests
+
+from JLC2KiCadLib import JLC2KiCadLib, cache, network
+from JLC2KiCadLib.JLC2KiCadLib import (
+    convert_component,
+    fetch_component,
+    prefetch_main,
+)
+from JLC2KiCadLib.prefetch import get_model_uuids, prefetch
+
+
+def svgnode(model_uuid):
+    attrs = {"uuid": model_uuid, "c_origin": "0,0", "z": "0", "c_rotation": "0,0,0"}
+    return "SVGNODE~" + json.dumps({"attrs": attrs})
+
+
+def footprint_data(*model_uuids):
+    shape = ["TRACK~1~3~~0 0 1 1~id1"] + [svgnode(uuid) for uuid in model_uuids]
+    return {"success": True, "result": {"dataStr": {"shape": shape}}}
+
+
+class FakeEasyEDA:
+    """Serve the payloads of synthetic components, recording the requests."""
+
+    def __init__(self, component_ids, delay=0.01):
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.payloads = {}
+        for component_id in component_ids:
+            svgs = {
+                "success": True,
+                "result": [
+                    {"component_uuid": f"{component_id}-symbol"},
+                    {"component_uuid": f"{component_id}-footprint"},
+                ],
+            }
+            self.payloads[f"{network.EASYEDA_API_URL}/products/{component_id}/svgs"] = (
+                json.dumps(svgs).encode()
+            )
+            self.payloads[
+                f"{network.EASYEDA_API_URL}/components/{component_id}-symbol"
+            ] = b'{"success": true, "result": {}}'
+            self.payloads[
+                f"{network.EASYEDA_API_URL}/components/{component_id}-footprint"
+            ] = json.dumps(footprint_data(f"{component_id}-model")).encode()
+            self.payloads[f"{network.STEP_MODEL_URL}/{component_id}-model"] = b"step"
+            self.payloads[f"{network.OBJ_MODEL_URL}/{component_id}-model"] = b"obj"
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.requests.append(url)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+
+        response = requests.Response()
+        content = self.payloads.get(url)
+        response.status_code = 200 if content is not None else 404
+        response.raw = io.BytesIO(content or b"")
+        return response
+
+
+@pytest.fixture
+def component_cache(tmp_path):
+    yield cache.configure_cache(str(tmp_path))
+    cache.configure_cache(None)
+
+
+class TestGetModelUuids:
+    def test_returns_uuids_of_svgnodes(self):
+        assert get_model_uuids(footprint_data("model-1", "model-2")) == [
+            "model-1",
+            "model-2",
+        ]
+
+    def test_malformed_svgnode_is_ignored(self):
+        data = footprint_data("model-1")
+        data["result"]["dataStr"]["shape"].append("SVGNODE~not-json")
+
+        assert get_model_uuids(data) == ["model-1"]
+
+    def test_unsuccessful_footprint_data_has_no_models(self):
+        assert get_model_uuids({"success": False}) == []
+
+
+class TestPrefetch:
+    def test_all_payloads_are_stored_in_the_cache(self, monkeypatch, component_cache):
+        fake = FakeEasyEDA(["C1", "C2"])
+        monkeypatch.setattr(network, "get", fake.get)
+
+        stats = prefetch(["C1", "C2"], models=["STEP", "WRL"])
+
+        assert stats.components == 2
+        assert stats.requests == 10
+        assert stats.failed_requests == 0
+        for component_id in ("C1", "C2"):
+            assert component_cache.get("parts", component_id) is not None
+            assert component_cache.get("components", f"{component_id}-symbol")
+            assert component_cache.get("components", f"{component_id}-footprint")
+            assert component_cache.get("step", f"{component_id}-model") == b"step"
+            assert component_cache.get("obj", f"{component_id}-model") == b"obj"
+
+    def test_converters_then_read_from_the_cache(self, monkeypatch, component_cache):
+        fake = FakeEasyEDA(["C1"])
+        monkeypatch.setattr(network, "get", fake.get)
+        prefetch(["C1"], models=["STEP"])
+        fake.requests.clear()
+
+        assert network.get_component_uuids("C1") == ("C1-footprint", ["C1-symbol"])
+        assert network.get_component_data("C1-footprint") is not None
+        assert network.get_step_model("C1-model") == component_cache.path(
+            "step", "C1-model"
+        )
+        assert fake.requests == []
+
+    def test_only_selected_model_formats_are_downloaded(
+        self, monkeypatch, component_cache
+    ):
+        fake = FakeEasyEDA(["C1"])
+        monkeypatch.setattr(network, "get", fake.get)
+
+        prefetch(["C1"], models=[])
+
+        assert not any("model" in url for url in fake.requests)
+
+    def test_requests_in_flight_are_bounded(self, monkeypatch, component_cache):
+        component_ids = [f"C{i}" for i in range(20)]
+        fake = FakeEasyEDA(component_ids)
+        monkeypatch.setattr(network, "get", fake.get)
+
+        prefetch(component_ids, models=["STEP"], concurrency=4)
+
+        assert 1 < fake.max_in_flight <= 4
+
+    def test_unknown_components_are_counted(self, monkeypatch, component_cache):
+        fake = FakeEasyEDA(["C1"])
+        monkeypatch.setattr(network, "get", fake.get)
+
+        stats = prefetch(["C1", "C404"], models=[])
+
+        assert stats.not_found == 1
+        assert stats.failed_requests == 1
+
+    def test_malformed_responses_only_fail_their_component(
+        self, monkeypatch, component_cache
+    ):
+        fake = FakeEasyEDA(["C1", "C2", "C3"])
+        svgs_url = f"{network.EASYEDA_API_URL}/products/{{}}/svgs"
+        fake.payloads[svgs_url.format("C2")] = b"<html>maintenance</html>"
+        fake.payloads[svgs_url.format("C3")] = b'{"success": true, "result": []}'
+        monkeypatch.setattr(network, "get", fake.get)
+
+        stats = prefetch(["C1", "C2", "C3"], models=["STEP"])
+
+        assert component_cache.get("step", "C1-model") == b"step"
+        assert (stats.failed_requests, stats.not_found) == (2, 0)
+
+    def test_failed_resolution_is_counted_once(self, monkeypatch, component_cache):
+        def get(url, **kwargs):
+            raise requests.ConnectionError("connection reset")
+
+        monkeypatch.setattr(network, "get", get)
+
+        stats = prefetch(["C1"], models=[])
+
+        assert (stats.failed_requests, stats.not_found) == (1, 0)
+
+
+class TestFetchComponent:
+    def test_models_not_picked_up_are_discarded(self, monkeypatch, component_cache):
+        fake = FakeEasyEDA(["C1"])
+        monkeypatch.setattr(network, "get", fake.get)
+        # e.g. a footprint skipped as existing, its models are not created
+        monkeypatch.setattr(
+            JLC2KiCadLib, "create_footprint", lambda **kwargs: ("footprint:FP", "")
+        )
+        args = Namespace(
+            footprint_creation=True,
+            symbol_creation=False,
+            footprint_lib="footprint",
+            output_dir="out",
+            model_base_variable="",
+            model_dir="packages3d",
+            skip_existing=True,
+            models=["WRL"],
+        )
+
+        component_uuids, model_uuids = fetch_component(
+            "C1", ("C1-footprint", ["C1-symbol"]), args, wait=True
+        )
+        assert model_uuids == ["C1-model"]
+        convert_component("C1", component_uuids, args, model_uuids)
+
+        assert network._take_prefetched(network._get_obj_model, "C1-model") is None
+
+
+class TestPrefetchCommand:
+    def test_components_of_a_file_are_downloaded_into_the_cache(
+        self, monkeypatch, tmp_path
+    ):
+        fake = FakeEasyEDA(["C1", "C2"])
+        monkeypatch.setattr(network, "get", fake.get)
+        parts = tmp_path / "parts.txt"
+        parts.write_text("C1\n\nC2\n")
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            ["JLC2KiCadLib-prefetch", "-f", str(parts), "-cache_dir", str(tmp_path)],
+        )
+
+        try:
+            prefetch_main()
+            store = cache.get_cache()
+            assert store.get("step", "C1-model") == b"step"
+            assert store.get("step", "C2-model") == b"step"
+        finally:
+            cache.configure_cache(None)
+        assert not (tmp_path / "JLC2KiCad_lib").exists()
+
+    def test_components_of_a_bom_are_read_from_standard_input(
+        self, monkeypatch, tmp_path
+    ):
+        fake = FakeEasyEDA(["C1", "C2"])
+        monkeypatch.setattr(network, "get", fake.get)
+        bom = (
+            "Comment,Designator,Footprint,LCSC Part #\n1k,R1,R0402,C1\n2k,R2,R0402,C2\n"
+        )
+        monkeypatch.setattr(sys, "stdin", io.StringIO(bom))
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            ["JLC2KiCadLib-prefetch", "-f", "-", "-cache_dir", str(tmp_path)],
+        )
+
+        try:
+            prefetch_main()
+            store = cache.get_cache()
+            assert store.get("step", "C1-model") == b"step"
+            assert store.get("step", "C2-model") == b"step"
+        finally:
+            cache.configure_cache(None)
+
+    def test_exit_status_is_1_if_a_component_is_not_found(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(network, "get", FakeEasyEDA([]).get)
+        monkeypatch.setattr(
+            sys, "argv", ["JLC2KiCadLib-prefetch", "C404", "-cache_dir", str(tmp_path)]
+        )
+
+        try:
+            with pytest.raises(SystemExit) as exit_info:
+                prefetch_main()
+        finally:
+            cache.configure_cache(None)
+        assert exit_info.value.code == 1
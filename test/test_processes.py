@@ -0,0 +1,93 @@
+"""
+Unit tests for the process pool running the CPU-bound conversions
+(`JLC2KiCadLib.processes`).
+
+The pool is started once for the module, spawning a worker process takes a
+fraction of a second.
+"""
+
+import logging
+import os
+from unittest.mock import patch
+
+import pytest
+
+from JLC2KiCadLib import processes
+from JLC2KiCadLib.batch import run_batch
+from JLC2KiCadLib.footprint.footprint import create_footprint
+from JLC2KiCadLib.footprint.model3d import obj_to_wrl
+
+from .test_model3d import SAMPLE_WRL_SOURCE
+
+
+def get_pid():
+    return os.getpid()
+
+
+def log_and_fail(message):
+    logging.warning(f"converting {message}")
+    raise ValueError(message)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    processes.configure_processes(1)
+    yield
+    processes.configure_processes(0)
+
+
+def run_create_footprint(tmp_path):
+    track = "TRACK~1~3~~0 0 100 0~gge1~0"
+    with patch(
+        "JLC2KiCadLib.footprint.footprint.get_footprint_info",
+        return_value=("test_footprint", "", [track], (0, 0)),
+    ):
+        create_footprint(
+            footprint_component_uuid="fake-uuid",
+            component_id="C1234",
+            footprint_lib="footprint",
+            output_dir=str(tmp_path),
+            model_base_variable="",
+            model_dir="packages3d",
+            skip_existing=False,
+            models=[],
+        )
+    content = (tmp_path / "footprint" / "test_footprint.kicad_mod").read_text()
+    # drop the (tedit ...) timestamp
+    return content.split("\n", 1)[1]
+
+
+class TestRun:
+    def test_without_pool_function_runs_in_the_calling_process(self):
+        assert processes.run(get_pid) == os.getpid()
+
+    def test_function_runs_in_a_worker_process(self, pool):
+        assert processes.run(get_pid) != os.getpid()
+
+    def test_wrl_conversion_gives_the_same_model(self, pool):
+        assert processes.run(obj_to_wrl, SAMPLE_WRL_SOURCE) == obj_to_wrl(
+            SAMPLE_WRL_SOURCE
+        )
+
+    def test_footprint_conversion_gives_the_same_file(self, pool, tmp_path):
+        converted = run_create_footprint(tmp_path / "pool")
+        processes.configure_processes(0)
+        try:
+            assert run_create_footprint(tmp_path / "thread") == converted
+        finally:
+            processes.configure_processes(1)
+
+    def test_exceptions_are_raised_in_the_calling_thread(self, pool):
+        with pytest.raises(ValueError, match="bad data"):
+            processes.run(log_and_fail, "bad data")
+
+    def test_records_are_attributed_to_the_component(self, pool, caplog):
+        def convert(component_id):
+            processes.run(log_and_fail, component_id)
+
+        with caplog.at_level("INFO"):
+            results = run_batch(["C1", "C2"], convert, jobs=2)
+
+        assert [result.status for result in results] == ["failed", "failed"]
+        messages = [message for message in caplog.messages if "converting" in message]
+        assert messages == ["converting C1", "converting C2"]
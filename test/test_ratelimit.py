@@ -0,0 +1,127 @@
+"""
+Unit tests for the adaptive rate limiter (`JLC2KiCadLib.ratelimit`).
+"""
+
+import threading
+import time
+from email.utils import formatdate
+from unittest.mock import MagicMock
+
+import pytest
+
+from JLC2KiCadLib.ratelimit import (
+    MAX_RETRY_AFTER,
+    RateLimiter,
+    WaitTimeout,
+    get_retry_after,
+)
+
+
+class TestRateLimiter:
+    def test_requests_are_paced_by_the_rate(self):
+        limiter = RateLimiter("test", rate=50, max_rate=50)
+
+        start = time.monotonic()
+        for _ in range(11):
+            with limiter.request():
+                pass
+        elapsed = time.monotonic() - start
+
+        # one request from the bucket, then one every 20 ms
+        assert elapsed >= 10 / 50 * 0.9
+
+    def test_requests_in_flight_are_bounded(self):
+        limiter = RateLimiter("test", rate=1000, concurrency=2, max_concurrency=2)
+        max_in_flight = 0
+        lock = threading.Lock()
+
+        def send():
+            nonlocal max_in_flight
+            with limiter.request():
+                with lock:
+                    max_in_flight = max(max_in_flight, limiter.in_flight)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=send) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max_in_flight == 2
+        assert limiter.in_flight == 0
+
+    def test_success_increases_limits_additively(self):
+        limiter = RateLimiter("test", rate=10, concurrency=4)
+
+        limiter.on_success()
+
+        assert limiter.rate == pytest.approx(10.1)
+        assert limiter.concurrency == pytest.approx(4.25)
+
+    def test_throttling_halves_limits(self):
+        limiter = RateLimiter("test", rate=10, concurrency=4)
+
+        limiter.on_throttled(0)
+
+        assert limiter.rate == 5
+        assert limiter.concurrency == 2
+        assert limiter.throttled == 1
+
+    def test_limits_stay_within_bounds(self):
+        limiter = RateLimiter("test", rate=1, min_rate=0.5, concurrency=1)
+
+        for _ in range(5):
+            limiter.on_throttled(0)
+
+        assert limiter.rate == 0.5
+        assert limiter.concurrency == 1
+
+    def test_throttling_pauses_requests(self):
+        limiter = RateLimiter("test", rate=1000)
+
+        limiter.on_throttled(0.1)
+        start = time.monotonic()
+        with limiter.request():
+            pass
+
+        assert time.monotonic() - start >= 0.09
+
+    def test_wait_for_a_paused_limiter_is_bounded(self):
+        limiter = RateLimiter("test", rate=1000)
+
+        limiter.on_throttled(60)
+        start = time.monotonic()
+        with pytest.raises(WaitTimeout), limiter.request(timeout=0.05):
+            pass
+
+        assert time.monotonic() - start < 1
+
+    def test_wait_for_a_free_slot_is_bounded(self):
+        limiter = RateLimiter("test", rate=1000, concurrency=1, max_concurrency=1)
+
+        with limiter.request(), pytest.raises(WaitTimeout), limiter.request(0.05):
+            pass
+
+        assert limiter.in_flight == 0
+
+
+class TestGetRetryAfter:
+    def test_delay_in_seconds(self):
+        response = MagicMock(headers={"Retry-After": "3"})
+
+        assert get_retry_after(response) == 3
+
+    def test_http_date(self):
+        response = MagicMock(headers={"Retry-After": formatdate(time.time() + 10)})
+
+        assert 8 <= get_retry_after(response) <= 10
+
+    def test_missing_or_invalid_header(self):
+        assert get_retry_after(MagicMock(headers={})) is None
+        assert get_retry_after(MagicMock(headers={"Retry-After": "soon"})) is None
+
+    def test_delay_is_capped(self):
+        response = MagicMock(headers={"Retry-After": "86400"})
+
+        assert get_retry_after(response) == MAX_RETRY_AFTER
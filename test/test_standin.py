@@ -0,0 +1,114 @@
+"""
+Tests of the fetch layer (`JLC2KiCadLib.network`) against the local EasyEDA
+stand-in server (`JLC2KiCadLib.standin`).
+
+The server runs on the loopback interface, serving payloads recorded in a
+temporary cache directory, so these tests run offline.
+"""
+
+import json
+import time
+
+import pytest
+
+from JLC2KiCadLib import cache, network
+from JLC2KiCadLib.cache import Cache
+from JLC2KiCadLib.standin import EasyEDAServer
+
+FOOTPRINT = {"success": True, "result": {"title": "SOT-23", "dataStr": {}}}
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """A cache directory holding the payloads of the part C1."""
+    directory = str(tmp_path / "recorded")
+    store = Cache(directory)
+    entry = {"footprint_uuid": "footprint", "symbol_uuids": ["symbol"]}
+    store.put("parts", "C1", json.dumps(entry).encode())
+    store.put("components", "footprint", json.dumps(FOOTPRINT).encode())
+    store.put("components", "symbol", b'{"success": true, "result": {}}')
+    store.put("step", "model", b"ISO-10303-21;")
+    store.put("obj", "model", b"v 0 0 0")
+    return directory
+
+
+@pytest.fixture
+def serve(recorded, monkeypatch):
+    """Start a stand-in server, and send the requests of the session to it."""
+    monkeypatch.setattr(network, "RETRY_BACKOFF", 0)
+    servers = []
+
+    def serve(**options):
+        server = EasyEDAServer(recorded, seed=0, **options).start()
+        servers.append(server)
+        network.configure_session(base_url=server.url, retries=10)
+        return server
+
+    yield serve
+    network.configure_session()
+    for server in servers:
+        server.stop()
+
+
+class TestStandInServer:
+    def test_recorded_payloads_are_served(self, serve, tmp_path):
+        serve()
+        cache.configure_cache(str(tmp_path / "cache"))
+        try:
+            uuids = network.get_component_uuids("C1")
+            data = network.get_component_data("footprint")
+            step_path = network.get_step_model("model")
+            obj = network.get_obj_model("model")
+        finally:
+            cache.configure_cache(None)
+
+        assert uuids == ("footprint", ["symbol"])
+        assert data == FOOTPRINT
+        with open(step_path, "rb") as f:
+            assert f.read() == b"ISO-10303-21;"
+        assert obj == "v 0 0 0"
+
+    def test_unknown_part_is_not_found(self, serve):
+        serve()
+
+        assert network.get_component_uuids("C404") is None
+
+    def test_interrupted_step_download_is_resumed(self, serve, tmp_path):
+        server = serve()
+        path = tmp_path / "model.step"
+        (tmp_path / "model.step.part").write_bytes(b"ISO-")
+
+        assert network.download_step_model("model", path)
+
+        assert path.read_bytes() == b"ISO-10303-21;"
+        assert server.stats["ok"] == 1
+
+    @pytest.mark.parametrize(
+        "option, outcome",
+        [
+            ("error_rate", "errors"),
+            ("throttle_rate", "throttled"),
+            ("drop_rate", "dropped"),
+        ],
+    )
+    def test_injected_failures_are_retried(self, serve, option, outcome):
+        server = serve(**{option: 0.4})
+
+        for _ in range(3):
+            assert network.get_component_data("footprint") == FOOTPRINT
+
+        assert server.stats[outcome] > 0
+        assert server.stats["ok"] == 3
+
+    def test_concurrent_requests_overlap_their_latency(self, serve):
+        server = serve(latency=0.2)
+        uuids = ["footprint", "symbol", "missing"]
+
+        start = time.monotonic()
+        network.prefetch_component_data(uuids)
+        for uuid in uuids:
+            network.get_component_data(uuid)
+        elapsed = time.monotonic() - start
+
+        assert server.stats["requests"] == 3
+        assert elapsed < 2 * 0.2
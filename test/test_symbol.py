@@ -0,0 +1,96 @@
+"""
+Unit tests for symbol creation (`JLC2KiCadLib.symbol.symbol`).
+
+`JLC2KiCadLib.network.get` is replaced by a fake serving synthetic symbol
+data, so these tests run offline.
+"""
+
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from JLC2KiCadLib import cache, network
+from JLC2KiCadLib.symbol.symbol import create_symbol, sanitize_title
+
+
+def symbol_data(title):
+    head = {"x": 0, "y": 0, "c_para": {"pre": "U?"}}
+    return {
+        "success": True,
+        "result": {
+            "title": title,
+            "dataStr": {"head": head, "shape": []},
+            "packageDetail": {"dataStr": {"head": head}},
+        },
+    }
+
+
+@pytest.fixture
+def fake_get(monkeypatch):
+    payloads = {
+        f"{network.EASYEDA_API_URL}/components/whole": symbol_data("LM358 Dual"),
+        f"{network.EASYEDA_API_URL}/components/unit-1": symbol_data("LM358.1"),
+        f"{network.EASYEDA_API_URL}/components/unit-2": symbol_data("LM358.2"),
+    }
+
+    def get(url, **kwargs):
+        return MagicMock(status_code=200, content=json.dumps(payloads[url]).encode())
+
+    mock_get = MagicMock(side_effect=get)
+    monkeypatch.setattr(network, "get", mock_get)
+    return mock_get
+
+
+def make_symbol(symbol_component_uuid, tmp_path):
+    create_symbol(
+        symbol_component_uuid=symbol_component_uuid,
+        footprint_name="footprint:SOIC-8",
+        datasheet_link="",
+        library_name="lib",
+        symbol_path="symbol",
+        output_dir=str(tmp_path),
+        component_id="C7950",
+        skip_existing=False,
+    )
+    return (tmp_path / "symbol" / "lib.kicad_sym").read_text()
+
+
+class TestCreateSymbol:
+    def test_single_unit_symbol(self, fake_get, tmp_path):
+        symbol = make_symbol(["unit-1"], tmp_path)
+
+        assert '(symbol "LM358_1"' in symbol
+        assert '(symbol "LM358_1_0_1"' in symbol
+
+    def test_multi_unit_symbol_is_named_after_the_whole_component(
+        self, fake_get, tmp_path
+    ):
+        symbol = make_symbol(["whole", "unit-1", "unit-2"], tmp_path)
+
+        assert '(symbol "LM358_Dual"' in symbol
+        assert '(symbol "LM358_1_1"' in symbol
+        assert '(symbol "LM358_2_1"' in symbol
+
+    def test_whole_component_is_named_from_cached_metadata(self, fake_get, tmp_path):
+        store = cache.configure_cache(str(tmp_path / "cache"))
+        try:
+            make_symbol(["whole", "unit-1", "unit-2"], tmp_path)
+            # only the metadata of the whole component is needed
+            os.remove(store.path("components", "whole"))
+            fake_get.reset_mock()
+
+            symbol = make_symbol(["whole", "unit-1", "unit-2"], tmp_path / "again")
+        finally:
+            cache.configure_cache(None)
+
+        assert '(symbol "LM358_Dual"' in symbol
+        fake_get.assert_not_called()
+
+
+class TestSanitizeTitle:
+    def test_characters_invalid_in_symbol_names_are_replaced(self):
+        assert sanitize_title('A/B\\C<D>E:F"G H.I') == (
+            "A{slash}B{backslash}C{lt}D{gt}E{colon}F{dblquote}G_H_I"
+        )